@@ -1,25 +1,93 @@
-import streamlit as st
-import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
-from scipy.spatial import ConvexHull
 import math
+import os
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+from material_store import resolve_records
+from index_lines import IndexLineQuery, line_intercept
+from pareto import pareto_front_2d, pareto_layers
+from monte_carlo import formula_score, monte_carlo_ranking
+from performance_indices import COMMON_INDICES, compile_formula, evaluate_indices, index_slope, ratio_formula
+from profiling import timed
+from ranking import others_summary, rank_page, top_k, top_k_per_family
+from selection_export import (
+    EXPORT_FORMATS, MIME_TYPES, export_bytes, export_columns, export_selection
+)
+
+def _remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class TemporaryExport:
+    """Fichero temporal con una exportación preparada para descargar
+    
+    El fichero se borra con ``discard`` o cuando el objeto se libera (p. ej.
+    al terminar la sesión de Streamlit que lo guarda), y en último caso al
+    salir del proceso.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+    
+    @property
+    def available(self):
+        return self._finalizer.alive and os.path.exists(self.path)
+    
+    def discard(self):
+        self._finalizer()
+
 
 class PerformanceIndexTool:
     """Herramienta para índices de rendimiento en gráficos de Ashby"""
     
+    # Consultas de semiplano que se conservan, con expulsión LRU
+    MAX_LINE_QUERIES = 16
+    
     def __init__(self):
-        self.common_indices = {
-            'E/ρ (Rigidez específica)': {'numerator': 'young_modulus', 'denominator': 'density', 'slope': 1},
-            'E^(1/2)/ρ (Rigidez específica optimizada)': {'numerator': 'young_modulus', 'denominator': 'density', 'slope': 0.5},
-            'σy/ρ (Resistencia específica)': {'numerator': 'yield_strength', 'denominator': 'density', 'slope': 1},
-            'E/ρ² (Placas en flexión)': {'numerator': 'young_modulus', 'denominator': 'density', 'slope': 2},
-            'E^(1/3)/ρ (Barras en compresión)': {'numerator': 'young_modulus', 'denominator': 'density', 'slope': 1/3},
-            'KIC/ρ (Tenacidad específica)': {'numerator': 'fracture_toughness', 'denominator': 'density', 'slope': 1}
-        }
+        self.common_indices = dict(COMMON_INDICES)
+        # Consultas de semiplano por (almacenamiento, versión, ejes, pendiente)
+        self._line_queries = OrderedDict()
+        # La herramienta puede compartirse entre sesiones que se ejecutan en hilos distintos
+        self._lock = threading.Lock()
+    
+    def line_query(self, store, x_key, y_key, slope):
+        """Consulta precalculada de materiales sobre líneas de pendiente ``slope``"""
+        key = (store.uid, store.version, x_key, y_key, slope)
+        with self._lock:
+            query = self._line_queries.get(key)
+            if query is not None:
+                self._line_queries.move_to_end(key)
+                return query
+        
+        query = IndexLineQuery.from_store(store, x_key, y_key, slope)
+        with self._lock:
+            self._line_queries[key] = query
+            while len(self._line_queries) > self.MAX_LINE_QUERIES:
+                self._line_queries.popitem(last=False)
+        return query
+    
+    def materials_above_line(self, store, x_key, y_key, index_config, x_range, y_range,
+                             line_position=0.5, fully=False, rows=None):
+        """Filas de los materiales por encima de la línea de índice
+        
+        La línea es la misma que dibuja ``add_performance_line`` con los
+        rangos de ejes ``x_range`` e ``y_range`` en log10. Con ``fully`` solo
+        se devuelven las elipses completamente por encima; si no, también las
+        que cortan la línea.
+        """
+        slope = index_slope(index_config)
+        intercept = line_intercept(x_range, y_range, slope, line_position)
+        return self.line_query(store, x_key, y_key, slope).above(intercept, fully, rows)
     
     def add_performance_line(self, fig, x_property, y_property, index_config, line_position=0.5):
         """Agrega una línea de índice de rendimiento al gráfico"""
+        import plotly.graph_objects as go
         
         # Obtener rango del gráfico
         x_range = fig.layout.xaxis.range if fig.layout.xaxis.range else [1, 1000]
@@ -29,8 +97,8 @@ class PerformanceIndexTool:
         x_min, x_max = 10**x_range[0], 10**x_range[1]
         y_min, y_max = 10**y_range[0], 10**y_range[1]
         
-        # Calcular pendiente de la línea
-        slope = index_config['slope']
+        # Calcular pendiente de la línea (índice constante a lo largo de ella)
+        slope = index_slope(index_config)
         
         # Generar puntos de la línea
         x_line = np.logspace(np.log10(x_min), np.log10(x_max), 100)
@@ -63,6 +131,8 @@ class GraphicalSelection:
     
     def create_selection_tools(self):
         """Crea herramientas de selección gráfica"""
+        import streamlit as st
+        
         st.subheader("🎯 Selección Gráfica")
         
         col1, col2 = st.columns(2)
@@ -90,87 +160,199 @@ class MaterialAnalyzer:
     def __init__(self, database):
         self.database = database
     
-    def calculate_material_indices(self, materials_dict):
-        """Calcula índices de rendimiento para los materiales"""
-        indices_data = []
+    def calculate_material_indices(self, materials_dict, index_configs=None, include_bounds=True):
+        """Calcula índices de rendimiento para los materiales
+        
+        Evalúa todos los índices de ``PerformanceIndexTool.common_indices`` (o
+        de ``index_configs``) sobre las columnas completas. Cada índice aporta
+        una columna con el valor calculado con las medias de los rangos y, si
+        ``include_bounds``, sus límites exactos '(min)' y '(max)'.
+        """
+        if index_configs is None:
+            index_configs = PerformanceIndexTool().common_indices
+        
+        store, rows = resolve_records(materials_dict, self.database.store)
+        columns = {
+            'Material': [store.names[row] for row in rows],
+            'Familia': np.asarray(store.families, dtype=object)[store.family_codes[rows]]
+        }
         
-        for material_name, material_props in materials_dict.items():
-            row = {'Material': material_name, 'Familia': material_props['family']}
-            
-            # Calcular índices comunes usando valores medios
-            if 'young_modulus' in material_props and 'density' in material_props:
-                E_avg = np.mean(material_props['young_modulus'])
-                rho_avg = np.mean(material_props['density'])
-                
-                row['E/ρ'] = E_avg / rho_avg
-                row['E^(1/2)/ρ'] = np.sqrt(E_avg) / rho_avg
-                row['E^(1/3)/ρ'] = np.power(E_avg, 1/3) / rho_avg
-            
-            if 'yield_strength' in material_props and 'density' in material_props:
-                sigma_avg = np.mean(material_props['yield_strength'])
-                rho_avg = np.mean(material_props['density'])
-                row['σy/ρ'] = sigma_avg / rho_avg
-            
-            if 'fracture_toughness' in material_props and 'density' in material_props:
-                K_avg = np.mean(material_props['fracture_toughness'])
-                rho_avg = np.mean(material_props['density'])
-                row['KIC/ρ'] = K_avg / rho_avg
-            
-            indices_data.append(row)
+        for label, (value, low, high) in evaluate_indices(store, rows, index_configs).items():
+            columns[label] = value
+            if include_bounds:
+                columns[f'{label} (min)'] = low
+                columns[f'{label} (max)'] = high
         
-        return pd.DataFrame(indices_data)
+        return pd.DataFrame(columns)
     
-    def create_pareto_frontier(self, fig, materials_dict, x_property, y_property):
-        """Agrega frontera de Pareto al gráfico"""
+    def _evaluate_index(self, materials_dict, index_label, index_configs=None):
+        """(almacenamiento, filas, (valor, mínimo, máximo)) de un único índice"""
+        if index_configs is None:
+            index_configs = PerformanceIndexTool().common_indices
+        store, rows = resolve_records(materials_dict, self.database.store)
+        result = evaluate_indices(store, rows, {index_label: index_configs[index_label]})
+        return store, rows, result[index_label]
+    
+    @staticmethod
+    def _ranked_frame(store, rows, positions, index_label, value, low, high):
+        return pd.DataFrame({
+            'Material': [store.names[row] for row in rows[positions]],
+            'Familia': np.asarray(store.families, dtype=object)[store.family_codes[rows[positions]]],
+            index_label: value[positions],
+            f'{index_label} (min)': low[positions],
+            f'{index_label} (max)': high[positions]
+        })
+    
+    def index_ranking(self, materials_dict, index_label, k=20, largest=True, per_family=False,
+                      index_configs=None):
+        """Los k mejores materiales para un índice, sin ordenar todo el catálogo
+        
+        Args:
+            materials_dict: Vista o diccionario de materiales a analizar.
+            index_label: Nombre del índice en ``common_indices`` (o ``index_configs``).
+            k: Número de materiales del ranking (por familia si ``per_family``).
+            largest: True para ordenar de mayor a menor valor del índice.
+            per_family: Seleccionar los k mejores de cada familia.
+        
+        Returns:
+            (DataFrame de los seleccionados de mejor a peor, resumen
+            {'count', 'mean'} del resto de materiales con valor definido)
+        """
+        store, rows, (value, low, high) = self._evaluate_index(materials_dict, index_label, index_configs)
+        if per_family:
+            selected = top_k_per_family(value, store.family_codes[rows], k, largest)
+            # Mezclar las familias en un único ranking de mejor a peor
+            selected = selected[np.argsort(-value[selected] if largest else value[selected], kind='stable')]
+        else:
+            selected = top_k(value, k, largest)
+        frame = self._ranked_frame(store, rows, selected, index_label, value, low, high)
+        return frame, others_summary(value, selected)
+    
+    def index_ranking_page(self, materials_dict, index_label, page, page_size=50, largest=True,
+                           index_configs=None):
+        """Página ``page`` (desde 0) del ranking completo y número total de materiales con valor"""
+        store, rows, (value, low, high) = self._evaluate_index(materials_dict, index_label, index_configs)
+        positions = rank_page(value, page, page_size, largest)
+        frame = self._ranked_frame(store, rows, positions, index_label, value, low, high)
+        return frame, int(np.count_nonzero(~np.isnan(value)))
+    
+    def monte_carlo_index_ranking(self, materials_dict, index_label, n_samples=2000, top_k=5,
+                                  distribution='uniform', largest=True, seed=None, index_configs=None):
+        """Ranking probabilístico de un índice muestreando dentro de los rangos
+        
+        En lugar de reducir cada rango a su media, se toman ``n_samples``
+        muestras de las propiedades del índice (ver ``monte_carlo``).
+        
+        Returns:
+            DataFrame con Material, Familia, 'P(1º)', 'P(top k)' e 'Índice medio',
+            ordenado por probabilidad de quedar primero.
+        """
+        if index_configs is None:
+            index_configs = PerformanceIndexTool().common_indices
+        store, rows = resolve_records(materials_dict, self.database.store)
+        formula = compile_formula(ratio_formula(index_configs[index_label]), store.property_keys)
+        result = monte_carlo_ranking(
+            store, rows, formula_score(formula), n_samples=n_samples, top_k=top_k,
+            distribution=distribution, largest=largest, seed=seed
+        )
         
-        # Extraer puntos para análisis de Pareto
-        points = []
-        materials = []
+        df = pd.DataFrame({
+            'Material': [store.names[row] for row in rows],
+            'Familia': np.asarray(store.families, dtype=object)[store.family_codes[rows]],
+            'P(1º)': result['first_probability'],
+            f'P(top {top_k})': result['top_k_probability'],
+            'Índice medio': result['mean_score']
+        })
+        df = df.sort_values(['P(1º)', f'P(top {top_k})'], ascending=False, kind='stable')
+        return df.reset_index(drop=True)
+    
+    def pareto_frontier_materials(self, materials_dict, x_property, y_property,
+                                  x_direction='max', y_direction='max'):
+        """Materiales no dominados en 2-D, ordenados por el eje X
         
+        Se usa el extremo optimista de cada rango: el máximo al maximizar un
+        objetivo y el mínimo al minimizarlo. Devuelve (nombres, x, y).
+        """
         x_key = self.database.properties[x_property]
         y_key = self.database.properties[y_property]
+        store, rows = resolve_records(materials_dict, self.database.store)
         
-        for material_name, material_data in materials_dict.items():
-            if x_key in material_data and y_key in material_data:
-                # Usar valores máximos para Pareto (optimista)
-                x_val = material_data[x_key][1]  # max
-                y_val = material_data[y_key][1]  # max
-                points.append([x_val, y_val])
-                materials.append(material_name)
-        
-        if len(points) < 3:
-            return fig
+        x_values = (store.maxs if x_direction == 'max' else store.mins)[x_key][rows]
+        y_values = (store.maxs if y_direction == 'max' else store.mins)[y_key][rows]
+        
+        front = pareto_front_2d(x_values, y_values, x_direction, y_direction)
+        names = [store.names[row] for row in rows[front]]
+        return names, x_values[front], y_values[front]
+    
+    def multi_objective_pareto(self, materials_dict, objectives, dominance='surely', max_layers=None):
+        """Ranking por capas de Pareto con varios objetivos sobre los rangos de propiedades
+        
+        Args:
+            materials_dict: Vista o diccionario de materiales a analizar.
+            objectives: Diccionario {propiedad: 'max' | 'min'}.
+            dominance: 'point' (extremos optimistas), 'surely' o 'possibly'
+                (ver ``pareto.pareto_front``).
+            max_layers: Número máximo de capas a calcular.
+        
+        Returns:
+            DataFrame con Material, Familia y 'Capa de Pareto' (1 = frontera),
+            ordenado por capa; los materiales sin alguna propiedad se omiten.
+        """
+        store, rows = resolve_records(materials_dict, self.database.store)
+        keys = [self.database.properties[prop] for prop in objectives]
+        
+        lo = np.column_stack([store.mins[key][rows] for key in keys])
+        hi = np.column_stack([store.maxs[key][rows] for key in keys])
+        layers = pareto_layers(lo, hi, list(objectives.values()), dominance, max_layers)
+        
+        ranked = np.flatnonzero(layers > 0)
+        ranked = ranked[np.argsort(layers[ranked], kind='stable')]
+        return pd.DataFrame({
+            'Material': [store.names[row] for row in rows[ranked]],
+            'Familia': [store.family_of(row) for row in rows[ranked]],
+            'Capa de Pareto': layers[ranked]
+        })
+    
+    def create_pareto_frontier(self, fig, materials_dict, x_property, y_property,
+                               x_direction='max', y_direction='max'):
+        """Agrega frontera de Pareto al gráfico"""
+        import plotly.graph_objects as go
+        
+        names, x_front, y_front = self.pareto_frontier_materials(
+            materials_dict, x_property, y_property, x_direction, y_direction
+        )
         
-        points = np.array(points)
+        if len(names) < 2:
+            return fig
         
-        # Calcular envolvente convexa (aproximación a frontera de Pareto)
-        try:
-            hull = ConvexHull(np.log10(points))  # En escala log
-            hull_points = points[hull.vertices]
-            
-            # Agregar frontera de Pareto
-            fig.add_trace(go.Scatter(
-                x=hull_points[:, 0],
-                y=hull_points[:, 1],
-                mode='lines',
-                line=dict(color='purple', width=2, dash='dot'),
-                name='Frontera de Pareto',
-                hovertemplate='Frontera de materiales óptimos<extra></extra>'
-            ))
-        
-        except Exception as e:
-            st.warning(f"No se pudo calcular la frontera de Pareto: {e}")
+        # Agregar frontera de Pareto
+        fig.add_trace(go.Scatter(
+            x=x_front,
+            y=y_front,
+            mode='lines+markers',
+            line=dict(color='purple', width=2, dash='dot'),
+            name='Frontera de Pareto',
+            text=names,
+            hovertemplate='<b>%{text}</b><br>Frontera de materiales óptimos<extra></extra>'
+        ))
         
         return fig
 
 class ExportTools:
-    """Herramientas para exportar resultados"""
+    """Herramientas para exportar resultados
     
-    def __init__(self):
-        pass
+    Las listas de materiales se exportan por tramos directamente desde el
+    almacenamiento columnar (ver ``selection_export``), sin construir un
+    DataFrame con toda la selección.
+    """
+    
+    def __init__(self, database):
+        self.database = database
     
     def create_export_panel(self):
         """Crea panel de herramientas de exportación"""
+        import streamlit as st
+        
         st.subheader("💾 Exportar Resultados")
         
         col1, col2, col3 = st.columns(3)
@@ -187,26 +369,43 @@ class ExportTools:
             if st.button("📄 Generar Reporte"):
                 st.info("Funcionalidad en desarrollo")
     
-    def export_materials_list(self, materials_dict, filename="materiales_seleccionados.csv"):
-        """Exporta lista de materiales a CSV"""
-        data = []
-        for material_name, material_props in materials_dict.items():
-            row = {
-                'Material': material_name,
-                'Familia': material_props['family']
-            }
-            
-            # Agregar propiedades
-            for prop_display, prop_key in self.database.properties.items():
-                if prop_key in material_props:
-                    min_val, max_val = material_props[prop_key]
-                    row[f'{prop_display} (min)'] = min_val
-                    row[f'{prop_display} (max)'] = max_val
-            
-            data.append(row)
-        
-        df = pd.DataFrame(data)
-        return df.to_csv(index=False)
+    def available_columns(self):
+        """Nombres de las columnas exportables, en su orden por defecto"""
+        return [name for name, _ in export_columns(self.database.properties)]
+    
+    def export_materials_list(self, materials_dict, output=None, file_format='csv', columns=None, chunk_size=None):
+        """Exporta lista de materiales a CSV, JSON Lines o Parquet
+        
+        Args:
+            materials_dict: Vista de materiales filtrados o diccionario de materiales.
+            output: Ruta o fichero binario; si es None se devuelve el contenido en bytes.
+            file_format: 'csv', 'jsonl' o 'parquet'.
+            columns: Columnas a exportar, en orden (ver ``available_columns``);
+                por defecto todas.
+            chunk_size: Materiales por tramo de escritura (por defecto según el formato).
+        """
+        store, rows = resolve_records(materials_dict, self.database.store)
+        options = dict(properties=self.database.properties, columns=columns, chunk_size=chunk_size)
+        if output is None:
+            return export_bytes(store, rows, file_format, **options)
+        export_selection(store, rows, output, file_format, **options)
+        return output
+    
+    def export_to_temporary_file(self, materials_dict, file_format='csv', columns=None):
+        """Exporta por tramos a un fichero temporal; devuelve un ``TemporaryExport``
+        
+        Para descargas desde la aplicación: el contenido no se guarda en
+        memoria ni en el estado de la sesión, solo la ruta del fichero.
+        """
+        descriptor, path = tempfile.mkstemp(prefix='ashby_export_', suffix=f'.{file_format}')
+        os.close(descriptor)
+        exported = TemporaryExport(path)
+        try:
+            self.export_materials_list(materials_dict, output=path, file_format=file_format, columns=columns)
+        except BaseException:
+            exported.discard()
+            raise
+        return exported
     
     def generate_selection_report(self, materials_dict, filters_applied):
         """Genera reporte de selección de materiales"""
@@ -243,6 +442,7 @@ class AdvancedVisualization:
     
     def create_3d_plot(self, x_property, y_property, z_property, materials_dict):
         """Crea gráfico 3D de propiedades"""
+        import plotly.graph_objects as go
         
         fig = go.Figure()
         
@@ -294,6 +494,7 @@ class AdvancedVisualization:
     
     def create_radar_chart(self, materials_list, properties_list):
         """Crea gráfico de radar para comparar materiales"""
+        import plotly.graph_objects as go
         
         fig = go.Figure()
         
@@ -331,8 +532,11 @@ class AdvancedVisualization:
         return fig
 
 # Función para integrar funcionalidades avanzadas en la aplicación principal
+@timed('herramientas_avanzadas')
 def add_advanced_features_to_app(database, chart_generator, filtered_materials):
     """Agrega funcionalidades avanzadas a la aplicación principal"""
+    import streamlit as st
+    import plotly.express as px
     
     st.header("🔬 Herramientas Avanzadas")
     
@@ -346,24 +550,62 @@ def add_advanced_features_to_app(database, chart_generator, filtered_materials):
         index_options = list(performance_tool.common_indices.keys())
         selected_index = st.selectbox("Seleccionar índice:", index_options)
         
-        # Tabla de índices calculados
+        col_k, col_order = st.columns(2)
+        with col_k:
+            top_count = st.slider("Materiales en el ranking (k):", 5, 50, 20)
+        with col_order:
+            largest = st.radio("Orden:", ["Mayor es mejor", "Menor es mejor"], horizontal=True) == "Mayor es mejor"
+        per_family = st.checkbox("Top-k por familia")
+        
+        # Solo los k mejores se ordenan y se dibujan; el resto se agrega en "Otros"
         analyzer = MaterialAnalyzer(database)
-        indices_df = analyzer.calculate_material_indices(filtered_materials)
+        top_df, others = analyzer.index_ranking(
+            filtered_materials, selected_index, k=top_count, largest=largest, per_family=per_family
+        )
         
-        if not indices_df.empty:
-            st.dataframe(indices_df, use_container_width=True)
+        if not top_df.empty:
+            bar_df = top_df[['Material', 'Familia', selected_index]]
+            if others['count']:
+                bar_df = pd.concat([bar_df, pd.DataFrame({
+                    'Material': [f"Otros ({others['count']}, media)"],
+                    'Familia': ['Otros'],
+                    selected_index: [others['mean']]
+                })], ignore_index=True)
+            
+            fig_bar = px.bar(
+                bar_df,
+                x='Material',
+                y=selected_index,
+                color='Familia',
+                title=f"Ranking de Materiales por {selected_index}"
+            )
+            fig_bar.update_xaxes(tickangle=45, categoryorder='array', categoryarray=bar_df['Material'])
+            st.plotly_chart(fig_bar, use_container_width=True)
             
-            # Gráfico de barras de índices
-            if selected_index in indices_df.columns:
-                fig_bar = px.bar(
-                    indices_df.sort_values(selected_index, ascending=False),
-                    x='Material',
-                    y=selected_index,
-                    color='Familia',
-                    title=f"Ranking de Materiales por {selected_index}"
+            # Tabla completa paginada: cada página solo selecciona sus filas
+            with st.expander("Tabla completa del ranking"):
+                page_size = 50
+                page = st.number_input("Página:", min_value=1, value=1, step=1) - 1
+                page_df, total = analyzer.index_ranking_page(
+                    filtered_materials, selected_index, int(page), page_size, largest
                 )
-                fig_bar.update_xaxes(tickangle=45)
-                st.plotly_chart(fig_bar, use_container_width=True)
+                st.caption(f"Materiales con índice definido: {total} · "
+                           f"página {int(page) + 1} de {max(1, math.ceil(total / page_size))}")
+                st.dataframe(page_df, use_container_width=True)
+    
+        with st.expander("🎲 Ranking Monte Carlo (incertidumbre de los rangos)"):
+            col_samples, col_dist = st.columns(2)
+            with col_samples:
+                n_samples = st.number_input("Muestras:", 100, 100000, 2000, step=100)
+            with col_dist:
+                distribution = st.radio("Distribución:", ["uniform", "log-uniform"], horizontal=True)
+            
+            if st.button("Calcular probabilidades"):
+                mc_df = analyzer.monte_carlo_index_ranking(
+                    filtered_materials, selected_index, n_samples=int(n_samples), top_k=top_count,
+                    distribution=distribution, largest=largest, seed=0
+                )
+                st.dataframe(mc_df.head(50), use_container_width=True)
     
     with tab2:
         st.subheader("🎲 Visualización 3D")
@@ -409,28 +651,45 @@ def add_advanced_features_to_app(database, chart_generator, filtered_materials):
     
     with tab4:
         st.subheader("💾 Exportación y Reportes")
-        export_tool = ExportTools()
+        export_tool = ExportTools(database)
         export_tool.create_export_panel()
         
-        # Mostrar datos para descarga
+        # Descarga de la lista filtrada: solo se genera al pedirlo, no en cada ejecución
         if filtered_materials:
-            # Crear DataFrame para descarga
-            export_data = []
-            for material_name, material_props in filtered_materials.items():
-                row = {'Material': material_name, 'Familia': material_props['family']}
-                for prop_display, prop_key in database.properties.items():
-                    if prop_key in material_props:
-                        min_val, max_val = material_props[prop_key]
-                        row[f'{prop_display} (min)'] = min_val
-                        row[f'{prop_display} (max)'] = max_val
-                export_data.append(row)
+            col_format, col_columns = st.columns([1, 3])
+            with col_format:
+                file_format = st.selectbox("Formato:", EXPORT_FORMATS, key="export_format")
+            with col_columns:
+                export_columns_selected = st.multiselect(
+                    "Columnas:", export_tool.available_columns(), default=export_tool.available_columns(),
+                    key="export_columns"
+                )
             
-            df_export = pd.DataFrame(export_data)
+            store, rows = resolve_records(filtered_materials, database.store)
+            signature = (file_format, tuple(export_columns_selected), store.uid, store.version,
+                         hash(rows.tobytes()))
+            # La sesión solo guarda el fichero temporal preparado, no su contenido
+            prepared = st.session_state.get('export_file')
+            if prepared is not None and (prepared['signature'] != signature or not prepared['file'].available):
+                st.session_state.pop('export_file')['file'].discard()
+                prepared = None
+            if st.button("⚙️ Preparar exportación", disabled=not export_columns_selected):
+                if prepared is not None:
+                    st.session_state.pop('export_file')['file'].discard()
+                    prepared = None
+                try:
+                    exported = export_tool.export_to_temporary_file(
+                        filtered_materials, file_format=file_format, columns=export_columns_selected
+                    )
+                    prepared = st.session_state['export_file'] = {'signature': signature, 'file': exported}
+                except ImportError as error:
+                    st.error(str(error))
             
-            csv = df_export.to_csv(index=False)
-            st.download_button(
-                label="📥 Descargar CSV",
-                data=csv,
-                file_name="materiales_seleccionados.csv",
-                mime="text/csv"
-            )
\ No newline at end of file
+            if prepared is not None:
+                with open(prepared['file'].path, 'rb') as handle:
+                    st.download_button(
+                        label=f"📥 Descargar {file_format.upper()} ({len(rows)} materiales)",
+                        data=handle,
+                        file_name=f"materiales_seleccionados.{file_format}",
+                        mime=MIME_TYPES[file_format]
+                    )
\ No newline at end of file
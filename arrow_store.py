@@ -0,0 +1,193 @@
+"""Catálogo de materiales en disco en formato Arrow IPC, abierto por mapeo en memoria
+
+Cada material es una fila con las columnas 'name', 'family' y 'color'
+(codificadas como diccionario) y dos columnas float64 '<clave>_min' y
+'<clave>_max' por propiedad, con NaN si el material no la define. El fichero
+se escribe sin compresión y en un solo lote, de modo que al abrirlo con
+``pa.memory_map`` las columnas numéricas se usan sin copiarlas y varios
+procesos comparten las mismas páginas del sistema operativo.
+
+Uso (genera un catálogo con los materiales incluidos en la aplicación):
+    python arrow_store.py catalogo.arrow --extended
+"""
+import argparse
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from material_store import ColumnarMaterialStore
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Los catálogos en disco requieren pyarrow (pip install pyarrow)")
+
+
+def write_arrow_catalog(store, path):
+    """Escribe un ColumnarMaterialStore como fichero Arrow IPC"""
+    _require_pyarrow()
+    columns = {
+        'name': pa.array(np.asarray(store.names, dtype=object), type=pa.string()),
+        'family': pa.DictionaryArray.from_arrays(
+            pa.array(store.family_codes, type=pa.int32()), pa.array(store.families, type=pa.string())
+        ),
+        'color': pa.DictionaryArray.from_arrays(
+            pa.array(store.color_codes, type=pa.int32()), pa.array(store.colors, type=pa.string())
+        )
+    }
+    for key in store.property_keys:
+        columns[f'{key}_min'] = pa.array(store.mins[key], type=pa.float64())
+        columns[f'{key}_max'] = pa.array(store.maxs[key], type=pa.float64())
+
+    table = pa.table(columns)
+    with pa.OSFile(str(path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(table), 1))
+
+
+def catalog_property_keys(path):
+    """Claves de propiedad presentes en el catálogo, leídas solo del esquema"""
+    _require_pyarrow()
+    with pa.memory_map(str(path), 'r') as source:
+        schema = pa.ipc.open_file(source).schema
+    return tuple(name[:-len('_min')] for name in schema.names if name.endswith('_min'))
+
+
+class ArrowNameColumn(Sequence):
+    """Nombres de los materiales sobre la columna Arrow, sin convertirla a una lista
+
+    Cada nombre se convierte a ``str`` al acceder a él; los recorridos
+    completos convierten la columna por lotes.
+    """
+
+    BATCH_SIZE = 65536
+
+    def __init__(self, array):
+        self._array = array
+
+    def __len__(self):
+        return len(self._array)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return self._array[row].to_pylist()
+        return self._array[int(row)].as_py()
+
+    def __iter__(self):
+        for start in range(0, len(self._array), self.BATCH_SIZE):
+            yield from self._array.slice(start, self.BATCH_SIZE).to_pylist()
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self._array.to_numpy(zero_copy_only=False), dtype=dtype)
+
+
+class LazyNameIndex(Mapping):
+    """Diccionario nombre -> fila que se construye en la primera consulta
+
+    Construir el diccionario es lo más costoso de abrir un catálogo grande;
+    la mayoría de las sesiones nunca buscan materiales por nombre.
+    """
+
+    def __init__(self, names):
+        self._names = names
+        self._lookup = None
+
+    def _index(self):
+        if self._lookup is None:
+            self._lookup = {name: row for row, name in enumerate(self._names)}
+        return self._lookup
+
+    def __getitem__(self, name):
+        return self._index()[name]
+
+    def __iter__(self):
+        return iter(self._index())
+
+    def __len__(self):
+        return len(self._names)
+
+
+def _column_array(table, name):
+    column = table.column(name)
+    return column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+
+def read_arrow_catalog(path, property_keys=None):
+    """Abre un catálogo Arrow IPC mapeado en memoria como ColumnarMaterialStore
+
+    Args:
+        path: Ruta del fichero, o fichero Arrow de acceso aleatorio ya
+            abierto (``pa.NativeFile``).
+        property_keys: Claves a cargar (proyección de columnas); por defecto
+            todas las del catálogo. Las columnas no pedidas no se leen.
+
+    Las columnas numéricas son vistas de solo lectura sobre el fichero
+    mapeado; los nombres se quedan en la columna Arrow (``ArrowNameColumn``)
+    y el índice por nombre se construye al primer uso.
+    """
+    _require_pyarrow()
+    source = path if isinstance(path, pa.NativeFile) else pa.memory_map(str(path), 'r')
+    schema = pa.ipc.open_file(source).schema
+    if property_keys is None:
+        property_keys = [name[:-len('_min')] for name in schema.names if name.endswith('_min')]
+    property_keys = tuple(property_keys)
+
+    projection = ['name', 'family', 'color'] + [
+        f'{key}_{bound}' for key in property_keys for bound in ('min', 'max')
+    ]
+    missing = [name for name in projection if schema.get_field_index(name) < 0]
+    if missing:
+        raise KeyError(f"Columnas ausentes en el catálogo {path}: {', '.join(missing)}")
+
+    # Solo se decodifican (y se leen del fichero) las columnas pedidas
+    fields = sorted(schema.get_field_index(name) for name in projection)
+    reader = pa.ipc.open_file(source, options=pa.ipc.IpcReadOptions(included_fields=fields))
+    table = pa.Table.from_batches(
+        [reader.get_batch(batch) for batch in range(reader.num_record_batches)],
+        schema=pa.schema([schema.field(field) for field in fields])
+    )
+    store = ColumnarMaterialStore(property_keys)
+    store.names = ArrowNameColumn(_column_array(table, 'name'))
+    store.name_to_row = LazyNameIndex(store.names)
+
+    for column, codes_attr, values_attr in (('family', 'family_codes', 'families'),
+                                            ('color', 'color_codes', 'colors')):
+        encoded = _column_array(table, column)
+        setattr(store, codes_attr, encoded.indices.to_numpy(zero_copy_only=False).astype(np.int32, copy=False))
+        setattr(store, values_attr, encoded.dictionary.to_pylist())
+
+    for key in property_keys:
+        store.mins[key] = _column_array(table, f'{key}_min').to_numpy(zero_copy_only=False)
+        store.maxs[key] = _column_array(table, f'{key}_max').to_numpy(zero_copy_only=False)
+
+    # El mapeo debe seguir abierto mientras existan vistas sobre sus páginas
+    store.source = source
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un catálogo Arrow IPC con los materiales incluidos")
+    parser.add_argument('path', help="Fichero de salida (.arrow)")
+    parser.add_argument('--extended', action='store_true', help="Incluir EXTENDED_MATERIALS de integration_example")
+    args = parser.parse_args(argv)
+
+    from material_selection import MaterialDatabase
+
+    database = MaterialDatabase()
+    materials = database._create_materials_database()
+    if args.extended:
+        from integration_example import EXTENDED_MATERIALS
+        materials.update(EXTENDED_MATERIALS)
+
+    store = ColumnarMaterialStore.from_dict(materials, database.properties.values())
+    write_arrow_catalog(store, args.path)
+    print(f"{len(store)} materiales escritos en {args.path}")
+
+
+if __name__ == '__main__':
+    main()
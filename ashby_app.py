@@ -7,219 +7,58 @@ from plotly.subplots import make_subplots
 import json
 from pathlib import Path
 import math
+import hashlib
+import os
 
-# Configuración de la página
-st.set_page_config(
-    page_title="AshbyChart Selector",
-    page_icon="🔬",
-    layout="wide",
-    initial_sidebar_state="expanded"
+from advanced_features import PerformanceIndexTool
+from ellipse_geometry import (
+    LOD_VERTEX_COUNTS, EllipseGeometryCache, data_viewport, detail_levels, ellipse_vertices,
+    pack_polygons, padded_range, rasterize_ellipses, viewport_mask
 )
+from material_selection import MaterialDatabase, MaterialFilter
+from material_store import resolve_records
+from performance_indices import FormulaError, compile_formula
+from profiling import RerunProfiler, annotate, enable_json_logging, span
+from ranking import top_k
 
-# Estilos CSS personalizados
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1f77b4;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .property-filter {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin: 0.5rem 0;
-    }
-    .results-panel {
-        background-color: #e8f4fd;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #1f77b4;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-class MaterialDatabase:
-    """Clase para manejar la base de datos de materiales"""
-    
-    def __init__(self):
-        self.materials = self._create_materials_database()
-        self.properties = {
-            'Módulo de Young (GPa)': 'young_modulus',
-            'Límite Elástico (MPa)': 'yield_strength', 
-            'Densidad (kg/m³)': 'density',
-            'Tenacidad a la Fractura (MPa√m)': 'fracture_toughness',
-            'Conductividad Térmica (W/m·K)': 'thermal_conductivity',
-            'Coef. Expansión Térmica (µm/m°C)': 'thermal_expansion',
-            'Temp. Máx. Servicio (°C)': 'max_service_temp',
-            'Precio (€/kg)': 'price'
-        }
-    
-    def _create_materials_database(self):
-        """Crea la base de datos de materiales con propiedades representativas"""
-        materials_data = {
-            'Aceros': {
-                'family': 'Metales',
-                'color': '#FF6B6B',
-                'young_modulus': [200, 220],
-                'yield_strength': [200, 1500],
-                'density': [7800, 8000],
-                'fracture_toughness': [50, 200],
-                'thermal_conductivity': [40, 60],
-                'thermal_expansion': [11, 13],
-                'max_service_temp': [400, 600],
-                'price': [0.5, 2.0]
-            },
-            'Aleaciones de Aluminio': {
-                'family': 'Metales',
-                'color': '#4ECDC4',
-                'young_modulus': [70, 85],
-                'yield_strength': [30, 600],
-                'density': [2700, 2900],
-                'fracture_toughness': [20, 45],
-                'thermal_conductivity': [120, 240],
-                'thermal_expansion': [22, 25],
-                'max_service_temp': [150, 300],
-                'price': [1.5, 4.0]
-            },
-            'Aleaciones de Titanio': {
-                'family': 'Metales',
-                'color': '#45B7D1',
-                'young_modulus': [100, 120],
-                'yield_strength': [200, 1200],
-                'density': [4400, 4900],
-                'fracture_toughness': [30, 100],
-                'thermal_conductivity': [6, 20],
-                'thermal_expansion': [8, 10],
-                'max_service_temp': [400, 600],
-                'price': [15, 40]
-            },
-            'Polietileno (PE)': {
-                'family': 'Polímeros',
-                'color': '#96CEB4',
-                'young_modulus': [0.5, 1.5],
-                'yield_strength': [10, 40],
-                'density': [910, 970],
-                'fracture_toughness': [1, 5],
-                'thermal_conductivity': [0.3, 0.5],
-                'thermal_expansion': [100, 200],
-                'max_service_temp': [80, 120],
-                'price': [1.0, 2.5]
-            },
-            'Polipropileno (PP)': {
-                'family': 'Polímeros',
-                'color': '#FFEAA7',
-                'young_modulus': [1.0, 2.0],
-                'yield_strength': [20, 40],
-                'density': [900, 920],
-                'fracture_toughness': [2, 4],
-                'thermal_conductivity': [0.1, 0.3],
-                'thermal_expansion': [80, 150],
-                'max_service_temp': [100, 140],
-                'price': [1.2, 2.8]
-            },
-            'Resinas Epóxicas': {
-                'family': 'Polímeros',
-                'color': '#DDA0DD',
-                'young_modulus': [2.5, 4.5],
-                'yield_strength': [50, 90],
-                'density': [1100, 1400],
-                'fracture_toughness': [0.5, 2],
-                'thermal_conductivity': [0.15, 0.25],
-                'thermal_expansion': [45, 80],
-                'max_service_temp': [120, 200],
-                'price': [5, 15]
-            },
-            'Alúmina (Al₂O₃)': {
-                'family': 'Cerámicos',
-                'color': '#FFB347',
-                'young_modulus': [350, 400],
-                'yield_strength': [300, 500],
-                'density': [3900, 4000],
-                'fracture_toughness': [3, 5],
-                'thermal_conductivity': [20, 35],
-                'thermal_expansion': [7, 9],
-                'max_service_temp': [1500, 1800],
-                'price': [10, 30]
-            },
-            'Circonia (ZrO₂)': {
-                'family': 'Cerámicos',
-                'color': '#F4A460',
-                'young_modulus': [200, 250],
-                'yield_strength': [800, 1200],
-                'density': [6000, 6200],
-                'fracture_toughness': [5, 12],
-                'thermal_conductivity': [2, 3],
-                'thermal_expansion': [9, 11],
-                'max_service_temp': [1000, 1500],
-                'price': [20, 60]
-            },
-            'Fibra de Carbono/Epoxy': {
-                'family': 'Compuestos',
-                'color': '#2C3E50',
-                'young_modulus': [120, 200],
-                'yield_strength': [1000, 2000],
-                'density': [1500, 1700],
-                'fracture_toughness': [15, 30],
-                'thermal_conductivity': [1, 10],
-                'thermal_expansion': [-1, 1],
-                'max_service_temp': [120, 200],
-                'price': [50, 200]
-            },
-            'Fibra de Vidrio/Poliéster': {
-                'family': 'Compuestos',
-                'color': '#7D3C98',
-                'young_modulus': [15, 35],
-                'yield_strength': [200, 500],
-                'density': [1600, 2000],
-                'fracture_toughness': [10, 25],
-                'thermal_conductivity': [0.3, 0.8],
-                'thermal_expansion': [15, 25],
-                'max_service_temp': [80, 150],
-                'price': [3, 10]
-            },
-            'Madera (Pino)': {
-                'family': 'Naturales',
-                'color': '#8B4513',
-                'young_modulus': [8, 15],
-                'yield_strength': [30, 80],
-                'density': [400, 600],
-                'fracture_toughness': [5, 15],
-                'thermal_conductivity': [0.1, 0.2],
-                'thermal_expansion': [3, 7],
-                'max_service_temp': [100, 200],
-                'price': [0.5, 2.0]
-            }
-        }
-        
-        return materials_data
-    
-    def get_dataframe(self):
-        """Convierte la base de datos a DataFrame para facilitar el manejo"""
-        data = []
-        for material, props in self.materials.items():
-            row = {'Material': material, 'Familia': props['family'], 'Color': props['color']}
-            for prop_name, prop_key in self.properties.items():
-                if prop_key in props:
-                    row[f'{prop_name}_min'] = props[prop_key][0]
-                    row[f'{prop_name}_max'] = props[prop_key][1]
-            data.append(row)
-        return pd.DataFrame(data)
+def _hex_to_rgba(color, alpha):
+    """Convierte un color '#RRGGBB' a 'rgba(r, g, b, alpha)'"""
+    color = color.lstrip('#')
+    red, green, blue = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return f"rgba({red}, {green}, {blue}, {alpha})"
 
 class AshbyChartGenerator:
     """Clase para generar y manejar los gráficos de Ashby"""
     
+    # Por encima de este número de materiales el modo 'auto' agrupa las elipses
+    BATCH_THRESHOLD = 200
+    # Por encima de este número de materiales visibles el modo 'auto' rasteriza
+    RASTER_THRESHOLD = 20000
+    # Resolución (alto, ancho) de la imagen de densidad del modo 'raster'
+    RASTER_SHAPE = (256, 384)
+    # Tamaño aproximado (ancho, alto) en píxeles del área de dibujo, para el nivel de detalle
+    PLOT_SIZE = (900, 600)
+    
     def __init__(self, database):
         self.database = database
+        self.geometry_cache = EllipseGeometryCache()
         
-    def create_ashby_chart(self, x_property, y_property, filtered_materials=None):
-        """Crea un gráfico de Ashby interactivo"""
+    def create_ashby_chart(self, x_property, y_property, filtered_materials=None,
+                           render_mode='auto', use_webgl=False, viewport=None, level_of_detail=True):
+        """Crea un gráfico de Ashby interactivo
         
-        if filtered_materials is None:
-            materials_to_plot = self.database.materials
-        else:
-            materials_to_plot = filtered_materials
+        ``render_mode`` puede ser 'individual' (una traza por material),
+        'batched' (una traza por familia y color, con polígonos separados por
+        NaN), 'raster' (una imagen de densidad por familia calculada en el
+        servidor) o 'auto', que elige según el número de materiales visibles.
+        ``use_webgl`` dibuja el modo agrupado con ``go.Scattergl``.
+        ``viewport`` fija la vista como ((x0, x1), (y0, y1)) en log10, igual
+        que los rangos de un eje logarítmico de Plotly; los materiales fuera de
+        ella no se dibujan. Con ``level_of_detail`` el número de vértices de
+        cada elipse se ajusta a su tamaño en pantalla.
+        """
+        
+        store, rows = resolve_records(filtered_materials, self.database.store)
             
         fig = go.Figure()
         
@@ -239,34 +78,195 @@ class AshbyChartGenerator:
         x_key = self.database.properties[x_property]
         y_key = self.database.properties[y_property]
         
-        # Agregar elipses para cada material
-        for material_name, material_data in materials_to_plot.items():
-            if x_key in material_data and y_key in material_data:
+        # Solo los materiales que definen ambas propiedades
+        rows = rows[store.has_property(x_key)[rows] & store.has_property(y_key)[rows]]
+        
+        x_min, x_max = store.mins[x_key][rows], store.maxs[x_key][rows]
+        y_min, y_max = store.mins[y_key][rows], store.maxs[y_key][rows]
+        
+        if viewport is None:
+            view = data_viewport(x_min, x_max, y_min, y_max)
+        else:
+            # Descartar los materiales fuera de la vista actual
+            viewport = tuple(padded_range(*axis) for axis in viewport)
+            fig.update_layout(xaxis_range=list(viewport[0]), yaxis_range=list(viewport[1]))
+            rows = rows[viewport_mask(x_min, x_max, y_min, y_max, viewport)]
+            view = viewport
+        
+        if render_mode == 'auto':
+            if len(rows) > self.RASTER_THRESHOLD:
+                render_mode = 'raster'
+            elif len(rows) > self.BATCH_THRESHOLD:
+                render_mode = 'batched'
+            else:
+                render_mode = 'individual'
+        
+        if view is None or not len(rows):
+            return fig
+        
+        if render_mode == 'raster':
+            if viewport is None:
+                fig.update_layout(xaxis_range=list(view[0]), yaxis_range=list(view[1]))
+            self._add_density_layers(fig, store, rows, x_key, y_key, x_property, y_property, view)
+            return fig
+        
+        # Número de vértices de cada elipse según su tamaño en pantalla
+        if level_of_detail:
+            levels = detail_levels(
+                store.mins[x_key][rows], store.maxs[x_key][rows],
+                store.mins[y_key][rows], store.maxs[y_key][rows],
+                view, self.PLOT_SIZE
+            )
+        else:
+            levels = np.full(len(rows), len(LOD_VERTEX_COUNTS) - 1)
+        
+        if render_mode == 'batched':
+            self._add_batched_ellipses(
+                fig, store, rows, levels, x_key, y_key, x_property, y_property, use_webgl
+            )
+        else:
+            vertices = [None] * len(rows)
+            for level in np.unique(levels):
+                positions = np.flatnonzero(levels == level)
+                xs, ys = self._ellipse_vertices(store, rows[positions], x_key, y_key, LOD_VERTEX_COUNTS[level])
+                for position, x_ellipse, y_ellipse in zip(positions, xs, ys):
+                    vertices[position] = (x_ellipse, y_ellipse)
+            
+            # Agregar elipses para cada material
+            for row, material_vertices in zip(rows, vertices):
                 self._add_material_ellipse(
-                    fig, material_name, material_data,
-                    x_key, y_key, x_property, y_property
+                    fig, store.names[row], store.record(row),
+                    x_key, y_key, x_property, y_property,
+                    vertices=material_vertices
                 )
         
         return fig
     
-    def _add_material_ellipse(self, fig, material_name, material_data, x_key, y_key, x_label, y_label):
-        """Agrega una elipse representando el rango de propiedades de un material"""
+    def _add_density_layers(self, fig, store, rows, x_key, y_key, x_label, y_label, viewport):
+        """Agrega una capa de densidad rasterizada en el servidor por cada familia"""
         
-        x_min, x_max = material_data[x_key]
-        y_min, y_max = material_data[y_key]
+        family_codes = store.family_codes[rows]
+        coverage, x_centers, y_centers = rasterize_ellipses(
+            store.mins[x_key][rows], store.maxs[x_key][rows],
+            store.mins[y_key][rows], store.maxs[y_key][rows],
+            family_codes, len(store.families),
+            viewport[0], viewport[1], self.RASTER_SHAPE
+        )
+        
+        for family_code in np.unique(family_codes):
+            family = store.families[family_code]
+            # Color más frecuente entre los materiales de la familia
+            color_codes = store.color_codes[rows][family_codes == family_code]
+            color = store.colors[np.bincount(color_codes).argmax()]
+            
+            density = coverage[family_code].astype(float)
+            density[density == 0] = np.nan
+            
+            fig.add_trace(go.Heatmap(
+                x=x_centers,
+                y=y_centers,
+                z=density,
+                colorscale=[[0, _hex_to_rgba(color, 0.25)], [1, _hex_to_rgba(color, 0.9)]],
+                showscale=False,
+                showlegend=True,
+                name=family,
+                hovertemplate=(
+                    f"<b>{family}</b><br>"
+                    f"{x_label}: %{{x:.3g}}<br>"
+                    f"{y_label}: %{{y:.3g}}<br>"
+                    "Materiales: %{z}<extra></extra>"
+                )
+            ))
+    
+    def _ellipse_vertices(self, store, rows, x_key, y_key, n_points=50):
+        """Vértices de las elipses de ``rows``, tomados de la caché si es posible"""
+        if store is self.database.store:
+            xs, ys = self.geometry_cache.get(store, x_key, y_key, n_points)
+            return xs[rows], ys[rows]
+        return ellipse_vertices(
+            store.mins[x_key][rows], store.maxs[x_key][rows],
+            store.mins[y_key][rows], store.maxs[y_key][rows],
+            n_points
+        )
+    
+    def _add_batched_ellipses(self, fig, store, rows, levels, x_key, y_key, x_label, y_label,
+                              use_webgl=False):
+        """Agrega todas las elipses con una traza por combinación de familia y color"""
+        
+        # Datos de hover por vértice: rangos numéricos en customdata y nombre en text
+        bounds = np.column_stack([
+            store.mins[x_key][rows], store.maxs[x_key][rows],
+            store.mins[y_key][rows], store.maxs[y_key][rows]
+        ])
+        names = np.asarray(store.names, dtype=object)[rows]
         
-        # Calcular centro y radios de la elipse
-        x_center = np.sqrt(x_min * x_max)  # Media geométrica
-        y_center = np.sqrt(y_min * y_max)
+        trace_class = go.Scattergl if use_webgl else go.Scatter
+        group_codes = store.family_codes[rows].astype(np.int64) * len(store.colors) + store.color_codes[rows]
+        groups, inverse = np.unique(group_codes, return_inverse=True)
+        legend_shown = set()
         
-        # Radios en escala logarítmica
-        x_radius = np.log10(x_max) - np.log10(x_center)
-        y_radius = np.log10(y_max) - np.log10(y_center)
+        for group_index, group_code in enumerate(groups):
+            members = np.flatnonzero(inverse == group_index)
+            family = store.families[group_code // len(store.colors)]
+            color = store.colors[group_code % len(store.colors)]
+            
+            # Un bloque de polígonos por nivel de detalle, concatenados en una traza
+            x_parts, y_parts, ordered, repeats = [], [], [], []
+            for level in np.unique(levels[members]):
+                block = members[levels[members] == level]
+                xs, ys = self._ellipse_vertices(store, rows[block], x_key, y_key, LOD_VERTEX_COUNTS[level])
+                x_packed, y_packed = pack_polygons(xs, ys)
+                x_parts.append(x_packed)
+                y_parts.append(y_packed)
+                ordered.append(block)
+                repeats.append(np.full(len(block), xs.shape[1] + 1))
+            ordered = np.concatenate(ordered)
+            repeats = np.concatenate(repeats)
+            
+            trace_options = {}
+            if not use_webgl:
+                # Mostrar el hover al pasar por el contorno de cada elipse
+                trace_options['hoveron'] = 'points'
+            
+            fig.add_trace(trace_class(
+                x=np.concatenate(x_parts),
+                y=np.concatenate(y_parts),
+                mode='lines',
+                fill='toself',
+                fillcolor=color,
+                opacity=0.3,
+                line=dict(color=color, width=2),
+                name=family,
+                legendgroup=family,
+                showlegend=family not in legend_shown,
+                text=np.repeat(names[ordered], repeats),
+                customdata=np.repeat(bounds[ordered], repeats, axis=0),
+                hovertemplate=(
+                    "<b>%{text}</b><br>"
+                    f"Familia: {family}<br>"
+                    f"{x_label}: %{{customdata[0]:.2f}} - %{{customdata[1]:.2f}}<br>"
+                    f"{y_label}: %{{customdata[2]:.2f}} - %{{customdata[3]:.2f}}<br>"
+                    "<extra></extra>"
+                ),
+                **trace_options
+            ))
+            legend_shown.add(family)
+    
+    def _add_material_ellipse(self, fig, material_name, material_data, x_key, y_key, x_label, y_label,
+                              vertices=None):
+        """Agrega una elipse representando el rango de propiedades de un material
         
-        # Generar puntos de la elipse
-        theta = np.linspace(0, 2*np.pi, 50)
-        x_ellipse = x_center * (10 ** (x_radius * np.cos(theta)))
-        y_ellipse = y_center * (10 ** (y_radius * np.sin(theta)))
+        ``vertices`` permite pasar los puntos (x, y) ya calculados por la caché
+        de geometría; si no se indican se calculan aquí.
+        """
+        
+        x_min, x_max = material_data[x_key]
+        y_min, y_max = material_data[y_key]
+        
+        if vertices is None:
+            xs, ys = ellipse_vertices([x_min], [x_max], [y_min], [y_max])
+            vertices = (xs[0], ys[0])
+        x_ellipse, y_ellipse = vertices
         
         # Agregar la elipse como un scatter plot con línea
         fig.add_trace(go.Scatter(
@@ -287,125 +287,290 @@ class AshbyChartGenerator:
             """
         ))
 
-class MaterialFilter:
-    """Clase para manejar el filtrado de materiales"""
+def viewport_controls(database, x_property, y_property):
+    """Controles de zoom en décadas (log10) para los ejes del gráfico
     
-    def __init__(self, database):
-        self.database = database
-        
-    def apply_filters(self, filters):
-        """Aplica filtros a la base de datos de materiales"""
-        filtered_materials = {}
-        
-        for material_name, material_data in self.database.materials.items():
-            include_material = True
-            
-            for property_name, filter_config in filters.items():
-                if not filter_config['active']:
-                    continue
-                    
-                prop_key = self.database.properties[property_name]
-                if prop_key not in material_data:
-                    continue
-                    
-                material_min, material_max = material_data[prop_key]
-                filter_min, filter_max = filter_config['range']
-                
-                # Verificar si hay solapamiento entre el rango del material y el filtro
-                if material_max < filter_min or material_min > filter_max:
-                    include_material = False
-                    break
-            
-            if include_material:
-                filtered_materials[material_name] = material_data
-                
-        return filtered_materials
+    Devuelve la vista ((x0, x1), (y0, y1)) o None si abarca todo el rango,
+    de modo que el gráfico solo se recalcula al cambiar el rango visible.
+    """
+    viewport = []
+    full_extent = []
+    for axis, prop_name in (('X', x_property), ('Y', y_property)):
+        prop_key = database.properties[prop_name]
+        entry = database.statistics.properties[prop_key]
+        if entry is None or entry['positive_min'] is None:
+            return None
+        low, high = np.floor(np.log10(entry['positive_min'])), np.ceil(np.log10(entry['max']))
+        view = st.slider(
+            f"Eje {axis} (décadas, log10)",
+            min_value=float(low),
+            max_value=float(high),
+            value=(float(low), float(high)),
+            step=0.1,
+            key=f"view_{axis}_{prop_key}"
+        )
+        viewport.append(tuple(view))
+        full_extent.append((float(low), float(high)))
+    
+    if viewport == full_extent:
+        return None
+    # Con ambos extremos iguales la vista se amplía a una década
+    return tuple(padded_range(*view) for view in viewport)
 
-def main():
-    """Función principal de la aplicación"""
+@st.cache_resource
+def get_shared_resources():
+    """Base de datos, generador de gráficos y filtro compartidos por todas las sesiones"""
+    database = MaterialDatabase()
+    return database, AshbyChartGenerator(database), MaterialFilter(database)
+
+def session_resources():
+    """Recursos de la sesión: su copia privada si importó un catálogo, o los compartidos"""
+    return st.session_state.get('private_resources') or get_shared_resources()
+
+def private_resources(database):
+    """Copia de la base de datos propia de la sesión, creada al importar el primer catálogo
+    
+    La base de datos compartida nunca se modifica desde la interfaz: lo que
+    importa una sesión no cambia el catálogo de las demás ni sus
+    estructuras derivadas mientras otras sesiones las consultan.
+    """
+    if 'private_resources' not in st.session_state:
+        private = database.copy()
+        st.session_state.private_resources = (private, AshbyChartGenerator(private), MaterialFilter(private))
+    return st.session_state.private_resources
+
+def canonical_cache_key(database, **parts):
+    """Hash canónico de los parámetros de una consulta, el almacenamiento y su versión"""
+    payload = json.dumps(
+        {'store': database.store.uid, 'version': database.store.version, **parts},
+        sort_keys=True, ensure_ascii=True, default=float
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def active_filter_ranges(database, filters):
+    """Rangos de los filtros activos por clave de propiedad, en forma canónica"""
+    return {
+        database.properties[property_name]: [float(value) for value in filter_config['range']]
+        for property_name, filter_config in filters.items()
+        if filter_config['active']
+    }
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_filter_rows(cache_key, _material_filter, _filters):
+    """Filas que cumplen los filtros, memorizadas por ``cache_key``"""
+    return _material_filter.apply_filters(_filters).rows
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_ashby_chart(cache_key, _chart_generator, _rows, x_property, y_property, use_webgl, viewport):
+    """Figura del gráfico de Ashby, memorizada por ``cache_key``"""
+    filtered_materials = _chart_generator.database.store.records(_rows)
+    return _chart_generator.create_ashby_chart(
+        x_property, y_property, filtered_materials, use_webgl=use_webgl, viewport=viewport
+    )
+
+@st.cache_resource
+def get_performance_tool():
+    """Herramienta de índices compartida, para reutilizar las consultas de semiplano"""
+    return PerformanceIndexTool()
+
+def index_line_panel(database, index_type, x_property, y_property, rows, viewport):
+    """Materiales filtrados por encima de la línea del índice en el gráfico actual"""
+    performance_tool = get_performance_tool()
+    index_config = performance_tool.common_indices[index_type]
+    x_key = database.properties[x_property]
+    y_key = database.properties[y_property]
+    
+    # La línea índice = numerador / denominador^pendiente requiere esos ejes
+    if (x_key, y_key) != (index_config['denominator'], index_config['numerator']):
+        st.caption("Selecciona el numerador del índice en el eje Y y el denominador en el eje X "
+                   "para consultar los materiales por encima de la línea.")
+        return
+    
+    store = database.store
+    if viewport is None:
+        viewport = data_viewport(store.mins[x_key], store.maxs[x_key], store.mins[y_key], store.maxs[y_key])
+    if viewport is None:
+        return
+    
+    line_position = st.slider("Posición de la línea", 0.0, 1.0, 0.5, 0.01, key="index_line_position")
+    fully = st.checkbox("Solo elipses completamente por encima", key="index_line_fully")
+    above = performance_tool.materials_above_line(
+        store, x_key, y_key, index_config, viewport[0], viewport[1],
+        line_position=line_position, fully=fully, rows=rows
+    )
+    
+    st.metric("Materiales por encima de la línea", len(above))
+    for row in above[:50]:
+        st.write(f"• **{store.names[row]}** ({store.family_of(row)})")
+    if len(above) > 50:
+        st.caption(f"... y {len(above) - 50} más")
+
+def rank_by_formula(store, rows, formula, limit=20):
+    """Tabla con los materiales de mayor índice según una fórmula compilada"""
+    values = formula.evaluate(store, rows)
+    # Selección parcial de los ``limit`` mejores; los valores no finitos no se clasifican
+    order = top_k(np.where(np.isfinite(values), values, np.nan), limit)
+    ranked_rows = rows[order]
+    low, high = formula.evaluate_bounds(store, ranked_rows)
+
+    return pd.DataFrame({
+        'Material': [store.names[row] for row in ranked_rows],
+        'Familia': [store.family_of(row) for row in ranked_rows],
+        'Índice': values[order],
+        'Mínimo': low,
+        'Máximo': high
+    })
+
+def render_app():
+    """Interfaz de la aplicación; cada ejecución del script la recorre completa"""
+    
+    # Configuración de la página
+    st.set_page_config(
+        page_title="AshbyChart Selector",
+        page_icon="🔬",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    
+    # Estilos CSS personalizados
+    st.markdown("""
+    <style>
+        .main-header {
+            font-size: 2.5rem;
+            color: #1f77b4;
+            text-align: center;
+            margin-bottom: 2rem;
+        }
+        .property-filter {
+            background-color: #f0f2f6;
+            padding: 1rem;
+            border-radius: 0.5rem;
+            margin: 0.5rem 0;
+        }
+        .results-panel {
+            background-color: #e8f4fd;
+            padding: 1rem;
+            border-radius: 0.5rem;
+            border-left: 4px solid #1f77b4;
+        }
+    </style>
+    """, unsafe_allow_html=True)
     
     # Título principal
     st.markdown('<h1 class="main-header">🔬 AshbyChart Selector</h1>', unsafe_allow_html=True)
     st.markdown("### Aplicación Interactiva para la Selección de Materiales")
     
-    # Inicializar base de datos
-    if 'database' not in st.session_state:
-        st.session_state.database = MaterialDatabase()
-        st.session_state.chart_generator = AshbyChartGenerator(st.session_state.database)
-        st.session_state.material_filter = MaterialFilter(st.session_state.database)
+    # Base de datos compartida entre sesiones (o la copia de la sesión tras importar);
+    # se expone también en session_state
+    with span('recursos'):
+        database, chart_generator, material_filter = session_resources()
+    st.session_state.database = database
+    st.session_state.chart_generator = chart_generator
+    st.session_state.material_filter = material_filter
     
     # Sidebar para controles
-    with st.sidebar:
+    with st.sidebar, span('barra_lateral'):
         st.header("🎛️ Controles")
         
         # Selección de propiedades para los ejes
         st.subheader("Selección de Ejes")
-        property_options = list(st.session_state.database.properties.keys())
+        property_options = list(database.properties.keys())
         
         x_property = st.selectbox("Eje X:", property_options, index=2)  # Densidad por defecto
         y_property = st.selectbox("Eje Y:", property_options, index=0)  # Módulo de Young por defecto
         
+        use_webgl = st.checkbox("Renderizado WebGL", help="Recomendado para catálogos con miles de materiales")
+        
+        with st.expander("🔭 Vista (zoom)"):
+            viewport = viewport_controls(database, x_property, y_property)
+        
+        with st.expander("📥 Importar catálogo"):
+            st.caption("Los materiales importados solo se añaden al catálogo de esta sesión.")
+            catalog_file = st.file_uploader("Catálogo CSV o JSON Lines", type=['csv', 'jsonl', 'json'])
+            if catalog_file is not None and st.button("Importar materiales"):
+                private_database = private_resources(database)[0]
+                st.session_state.import_report = private_database.import_catalog(catalog_file)
+                # Se vuelve a ejecutar para que toda la página use la copia de la sesión
+                st.rerun()
+            
+            report = st.session_state.get('import_report')
+            if report is not None:
+                summary = report.summary()
+                st.success(f"{summary['aceptados']} materiales importados, {summary['rechazados']} rechazados")
+                if summary['errores']:
+                    st.dataframe(report.errors, use_container_width=True)
+            if 'private_resources' in st.session_state and st.button("Descartar materiales importados"):
+                del st.session_state['private_resources']
+                st.session_state.pop('import_report', None)
+                st.rerun()
+
         # Filtros de propiedades
         st.subheader("🔍 Filtros de Propiedades")
         
         filters = {}
-        for prop_name, prop_key in st.session_state.database.properties.items():
-            with st.expander(f"Filtrar {prop_name}"):
-                # Obtener rango completo de la propiedad
-                all_values = []
-                for material_data in st.session_state.database.materials.values():
-                    if prop_key in material_data:
-                        all_values.extend(material_data[prop_key])
+        with span('controles_filtros'):
+            for prop_name, prop_key in database.properties.items():
+                with st.expander(f"Filtrar {prop_name}"):
+                    # Rango completo de la propiedad, precalculado en el índice de estadísticas
+                    bounds = database.statistics.bounds(prop_key)
                 
-                if all_values:
-                    min_val, max_val = min(all_values), max(all_values)
+                    if bounds is not None:
+                        min_val, max_val = bounds
                     
-                    active = st.checkbox(f"Activar filtro", key=f"filter_{prop_key}")
+                        active = st.checkbox(f"Activar filtro", key=f"filter_{prop_key}")
                     
-                    if active:
-                        range_values = st.slider(
-                            f"Rango de {prop_name}",
-                            min_value=float(min_val),
-                            max_value=float(max_val),
-                            value=(float(min_val), float(max_val)),
-                            key=f"range_{prop_key}"
-                        )
-                    else:
-                        range_values = (min_val, max_val)
+                        if active:
+                            range_values = st.slider(
+                                f"Rango de {prop_name}",
+                                min_value=float(min_val),
+                                max_value=float(max_val),
+                                value=(float(min_val), float(max_val)),
+                                key=f"range_{prop_key}"
+                            )
+                        else:
+                            range_values = (min_val, max_val)
                     
-                    filters[prop_name] = {
-                        'active': active,
-                        'range': range_values
-                    }
+                        filters[prop_name] = {
+                            'active': active,
+                            'range': range_values
+                        }
         
         # Botón para limpiar filtros
         if st.button("🗑️ Limpiar Filtros"):
-            for key in st.session_state.keys():
+            for key in list(st.session_state.keys()):
                 if key.startswith('filter_') or key.startswith('range_'):
                     del st.session_state[key]
-            st.experimental_rerun()
+            st.rerun()
     
     # Área principal dividida en columnas
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        # Aplicar filtros
-        filtered_materials = st.session_state.material_filter.apply_filters(filters)
+        # Aplicar filtros (memorizados por filtros activos y versión de la base de datos)
+        with span('filtros'):
+            filter_ranges = active_filter_ranges(database, filters)
+            filter_key = canonical_cache_key(database, filters=filter_ranges)
+            filtered_rows = cached_filter_rows(filter_key, material_filter, filters)
+            filtered_materials = database.store.records(filtered_rows)
         
         # Generar gráfico
-        fig = st.session_state.chart_generator.create_ashby_chart(
-            x_property, y_property, filtered_materials
+        chart_key = canonical_cache_key(
+            database, filters=filter_ranges, axes=[x_property, y_property],
+            use_webgl=use_webgl, viewport=viewport
         )
+        with span('figura'):
+            fig = cached_ashby_chart(
+                chart_key, chart_generator, filtered_rows, x_property, y_property, use_webgl, viewport
+            )
         
-        # Mostrar gráfico
-        st.plotly_chart(fig, use_container_width=True)
+        # Mostrar gráfico (incluye la serialización de la figura)
+        with span('plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True)
         
         # Herramientas adicionales
         st.subheader("🛠️ Herramientas de Análisis")
         
-        with st.expander("Índices de Rendimiento"):
-            st.write("Próximamente: Herramienta para trazar líneas de índices de rendimiento")
-            
+        with st.expander("Índices de Rendimiento"), span('indices'):
             # Selector de índice común
             index_type = st.selectbox(
                 "Tipo de índice:",
@@ -414,18 +579,33 @@ def main():
             
             if index_type != "Personalizado":
                 st.info(f"Índice seleccionado: {index_type}")
+                index_line_panel(database, index_type, x_property, y_property, filtered_rows, viewport)
             else:
-                custom_index = st.text_input("Fórmula del índice (ej: prop1/prop2):")
+                custom_index = st.text_input(
+                    "Fórmula del índice (ej: young_modulus**(1/3)/density):",
+                    help="Propiedades disponibles: " + ", ".join(database.store.property_keys)
+                )
                 if custom_index:
-                    st.info(f"Índice personalizado: {custom_index}")
+                    try:
+                        formula = compile_formula(custom_index, database.store.property_keys)
+                    except FormulaError as error:
+                        st.error(f"Fórmula no válida: {error}")
+                    else:
+                        st.info(f"Índice personalizado: {formula.expression}")
+                        ranking = rank_by_formula(database.store, filtered_rows, formula)
+                        if ranking.empty:
+                            st.warning("Ningún material filtrado define todas las propiedades de la fórmula.")
+                        else:
+                            st.dataframe(ranking, use_container_width=True)
     
-    with col2:
+    with col2, span('resultados'):
         st.markdown('<div class="results-panel">', unsafe_allow_html=True)
         st.subheader("📊 Resultados")
         
         # Mostrar estadísticas de filtrado
-        total_materials = len(st.session_state.database.materials)
+        total_materials = len(database.materials)
         filtered_count = len(filtered_materials)
+        annotate(materiales=total_materials, filtrados=filtered_count)
         
         st.metric("Materiales Totales", total_materials)
         st.metric("Materiales Filtrados", filtered_count)
@@ -468,5 +648,62 @@ def main():
         unsafe_allow_html=True
     )
 
+def _query_flag(name):
+    """Parámetro de la URL activado (?name=1, true o yes)"""
+    return str(st.query_params.get(name, '')).lower() in ('1', 'true', 'yes')
+
+def debug_panel(profiler):
+    """Panel plegable con los tiempos y la memoria de cada etapa de la ejecución actual"""
+    summary = profiler.summary()
+    total = summary['total_seconds'] or 0.0
+    with st.expander(f"🐞 Depuración: {total * 1000:.0f} ms en esta ejecución"):
+        rows = []
+        for record in summary['spans']:
+            row = {
+                'Etapa': '\u2003' * record['depth'] + record['name'],
+                'Tiempo (ms)': record['seconds'] * 1000,
+                '% del total': 100 * record['seconds'] / total if total else 0.0
+            }
+            if 'peak_bytes' in record:
+                row['Pico de memoria (MiB)'] = record['peak_bytes'] / 2 ** 20
+            rows.append(row)
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        if summary['fields']:
+            st.json(summary['fields'])
+        
+        if profiler.memory_error:
+            st.warning(f"Medida de memoria no disponible: {profiler.memory_error}")
+        if profiler.profile_error:
+            st.warning(f"cProfile no disponible: {profiler.profile_error}")
+        profile_text = profiler.profile_text()
+        if profile_text:
+            st.code(profile_text)
+            st.download_button("Descargar perfil (.prof)", profiler.profile_dump(),
+                               file_name="ashby_rerun.prof", mime="application/octet-stream")
+        st.caption("Parámetros de la URL: ?debug=1 (tiempos), ?memory=1 (pico de memoria con tracemalloc), "
+                   "?profile=1 (cProfile de la ejecución completa)")
+
+def main():
+    """Función principal de la aplicación
+    
+    Los parámetros de la URL activan la instrumentación de la ejecución:
+    ``?debug=1`` muestra el panel de tiempos por etapa, ``?memory=1`` añade el
+    pico de memoria y ``?profile=1`` perfila la ejecución con cProfile. Con la
+    variable de entorno ASHBY_PROFILE_LOG cada ejecución se registra además
+    como una línea JSON en el logger ``ashby.profiling``.
+    """
+    memory = _query_flag('memory')
+    profile = _query_flag('profile')
+    debug = _query_flag('debug') or memory or profile
+    log = debug or bool(os.environ.get('ASHBY_PROFILE_LOG'))
+    if log:
+        enable_json_logging()
+    
+    profiler = RerunProfiler(memory=memory, profile=profile, log=log)
+    with profiler.activate():
+        render_app()
+    if debug:
+        debug_panel(profiler)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
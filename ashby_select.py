@@ -0,0 +1,116 @@
+"""Selección de materiales desde la consola, sin Streamlit ni Plotly
+
+Filtra por rangos de propiedades, reduce opcionalmente a la frontera de
+Pareto, ordena por un índice de rendimiento y escribe los mejores materiales
+en CSV, JSON Lines o Parquet. La escritura es por tramos, de modo que la
+memoria no crece con el número de materiales exportados.
+
+Uso:
+    ashby-select --filter density=:3000 --index "E/ρ (Rigidez específica)" --top 20
+    ashby-select --filter "Precio (€/kg)=:10" --index "young_modulus / price" --format parquet --output sel.parquet
+    ashby-select --pareto density:min --pareto young_modulus:max --format jsonl
+    ashby-select --index "E/ρ (Rigidez específica)" --top 0 --columns name,index --output todos.csv
+
+Las propiedades se indican por clave ('density') o por nombre visible; los
+rangos son 'min:max' y un extremo vacío no limita. El catálogo es el de
+``--catalog``, el de la variable ASHBY_CATALOG o los materiales incluidos.
+"""
+import argparse
+import sys
+
+from material_selection import (
+    EXPORT_FORMATS, PROPERTIES, MaterialDatabase, export_materials, parse_range, property_key, select_materials
+)
+from performance_indices import COMMON_INDICES, compile_formula, ratio_formula
+
+
+def _split_option(text, separator, option):
+    name, found, value = text.rpartition(separator)
+    if not found or not name:
+        raise ValueError(f"{option} no válido: {text!r}")
+    return name, value
+
+
+def used_property_keys(args, columns):
+    """Claves de propiedad que usa la selección, o None si hay que cargarlas todas
+
+    Sin ``--columns`` se exportan todas las propiedades. Con ``--columns``
+    basta con las propiedades de los filtros, los objetivos, el índice y las
+    columnas pedidas, de modo que un catálogo Arrow solo lee esas columnas.
+    Ante una propiedad o fórmula no válida se cargan todas, para que el error
+    de la selección enumere las propiedades válidas.
+    """
+    if columns is None:
+        return None
+    keys = set()
+    for texts, separator in ((args.filter, '='), (args.pareto, ':')):
+        for text in texts:
+            name = text.rpartition(separator)[0]
+            key = PROPERTIES.get(name, name)
+            if key not in PROPERTIES.values():
+                return None
+            keys.add(key)
+    if args.index:
+        index = ratio_formula(COMMON_INDICES[args.index]) if args.index in COMMON_INDICES else args.index
+        try:
+            keys.update(compile_formula(index, PROPERTIES.values()).properties)
+        except ValueError:
+            return None
+    for column in columns:
+        keys.add(column.rpartition('_')[0])
+    return [key for key in PROPERTIES.values() if key in keys]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='ashby-select', description="Selección de materiales por filtros, índices y frontera de Pareto"
+    )
+    parser.add_argument('--catalog', default=None, help="Catálogo Arrow IPC (por defecto ASHBY_CATALOG o los incluidos)")
+    parser.add_argument('--filter', action='append', default=[], metavar='PROPIEDAD=MIN:MAX',
+                        help="Rango de una propiedad; puede repetirse")
+    parser.add_argument('--index', default=None,
+                        help="Índice de rendimiento: nombre conocido o fórmula sobre claves de propiedad")
+    parser.add_argument('--smallest', action='store_true', help="Un valor menor del índice es mejor")
+    parser.add_argument('--pareto', action='append', default=[], metavar='PROPIEDAD:max|min',
+                        help="Objetivo de la frontera de Pareto; puede repetirse")
+    parser.add_argument('--dominance', default='surely', choices=('point', 'surely', 'possibly'),
+                        help="Dominancia sobre los rangos para la frontera de Pareto")
+    parser.add_argument('--top', type=int, default=20, help="Número máximo de materiales (0 = todos)")
+    parser.add_argument('--format', default='csv', choices=EXPORT_FORMATS, help="Formato de salida")
+    parser.add_argument('--output', default='-', help="Fichero de salida ('-' para stdout)")
+    parser.add_argument('--columns', default=None, metavar='COL1,COL2,...',
+                        help="Columnas a exportar, en orden (p. ej. name,index,density_min)")
+    parser.add_argument('--list-indices', action='store_true', help="Muestra los índices conocidos y termina")
+    args = parser.parse_args(argv)
+
+    if args.list_indices:
+        for name in COMMON_INDICES:
+            print(name)
+        return 0
+
+    try:
+        columns = [name.strip() for name in args.columns.split(',')] if args.columns else None
+        database = MaterialDatabase(args.catalog, property_keys=used_property_keys(args, columns))
+        ranges = {}
+        for text in args.filter:
+            name, bounds = _split_option(text, '=', '--filter')
+            ranges[property_key(database, name)] = parse_range(bounds)
+        objectives = {}
+        for text in args.pareto:
+            name, direction = _split_option(text, ':', '--pareto')
+            if direction not in ('max', 'min'):
+                raise ValueError(f"Dirección no válida en --pareto: {direction!r} (usa 'max' o 'min')")
+            objectives[property_key(database, name)] = direction
+
+        rows, values, bounds = select_materials(
+            database, ranges, args.index, top=args.top or None, largest=not args.smallest,
+            objectives=objectives, dominance=args.dominance
+        )
+        export_materials(database, rows, args.output, args.format, values, bounds, columns)
+    except (KeyError, ValueError) as error:
+        parser.error(error.args[0] if error.args else str(error))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
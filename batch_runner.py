@@ -0,0 +1,202 @@
+"""Ejecución por lotes de escenarios de selección en un grupo de procesos
+
+Cada escenario combina una plantilla de aplicación, un índice de rendimiento
+y un conjunto de filtros predefinido. Las columnas numéricas de la base de
+datos se publican una sola vez en memoria compartida y los procesos de
+trabajo las leen sin copiarlas; los resultados se devuelven en el orden de
+los escenarios.
+
+Uso:
+    python batch_runner.py --top-k 5 --output resultados.jsonl
+"""
+import argparse
+import itertools
+import json
+import sys
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from material_store import ColumnarMaterialStore
+from performance_indices import COMMON_INDICES, evaluate_ratio_index
+from ranking import top_k
+
+# Conjuntos de filtros {propiedad: (mínimo, máximo)} que se cruzan con las plantillas
+FILTER_PRESETS = {
+    'Sin filtros': {},
+    'Bajo coste': {'Precio (€/kg)': (0, 10)},
+    'Ligeros': {'Densidad (kg/m³)': (0, 3000)},
+    'Alta temperatura': {'Temp. Máx. Servicio (°C)': (500, 5000)}
+}
+
+
+class SharedMaterialArrays:
+    """Copia única de los mínimos, máximos y familias en un bloque de memoria compartida
+
+    ``descriptor`` es un diccionario pequeño que basta para reconstruir los
+    arreglos en otro proceso con ``attach_store``. Se usa como gestor de
+    contexto; al salir se libera el bloque.
+    """
+
+    def __init__(self, store):
+        keys, n_rows = store.property_keys, len(store)
+        values_bytes = 2 * len(keys) * n_rows * np.dtype(np.float64).itemsize
+        codes_bytes = n_rows * np.dtype(np.int32).itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, values_bytes + codes_bytes))
+
+        values = np.ndarray((2, len(keys), n_rows), dtype=np.float64, buffer=self._shm.buf)
+        for column, key in enumerate(keys):
+            values[0, column] = store.mins[key]
+            values[1, column] = store.maxs[key]
+        codes = np.ndarray(n_rows, dtype=np.int32, buffer=self._shm.buf, offset=values_bytes)
+        codes[:] = store.family_codes
+        del values, codes
+
+        self.descriptor = {'name': self._shm.name, 'property_keys': keys, 'n_rows': n_rows}
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach_store(descriptor):
+    """(almacenamiento, bloque) con columnas que apuntan a la memoria compartida
+
+    El almacenamiento solo contiene las columnas numéricas y los códigos de
+    familia; el bloque debe mantenerse abierto mientras se use.
+    """
+    shm = shared_memory.SharedMemory(name=descriptor['name'])
+    keys, n_rows = descriptor['property_keys'], descriptor['n_rows']
+    values = np.ndarray((2, len(keys), n_rows), dtype=np.float64, buffer=shm.buf)
+
+    store = ColumnarMaterialStore(keys)
+    store.mins = {key: values[0, column] for column, key in enumerate(keys)}
+    store.maxs = {key: values[1, column] for column, key in enumerate(keys)}
+    store.family_codes = np.ndarray(n_rows, dtype=np.int32, buffer=shm.buf, offset=values.nbytes)
+    return store, shm
+
+
+_worker_state = {}
+
+
+def _init_worker(descriptor):
+    _worker_state['store'], _worker_state['shm'] = attach_store(descriptor)
+
+
+def evaluate_scenario(store, n_rows, task):
+    """Filtra por los rangos del escenario y devuelve los k mejores según el índice"""
+    ranges, index_config, k = task
+    mask = np.ones(n_rows, dtype=bool)
+    for key, (low, high) in ranges.items():
+        # Mismo criterio que MaterialFilter: solapamiento de rangos, NaN se conserva
+        mask &= ~((store.maxs[key] < low) | (store.mins[key] > high))
+
+    rows = np.flatnonzero(mask)
+    value, _, _ = evaluate_ratio_index(store, rows, index_config)
+    best = top_k(value, k)
+    return len(rows), rows[best], value[best]
+
+
+def _run_task(task):
+    store = _worker_state['store']
+    return evaluate_scenario(store, len(store.family_codes), task)
+
+
+def requirement_ranges(requirements, properties):
+    """Convierte requisitos {'type': 'minimum'|'maximum', 'value'} en rangos por clave"""
+    ranges = {}
+    for property_name, requirement in requirements.items():
+        if requirement['type'] == 'minimum':
+            ranges[properties[property_name]] = (requirement['value'], np.inf)
+        elif requirement['type'] == 'maximum':
+            ranges[properties[property_name]] = (-np.inf, requirement['value'])
+    return ranges
+
+
+def build_scenarios(templates, index_configs, presets, properties):
+    """Producto plantillas × índices × filtros, en orden determinista
+
+    Returns:
+        Lista de diccionarios con 'template', 'index', 'preset', 'ranges'
+        (rangos combinados por clave de propiedad) e 'index_config'.
+    """
+    scenarios = []
+    for (template, requirements), (index, config), (preset, preset_ranges) in itertools.product(
+        templates.items(), index_configs.items(), presets.items()
+    ):
+        ranges = requirement_ranges(requirements, properties)
+        for property_name, (low, high) in preset_ranges.items():
+            key = properties[property_name]
+            previous_low, previous_high = ranges.get(key, (-np.inf, np.inf))
+            ranges[key] = (max(previous_low, low), min(previous_high, high))
+        scenarios.append({
+            'template': template, 'index': index, 'preset': preset,
+            'ranges': ranges, 'index_config': config
+        })
+    return scenarios
+
+
+def run_batch(store, scenarios, k=5, processes=None, chunksize=1):
+    """Ejecuta los escenarios en paralelo y los devuelve en orden a medida que terminan
+
+    Con ``processes=1`` se ejecutan en el proceso actual sin memoria compartida.
+
+    Yields:
+        (escenario, resultado) con resultado {'candidates', 'top'}; 'top' es
+        una lista de (material, valor del índice) de mejor a peor.
+    """
+    tasks = [(scenario['ranges'], scenario['index_config'], k) for scenario in scenarios]
+
+    def as_result(scenario, output):
+        n_candidates, rows, values = output
+        top = [(store.names[row], float(value)) for row, value in zip(rows, values)]
+        return scenario, {'candidates': int(n_candidates), 'top': top}
+
+    if processes == 1:
+        for scenario, task in zip(scenarios, tasks):
+            yield as_result(scenario, evaluate_scenario(store, len(store), task))
+        return
+
+    with SharedMaterialArrays(store) as shared:
+        with Pool(processes, initializer=_init_worker, initargs=(shared.descriptor,)) as pool:
+            # imap conserva el orden de las tareas aunque terminen desordenadas
+            for scenario, output in zip(scenarios, pool.imap(_run_task, tasks, chunksize)):
+                yield as_result(scenario, output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Barrido por lotes de escenarios de selección de materiales")
+    parser.add_argument('--top-k', type=int, default=5, help="Materiales por escenario")
+    parser.add_argument('--processes', type=int, default=None, help="Procesos (por defecto, todos los núcleos)")
+    parser.add_argument('--chunksize', type=int, default=1, help="Escenarios por envío a cada proceso")
+    parser.add_argument('--output', default='-', help="Fichero JSON Lines de salida ('-' para stdout)")
+    args = parser.parse_args(argv)
+
+    # Importaciones pesadas solo en el proceso principal
+    from material_selection import MaterialDatabase
+    from integration_example import APPLICATION_TEMPLATES
+
+    database = MaterialDatabase()
+    scenarios = build_scenarios(
+        APPLICATION_TEMPLATES, COMMON_INDICES, FILTER_PRESETS, database.properties
+    )
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        for scenario, result in run_batch(database.store, scenarios, args.top_k, args.processes, args.chunksize):
+            record = {key: scenario[key] for key in ('template', 'index', 'preset')}
+            record.update(result)
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""Benchmarks de escalado con catálogos sintéticos
+
+Uso:
+    python -m benchmarks.run --sizes 100 1000 10000 100000
+    python -m benchmarks.synthetic 100000 catalogo_sintetico.arrow
+"""
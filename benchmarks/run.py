@@ -0,0 +1,267 @@
+"""Benchmark de escalado de las etapas de selección sobre catálogos sintéticos
+
+Para cada tamaño de catálogo se mide, con el mismo catálogo sintético:
+
+- database:   construcción de MaterialDatabase (índice de intervalos).
+- filter:     MaterialFilter.apply_filters con tres filtros activos.
+- chart:      AshbyChartGenerator.create_ashby_chart de los materiales filtrados.
+- indices:    MaterialAnalyzer.calculate_material_indices.
+- pareto:     MaterialAnalyzer.create_pareto_frontier (densidad mínima, rigidez máxima).
+- export_csv: exportación CSV por tramos de la selección (ExportTools.export_materials_list).
+
+De cada etapa se guarda el tiempo de la primera ejecución (cachés frías),
+el mínimo y la mediana de las repeticiones y el pico de memoria asignada
+medido con tracemalloc en una ejecución aparte. Los resultados se escriben
+en JSON y se comparan con una línea base guardada; una etapa es una
+regresión si su mediana o su pico de memoria superan a los de la línea base
+en más de ``--tolerance`` veces.
+
+Uso:
+    python -m benchmarks.run --sizes 100 1000 10000 100000 --output resultados.json
+    python -m benchmarks.run --save-baseline           # actualiza benchmarks/baseline.json
+    python -m benchmarks.run --fail-on-regression      # código 1 si hay regresiones
+    python -m benchmarks.run --no-compare              # sin comparar (p. ej. en la CI)
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_catalog
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+
+# Filtros activos de la etapa 'filter', en el formato de la barra lateral
+FILTERS = {
+    'Densidad (kg/m³)': {'active': True, 'range': (100, 5000)},
+    'Precio (€/kg)': {'active': True, 'range': (0.5, 50)},
+    'Módulo de Young (GPa)': {'active': True, 'range': (1, 500)}
+}
+X_PROPERTY, Y_PROPERTY = 'Densidad (kg/m³)', 'Módulo de Young (GPa)'
+
+# Por debajo de esta diferencia absoluta (s) las variaciones se consideran ruido
+MIN_SIGNIFICANT_SECONDS = 0.005
+
+
+def measure(fn, repeat=5, max_seconds=10.0):
+    """Tiempos de ``fn()`` y pico de memoria de una ejecución adicional
+
+    Se repite hasta ``repeat`` veces o hasta acumular ``max_seconds``, con al
+    menos una ejecución. Devuelve (resultado de la última llamada, tiempos,
+    pico en bytes).
+    """
+    timings = []
+    while not timings or (len(timings) < repeat and sum(timings) < max_seconds):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, timings, peak
+
+
+def stage_functions(store, output_dir):
+    """Etapas del benchmark como (nombre, función) en orden de ejecución
+
+    Cada etapa depende de los resultados de las anteriores (base de datos y
+    materiales filtrados), que se guardan en ``state``.
+    """
+    from advanced_features import ExportTools, MaterialAnalyzer
+    from ashby_app import AshbyChartGenerator
+    from material_selection import MaterialDatabase, MaterialFilter
+    import plotly.graph_objects as go
+
+    state = {}
+
+    def database():
+        state['database'] = MaterialDatabase(store=store)
+        state['chart_generator'] = AshbyChartGenerator(state['database'])
+        state['analyzer'] = MaterialAnalyzer(state['database'])
+        return state['database']
+
+    def filter_materials():
+        state['filtered'] = MaterialFilter(state['database']).apply_filters(FILTERS)
+        return state['filtered']
+
+    def chart():
+        return state['chart_generator'].create_ashby_chart(X_PROPERTY, Y_PROPERTY, state['filtered'])
+
+    def indices():
+        return state['analyzer'].calculate_material_indices(state['filtered'])
+
+    def pareto():
+        return state['analyzer'].create_pareto_frontier(
+            go.Figure(), state['filtered'], X_PROPERTY, Y_PROPERTY, x_direction='min', y_direction='max'
+        )
+
+    def export_csv():
+        path = os.path.join(output_dir, 'seleccion.csv')
+        ExportTools(state['database']).export_materials_list(state['filtered'], output=path)
+        return os.path.getsize(path)
+
+    return [
+        ('database', database), ('filter', filter_materials), ('chart', chart),
+        ('indices', indices), ('pareto', pareto), ('export_csv', export_csv)
+    ]
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed=0, repeat=5, max_seconds=10.0, stages=None, log=None):
+    """Ejecuta las etapas para cada tamaño y devuelve la lista de resultados"""
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for n_rows in sizes:
+            store = synthetic_catalog(n_rows, seed)
+            selected = None
+            for name, fn in stage_functions(store, output_dir):
+                if stages and name not in stages:
+                    # Las etapas no pedidas se ejecutan una vez porque las siguientes dependen de ellas
+                    value = fn()
+                else:
+                    value, timings, peak = measure(fn, repeat, max_seconds)
+                if name == 'filter':
+                    selected = len(value)
+                if stages and name not in stages:
+                    continue
+                result = {
+                    'stage': name,
+                    'rows': n_rows,
+                    'selected': selected,
+                    'repeat': len(timings),
+                    'first_seconds': timings[0],
+                    'min_seconds': min(timings),
+                    'median_seconds': statistics.median(timings),
+                    'peak_bytes': peak
+                }
+                results.append(result)
+                if log:
+                    log(result)
+    return results
+
+
+def environment():
+    """Descripción de la máquina y las versiones, para interpretar los resultados"""
+    import pandas as pd
+    import plotly
+
+    info = {
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__
+    }
+    try:
+        import resource
+        # ru_maxrss está en KiB en Linux y en bytes en macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        info['max_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    except ImportError:  # pragma: no cover - Windows
+        pass
+    return info
+
+
+def compare(results, baseline, tolerance=1.5):
+    """Compara con una línea base; devuelve una lista con el estado de cada etapa
+
+    El estado es 'regresión', 'mejora', 'igual' o 'nuevo' (sin línea base).
+    """
+    reference = {(item['stage'], item['rows']): item for item in baseline.get('results', [])}
+    comparison = []
+    for result in results:
+        base = reference.get((result['stage'], result['rows']))
+        entry = {'stage': result['stage'], 'rows': result['rows'], 'status': 'nuevo'}
+        if base is not None:
+            time_ratio = result['median_seconds'] / max(base['median_seconds'], 1e-9)
+            memory_ratio = result['peak_bytes'] / max(base['peak_bytes'], 1)
+            significant = abs(result['median_seconds'] - base['median_seconds']) > MIN_SIGNIFICANT_SECONDS
+            if (time_ratio > tolerance and significant) or memory_ratio > tolerance:
+                status = 'regresión'
+            elif (time_ratio < 1 / tolerance and significant) or memory_ratio < 1 / tolerance:
+                status = 'mejora'
+            else:
+                status = 'igual'
+            entry.update(time_ratio=time_ratio, memory_ratio=memory_ratio, status=status)
+        comparison.append(entry)
+    return comparison
+
+
+def _print_result(result):
+    print(f"{result['stage']:<11} {result['rows']:>8} filas  "
+          f"mediana {result['median_seconds'] * 1000:9.2f} ms  "
+          f"primera {result['first_seconds'] * 1000:9.2f} ms  "
+          f"pico {result['peak_bytes'] / 2 ** 20:8.2f} MiB  (n={result['repeat']})", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de escalado con catálogos sintéticos")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="Tamaños de catálogo (p. ej. 100 1000 10000 100000 1000000)")
+    parser.add_argument('--stages', nargs='+', default=None, help="Etapas a informar (por defecto todas)")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla del catálogo sintético")
+    parser.add_argument('--repeat', type=int, default=5, help="Repeticiones por etapa")
+    parser.add_argument('--max-seconds', type=float, default=10.0, help="Tiempo máximo de repeticiones por etapa")
+    parser.add_argument('--output', default=None, help="Fichero JSON de resultados")
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help="Línea base con la que comparar")
+    parser.add_argument('--no-compare', action='store_true',
+                        help="No compara con la línea base (los tiempos dependen de la máquina)")
+    parser.add_argument('--tolerance', type=float, default=1.5, help="Cociente a partir del cual hay regresión")
+    parser.add_argument('--save-baseline', action='store_true', help="Guarda los resultados como línea base")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Termina con código 1 si hay regresiones")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.seed, args.repeat, args.max_seconds, args.stages, log=_print_result)
+    report = {
+        'environment': environment(),
+        'config': {'sizes': args.sizes, 'seed': args.seed, 'repeat': args.repeat},
+        'results': results
+    }
+
+    baseline_path = Path(args.baseline)
+    regressions = []
+    if baseline_path.exists() and not (args.save_baseline or args.no_compare):
+        with open(baseline_path, encoding='utf-8') as handle:
+            comparison = compare(results, json.load(handle), args.tolerance)
+        report['comparison'] = comparison
+        print(f"\nComparación con {baseline_path} (tolerancia ×{args.tolerance}):")
+        for entry in comparison:
+            if entry['status'] == 'nuevo':
+                print(f"  {entry['stage']:<11} {entry['rows']:>8} filas  sin línea base")
+                continue
+            print(f"  {entry['stage']:<11} {entry['rows']:>8} filas  tiempo ×{entry['time_ratio']:.2f}  "
+                  f"memoria ×{entry['memory_ratio']:.2f}  {entry['status']}")
+        regressions = [entry for entry in comparison if entry['status'] == 'regresión']
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+            handle.write('\n')
+        print(f"Línea base guardada en {baseline_path}")
+
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
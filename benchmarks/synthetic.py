@@ -0,0 +1,121 @@
+"""Generador reproducible de catálogos sintéticos de materiales
+
+Cada familia tiene, por propiedad, una mediana y una dispersión entre
+materiales en escala log10 con órdenes de magnitud típicos de los gráficos
+de Ashby. El valor central de cada material sigue una distribución
+log-normal alrededor de la mediana de su familia y la anchura del rango
+(max/min) también es log-normal, de modo que los rangos se solapan como en
+un catálogo real. Una fracción de los valores se deja sin definir (NaN).
+
+Uso (requiere pyarrow):
+    python -m benchmarks.synthetic 100000 catalogo_sintetico.arrow --seed 0
+"""
+import argparse
+
+import numpy as np
+
+from material_store import ColumnarMaterialStore
+
+PROPERTY_KEYS = (
+    'young_modulus', 'yield_strength', 'density', 'fracture_toughness',
+    'thermal_conductivity', 'thermal_expansion', 'max_service_temp', 'price'
+)
+
+# {familia: (peso, color, {clave: (mediana, dispersión en décadas)})}
+FAMILY_PROFILES = {
+    'Metales': (0.25, '#FF6B6B', {
+        'young_modulus': (150, 0.3), 'yield_strength': (300, 0.5), 'density': (7000, 0.25),
+        'fracture_toughness': (50, 0.4), 'thermal_conductivity': (50, 0.5), 'thermal_expansion': (15, 0.2),
+        'max_service_temp': (400, 0.3), 'price': (5, 0.6)
+    }),
+    'Polímeros': (0.2, '#96CEB4', {
+        'young_modulus': (2.5, 0.3), 'yield_strength': (50, 0.3), 'density': (1200, 0.1),
+        'fracture_toughness': (2, 0.3), 'thermal_conductivity': (0.25, 0.15), 'thermal_expansion': (100, 0.2),
+        'max_service_temp': (120, 0.2), 'price': (3, 0.5)
+    }),
+    'Cerámicos': (0.1, '#FFB347', {
+        'young_modulus': (300, 0.2), 'yield_strength': (400, 0.4), 'density': (3500, 0.1),
+        'fracture_toughness': (4, 0.2), 'thermal_conductivity': (20, 0.6), 'thermal_expansion': (6, 0.2),
+        'max_service_temp': (1400, 0.15), 'price': (20, 0.6)
+    }),
+    'Compuestos': (0.15, '#2C3E50', {
+        'young_modulus': (60, 0.3), 'yield_strength': (500, 0.3), 'density': (1700, 0.1),
+        'fracture_toughness': (20, 0.3), 'thermal_conductivity': (2, 0.6), 'thermal_expansion': (10, 0.4),
+        'max_service_temp': (150, 0.15), 'price': (30, 0.5)
+    }),
+    'Vidrios': (0.05, '#87CEEB', {
+        'young_modulus': (70, 0.1), 'yield_strength': (50, 0.2), 'density': (2500, 0.05),
+        'fracture_toughness': (0.8, 0.1), 'thermal_conductivity': (1.2, 0.15), 'thermal_expansion': (6, 0.3),
+        'max_service_temp': (500, 0.15), 'price': (2, 0.3)
+    }),
+    'Elastómeros': (0.08, '#FF69B4', {
+        'young_modulus': (0.01, 0.5), 'yield_strength': (10, 0.4), 'density': (1100, 0.08),
+        'fracture_toughness': (0.2, 0.3), 'thermal_conductivity': (0.2, 0.15), 'thermal_expansion': (200, 0.15),
+        'max_service_temp': (100, 0.2), 'price': (4, 0.3)
+    }),
+    'Espumas': (0.07, '#F0E68C', {
+        'young_modulus': (0.05, 0.6), 'yield_strength': (1, 0.6), 'density': (100, 0.4),
+        'fracture_toughness': (0.05, 0.5), 'thermal_conductivity': (0.04, 0.2), 'thermal_expansion': (80, 0.2),
+        'max_service_temp': (100, 0.3), 'price': (10, 0.5)
+    }),
+    'Naturales': (0.1, '#8B4513', {
+        'young_modulus': (10, 0.3), 'yield_strength': (50, 0.4), 'density': (600, 0.3),
+        'fracture_toughness': (5, 0.3), 'thermal_conductivity': (0.2, 0.3), 'thermal_expansion': (10, 0.4),
+        'max_service_temp': (150, 0.1), 'price': (1, 0.4)
+    })
+}
+
+
+def synthetic_catalog(n_rows, seed=0, missing_fraction=0.05, range_width=(0.15, 0.1)):
+    """ColumnarMaterialStore con ``n_rows`` materiales sintéticos reproducibles
+
+    Args:
+        n_rows: Número de materiales.
+        seed: Semilla del generador; la misma semilla produce el mismo catálogo.
+        missing_fraction: Fracción de valores sin definir por propiedad (la
+            densidad se define siempre).
+        range_width: (media, desviación) de la anchura log10(max/min) de cada rango.
+    """
+    rng = np.random.default_rng(seed)
+    families = list(FAMILY_PROFILES)
+    weights = np.array([FAMILY_PROFILES[family][0] for family in families])
+
+    store = ColumnarMaterialStore(PROPERTY_KEYS)
+    store.names = [f'SYN-{row:07d}' for row in range(n_rows)]
+    store.name_to_row = {name: row for row, name in enumerate(store.names)}
+    store.families = families
+    store.colors = [FAMILY_PROFILES[family][1] for family in families]
+    store.family_codes = rng.choice(len(families), size=n_rows, p=weights / weights.sum()).astype(np.int32)
+    store.color_codes = store.family_codes.copy()
+
+    for key in PROPERTY_KEYS:
+        medians = np.log10([FAMILY_PROFILES[family][2][key][0] for family in families])
+        spreads = np.array([FAMILY_PROFILES[family][2][key][1] for family in families])
+        centers = rng.normal(medians[store.family_codes], spreads[store.family_codes])
+        widths = np.clip(np.abs(rng.normal(range_width[0], range_width[1], n_rows)), 0.01, 1.0)
+        mins = 10 ** (centers - 0.5 * widths)
+        maxs = 10 ** (centers + 0.5 * widths)
+        if key != 'density' and missing_fraction > 0:
+            missing = rng.random(n_rows) < missing_fraction
+            mins[missing] = maxs[missing] = np.nan
+        store.mins[key], store.maxs[key] = mins, maxs
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un catálogo sintético en formato Arrow IPC")
+    parser.add_argument('rows', type=int, help="Número de materiales")
+    parser.add_argument('path', help="Fichero de salida (.arrow)")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla del generador")
+    parser.add_argument('--missing', type=float, default=0.05, help="Fracción de valores sin definir")
+    args = parser.parse_args(argv)
+
+    from arrow_store import write_arrow_catalog
+
+    store = synthetic_catalog(args.rows, args.seed, args.missing)
+    write_arrow_catalog(store, args.path)
+    print(f"{len(store)} materiales sintéticos escritos en {args.path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""Importación por tramos de catálogos de proveedores (CSV o JSON Lines)
+
+El fichero se lee con pandas en tramos de ``chunk_size`` filas, de modo que
+nunca se mantiene completo en memoria. Las columnas se asignan a las claves
+de propiedad, cada tramo se valida de forma vectorizada y los errores se
+acumulan en un único informe.
+
+Columnas reconocidas: 'name' (o 'Material'), 'family' (o 'Familia'),
+'color' (opcional) y, por propiedad, '<clave>_min'/'<clave>_max',
+'<nombre visible>_min'/'<nombre visible>_max' o '<nombre visible> (min)'/
+'<nombre visible> (max)'. En JSON Lines también se admite el formato
+anidado de la base de datos ("density": [min, max]).
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from material_store import ColumnarMaterialStore
+
+NAME_COLUMNS = ('name', 'Material')
+FAMILY_COLUMNS = ('family', 'Familia')
+COLOR_COLUMNS = ('color', 'Color')
+DEFAULT_COLOR = '#808080'
+
+
+def catalog_format(path, file_format=None):
+    """Formato del catálogo ('csv' o 'jsonl'), deducido de la extensión si no se indica"""
+    if file_format is None:
+        suffix = Path(getattr(path, 'name', str(path))).suffix.lower()
+        file_format = 'jsonl' if suffix in ('.jsonl', '.json', '.ndjson') else 'csv'
+    if file_format not in ('csv', 'jsonl'):
+        raise ValueError(f"Formato no válido: {file_format!r} (usa 'csv' o 'jsonl')")
+    return file_format
+
+
+def read_catalog_chunks(path, chunk_size=50000, file_format=None):
+    """Genera DataFrames de ``chunk_size`` filas a partir de un CSV o JSON Lines
+
+    ``path`` puede ser una ruta o un fichero abierto (p. ej. un fichero subido
+    con ``st.file_uploader``); el formato se deduce de la extensión.
+    """
+    file_format = catalog_format(path, file_format)
+    if file_format == 'csv':
+        reader = pd.read_csv(path, chunksize=chunk_size, low_memory=False)
+    else:
+        # precise_float: los valores se leen sin redondeo, igual que en CSV
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size, precise_float=True)
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+
+def column_aliases(properties):
+    """{nombre de columna: (clave, 'min' | 'max')} para ``MaterialDatabase.properties``"""
+    aliases = {}
+    for prop_name, prop_key in properties.items():
+        for bound in ('min', 'max'):
+            for column in (f'{prop_key}_{bound}', f'{prop_name}_{bound}', f'{prop_name} ({bound})'):
+                aliases[column] = (prop_key, bound)
+    return aliases
+
+
+def _first_column(chunk, candidates):
+    for column in candidates:
+        if column in chunk.columns:
+            return chunk[column]
+    return pd.Series([None] * len(chunk), index=chunk.index, dtype=object)
+
+
+def _bounds(chunk, prop_key, aliases):
+    """(mínimos, máximos, no numéricos) de una propiedad en un tramo"""
+    n_rows = len(chunk)
+    values = {'min': np.full(n_rows, np.nan), 'max': np.full(n_rows, np.nan)}
+    invalid = np.zeros(n_rows, dtype=bool)
+
+    for column, (key, bound) in aliases.items():
+        if key == prop_key and column in chunk.columns:
+            raw = chunk[column]
+            parsed = pd.to_numeric(raw, errors='coerce').to_numpy(dtype=float)
+            invalid |= raw.notna().to_numpy() & np.isnan(parsed)
+            values[bound] = np.where(np.isnan(values[bound]), parsed, values[bound])
+
+    # Formato anidado de JSON: "clave": [min, max]
+    if prop_key in chunk.columns:
+        nested = chunk[prop_key].to_numpy(dtype=object)
+        for row, value in enumerate(nested):
+            if isinstance(value, (list, tuple)) and len(value) == 2:
+                try:
+                    values['min'][row], values['max'][row] = float(value[0]), float(value[1])
+                except (TypeError, ValueError):
+                    invalid[row] = True
+            elif value is not None and not (isinstance(value, float) and np.isnan(value)):
+                invalid[row] = True
+
+    return values['min'], values['max'], invalid
+
+
+class ImportReport:
+    """Resultado de una importación: filas aceptadas, rechazadas y errores
+
+    ``errors`` es un DataFrame con las columnas 'fila' (número de registro en
+    el fichero, empezando en 1), 'material', 'columna' y 'error'; se guardan
+    como máximo ``max_errors`` errores aunque se cuentan todos.
+    """
+
+    def __init__(self, max_errors=10000):
+        self.max_errors = max_errors
+        self.accepted = 0
+        self.rejected = 0
+        self.error_count = 0
+        self._errors = []
+        self._stored = 0
+
+    def add_errors(self, records, names, mask, column, message):
+        rows = np.flatnonzero(mask)
+        self.error_count += len(rows)
+        room = self.max_errors - self._stored
+        if not len(rows) or room <= 0:
+            return
+        rows = rows[:room]
+        self._errors.append(pd.DataFrame({
+            'fila': records[rows], 'material': names[rows], 'columna': column, 'error': message
+        }))
+        self._stored += len(rows)
+
+    def add_file_error(self, record, message):
+        """Error que impide leer el fichero a partir del registro ``record``"""
+        self.error_count += 1
+        if self._stored < self.max_errors:
+            self._errors.append(pd.DataFrame({
+                'fila': [record], 'material': [''], 'columna': ['fichero'], 'error': [message]
+            }))
+            self._stored += 1
+
+    @property
+    def errors(self):
+        if not self._errors:
+            return pd.DataFrame(columns=['fila', 'material', 'columna', 'error'])
+        return pd.concat(self._errors, ignore_index=True).sort_values('fila', kind='stable')
+
+    def summary(self):
+        return {'aceptados': self.accepted, 'rechazados': self.rejected, 'errores': self.error_count}
+
+
+def validate_chunk(chunk, offset, properties, known_families, seen_names, report,
+                   positive_keys=None, family_colors=None):
+    """Valida un tramo y devuelve un ColumnarMaterialStore con sus filas válidas
+
+    Comprobaciones: nombre presente y no repetido (en el fichero o en
+    ``seen_names``), familia conocida, valores numéricos, ambos extremos del
+    rango presentes, mínimo ≤ máximo y valores estrictamente positivos en
+    ``positive_keys`` (por defecto todas las propiedades, que se dibujan en
+    ejes logarítmicos).
+    """
+    aliases = column_aliases(properties)
+    property_keys = tuple(properties.values())
+    positive_keys = property_keys if positive_keys is None else tuple(positive_keys)
+    family_colors = family_colors or {}
+
+    n_rows = len(chunk)
+    records = offset + np.arange(1, n_rows + 1)
+    names = _first_column(chunk, NAME_COLUMNS).to_numpy(dtype=object)
+    families = _first_column(chunk, FAMILY_COLUMNS).to_numpy(dtype=object)
+    colors = _first_column(chunk, COLOR_COLUMNS).to_numpy(dtype=object)
+    display_names = np.where(pd.isna(names), '', names).astype(str).astype(object)
+    rejected = np.zeros(n_rows, dtype=bool)
+
+    def check(mask, column, message):
+        report.add_errors(records, display_names, mask, column, message)
+        rejected[:] |= mask
+
+    missing_name = pd.isna(names) | (display_names == '')
+    check(missing_name, 'name', "Falta el nombre del material")
+
+    name_series = pd.Series(display_names, dtype=object)
+    duplicated = (name_series.duplicated(keep='first').to_numpy()
+                  | name_series.isin(seen_names).to_numpy()) & ~missing_name
+    check(duplicated, 'name', "Nombre de material repetido")
+
+    unknown_family = ~pd.Series(families, dtype=object).isin(known_families).to_numpy()
+    check(unknown_family, 'family', f"Familia desconocida (válidas: {', '.join(sorted(known_families))})")
+
+    mins, maxs = {}, {}
+    for prop_name, prop_key in properties.items():
+        low, high, invalid = _bounds(chunk, prop_key, aliases)
+        check(invalid, prop_key, "Valor no numérico")
+        check(np.isnan(low) != np.isnan(high), prop_key, "Falta uno de los extremos del rango")
+        with np.errstate(invalid='ignore'):
+            check(low > high, prop_key, "El mínimo es mayor que el máximo")
+            if prop_key in positive_keys:
+                check((low <= 0) | (high <= 0), prop_key,
+                      f"{prop_name} debe ser estrictamente positivo (eje logarítmico)")
+        mins[prop_key], maxs[prop_key] = low, high
+
+    accepted = np.flatnonzero(~rejected)
+    report.accepted += len(accepted)
+    report.rejected += int(rejected.sum())
+    seen_names.update(display_names[accepted])
+
+    store = ColumnarMaterialStore(property_keys)
+    store.names = list(display_names[accepted])
+    store.name_to_row = {name: row for row, name in enumerate(store.names)}
+    store.families, store.family_codes = _encode(families[accepted])
+    # Sin color explícito se usa el de la familia en la base de datos
+    default_colors = np.array([family_colors.get(family, DEFAULT_COLOR) for family in store.families] or [''],
+                              dtype=object)
+    colors = colors[accepted]
+    colors = np.where(pd.isna(colors), default_colors[store.family_codes], colors)
+    store.colors, store.color_codes = _encode(colors)
+    for key in property_keys:
+        store.mins[key] = mins[key][accepted]
+        store.maxs[key] = maxs[key][accepted]
+    return store
+
+
+def _encode(values):
+    """(categorías, códigos int32) de un arreglo de cadenas"""
+    codes, categories = pd.factorize(pd.Series(values, dtype=object))
+    return list(categories), codes.astype(np.int32)
+
+
+def import_catalog(path, properties, base_store=None, known_families=None, chunk_size=50000,
+                   file_format=None, positive_keys=None, max_errors=10000):
+    """Importa un catálogo por tramos y devuelve (almacenamiento, informe)
+
+    Args:
+        path: Fichero CSV o JSON Lines.
+        properties: Diccionario {nombre visible: clave}, como ``MaterialDatabase.properties``.
+        base_store: Almacenamiento existente; los nombres repetidos se rechazan y
+            las familias y colores de referencia se toman de él.
+        known_families: Familias admitidas (por defecto las de ``base_store``).
+        chunk_size: Filas por tramo.
+        positive_keys: Propiedades que deben ser estrictamente positivas.
+
+    Un fichero vacío o que no se puede leer no importa ningún material; el
+    motivo se añade a los errores del informe (columna 'fichero').
+
+    Returns:
+        (ColumnarMaterialStore con las filas válidas, ImportReport)
+    """
+    if known_families is None:
+        known_families = base_store.families if base_store is not None else []
+    known_families = set(known_families)
+
+    family_colors = {}
+    seen_names = set()
+    if base_store is not None:
+        seen_names.update(base_store.names)
+        for code, color_code in zip(base_store.family_codes, base_store.color_codes):
+            family_colors.setdefault(base_store.families[code], base_store.colors[color_code])
+
+    report = ImportReport(max_errors)
+    parts = []
+    offset = 0
+    file_format = catalog_format(path, file_format)
+    chunks = read_catalog_chunks(path, chunk_size, file_format)
+    while True:
+        try:
+            chunk = next(chunks, None)
+        except (pd.errors.EmptyDataError, pd.errors.ParserError, ValueError) as error:
+            # Fichero vacío o mal formado (read_json señala el JSON no válido con
+            # ValueError): no se importa nada y el motivo queda en el informe
+            report.add_file_error(offset + 1, f"No se puede leer el fichero ({file_format}): {error}")
+            report.rejected += report.accepted
+            report.accepted = 0
+            parts = []
+            break
+        if chunk is None:
+            break
+        parts.append(validate_chunk(chunk, offset, properties, known_families, seen_names, report,
+                                    positive_keys, family_colors))
+        offset += len(chunk)
+
+    # Solo se conservan las columnas de las filas válidas de cada tramo
+    imported = ColumnarMaterialStore(properties.values()).concat(*parts)
+    imported.version = 0
+    return imported, report
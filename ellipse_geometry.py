@@ -0,0 +1,249 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from material_store import grow_buffer
+
+
+def ellipse_vertices(x_min, x_max, y_min, y_max, n_points=50):
+    """Calcula en un solo paso los vértices de las elipses de varios materiales
+
+    Cada elipse se centra en la media geométrica del rango y sus radios se
+    miden en escala logarítmica, igual que en una elipse individual del
+    gráfico de Ashby. Devuelve dos arreglos (n_materiales, n_points).
+    """
+    x_min, x_max = np.asarray(x_min, dtype=float), np.asarray(x_max, dtype=float)
+    y_min, y_max = np.asarray(y_min, dtype=float), np.asarray(y_max, dtype=float)
+
+    # Centro y radios en escala logarítmica (NaN si el rango no es positivo)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_log_center = 0.5 * (np.log10(x_min) + np.log10(x_max))
+        y_log_center = 0.5 * (np.log10(y_min) + np.log10(y_max))
+        x_radius = np.log10(x_max) - x_log_center
+        y_radius = np.log10(y_max) - y_log_center
+
+    theta = np.linspace(0, 2*np.pi, n_points)
+    xs = 10 ** (x_log_center[:, None] + x_radius[:, None] * np.cos(theta))
+    ys = 10 ** (y_log_center[:, None] + y_radius[:, None] * np.sin(theta))
+    return xs, ys
+
+
+def pack_polygons(xs, ys):
+    """Concatena polígonos (n, p) en trazos planos separados por NaN
+
+    Plotly dibuja cada tramo separado por NaN como un polígono independiente
+    cuando se usa ``fill='toself'``, de modo que muchas elipses caben en una
+    sola traza.
+    """
+    n_polygons = xs.shape[0]
+    gap = np.full((n_polygons, 1), np.nan)
+    return np.hstack([xs, gap]).ravel(), np.hstack([ys, gap]).ravel()
+
+
+def log_bounds(values_min, values_max):
+    """Extremos en log10 de los rangos; NaN si no son positivos"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.log10(values_min), np.log10(values_max)
+
+
+# Vértices por elipse según el nivel de detalle, y diámetro en píxeles a partir
+# del cual se pasa al nivel siguiente
+LOD_VERTEX_COUNTS = (8, 16, 32, 50)
+LOD_PIXEL_LIMITS = (4, 16, 64)
+
+
+def viewport_mask(x_min, x_max, y_min, y_max, viewport):
+    """Máscara de las elipses cuya caja en escala log intersecta la vista
+
+    ``viewport`` es ((x0, x1), (y0, y1)) en log10, como los rangos de un eje
+    logarítmico de Plotly.
+    """
+    (x0, x1), (y0, y1) = viewport
+    x_lo, x_hi = log_bounds(x_min, x_max)
+    y_lo, y_hi = log_bounds(y_min, y_max)
+    return (x_hi >= x0) & (x_lo <= x1) & (y_hi >= y0) & (y_lo <= y1)
+
+
+def padded_range(lo, hi, min_span=1.0):
+    """Rango (lo, hi) en log10 con amplitud positiva
+
+    Un rango degenerado (lo >= hi, p. ej. un único material o una vista con
+    ambos extremos iguales) se amplía a ``min_span`` décadas centradas en él,
+    de modo que la escala a píxeles nunca divide por cero.
+    """
+    lo, hi = float(lo), float(hi)
+    if hi > lo:
+        return lo, hi
+    center = 0.5 * (lo + hi)
+    return center - 0.5 * min_span, center + 0.5 * min_span
+
+
+def data_viewport(x_min, x_max, y_min, y_max, margin=0.05):
+    """Vista en log10 que abarca todas las elipses, con un margen relativo"""
+    x_lo, x_hi = log_bounds(x_min, x_max)
+    y_lo, y_hi = log_bounds(y_min, y_max)
+    finite = np.isfinite(x_lo) & np.isfinite(x_hi) & np.isfinite(y_lo) & np.isfinite(y_hi)
+    if not finite.any():
+        return None
+
+    viewport = []
+    for lo, hi in ((x_lo[finite].min(), x_hi[finite].max()), (y_lo[finite].min(), y_hi[finite].max())):
+        pad = margin * max(hi - lo, 1.0)
+        viewport.append(padded_range(lo - pad, hi + pad))
+    return tuple(viewport)
+
+
+def detail_levels(x_min, x_max, y_min, y_max, viewport, plot_size=(900, 600)):
+    """Nivel de detalle (índice en LOD_VERTEX_COUNTS) según el tamaño en pantalla
+
+    El diámetro mayor de cada elipse se convierte a píxeles con la vista
+    ``viewport`` y el tamaño del área de dibujo ``plot_size`` (ancho, alto).
+    """
+    (x0, x1), (y0, y1) = (padded_range(*axis) for axis in viewport)
+    width, height = plot_size
+    x_lo, x_hi = log_bounds(x_min, x_max)
+    y_lo, y_hi = log_bounds(y_min, y_max)
+    diameter = np.maximum((x_hi - x_lo) / (x1 - x0) * width, (y_hi - y_lo) / (y1 - y0) * height)
+    return np.searchsorted(LOD_PIXEL_LIMITS, diameter, side='right')
+
+
+def rasterize_ellipses(x_min, x_max, y_min, y_max, codes, n_codes, x_range, y_range, shape=(256, 384)):
+    """Rasteriza las elipses rellenas sobre una malla log-log por categoría
+
+    ``x_range`` e ``y_range`` son los límites de la malla en log10 (como los
+    rangos de un eje logarítmico de Plotly) y ``codes`` asigna cada elipse a
+    una de las ``n_codes`` capas. Cada fila de píxeles de una elipse se
+    acumula como un tramo en un arreglo de diferencias, de modo que el coste
+    depende de la altura de las elipses en píxeles y no de su área.
+
+    Devuelve (cobertura, centros_x, centros_y): cobertura tiene forma
+    (n_codes, alto, ancho) con el número de elipses que cubren cada píxel y
+    los centros se expresan en valores lineales.
+    """
+    height, width = shape
+    x0, x1 = padded_range(*x_range)
+    y0, y1 = padded_range(*y_range)
+    dx = (x1 - x0) / width
+    dy = (y1 - y0) / height
+
+    x_lo, x_hi = log_bounds(x_min, x_max)
+    y_lo, y_hi = log_bounds(y_min, y_max)
+    valid = np.isfinite(x_lo) & np.isfinite(x_hi) & np.isfinite(y_lo) & np.isfinite(y_hi)
+    valid &= (x_hi >= x0) & (x_lo <= x1) & (y_hi >= y0) & (y_lo <= y1)
+
+    cx, rx = 0.5 * (x_lo + x_hi)[valid], 0.5 * (x_hi - x_lo)[valid]
+    cy, ry = 0.5 * (y_lo + y_hi)[valid], 0.5 * (y_hi - y_lo)[valid]
+    codes = np.asarray(codes)[valid]
+
+    # Filas de píxeles cuyo centro cae dentro de cada elipse (al menos una)
+    row_lo = np.ceil((cy - ry - y0) / dy - 0.5)
+    row_hi = np.floor((cy + ry - y0) / dy - 0.5)
+    thin = row_lo > row_hi
+    row_lo[thin] = row_hi[thin] = np.floor((cy[thin] - y0) / dy)
+    row_lo = np.clip(row_lo, 0, height - 1).astype(np.int64)
+    row_hi = np.clip(row_hi, 0, height - 1).astype(np.int64)
+
+    counts = row_hi - row_lo + 1
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.cumsum(counts) - counts
+    rows = row_lo[owner] + (np.arange(len(owner)) - offsets[owner])
+
+    # Semiancho de la elipse en el centro de cada fila de píxeles
+    v = y0 + (rows + 0.5) * dy
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.where(ry[owner] > 0, (v - cy[owner]) / ry[owner], 0.0)
+    half_width = rx[owner] * np.sqrt(np.clip(1 - t ** 2, 0, None))
+
+    col_lo = np.ceil((cx[owner] - half_width - x0) / dx - 0.5)
+    col_hi = np.floor((cx[owner] + half_width - x0) / dx - 0.5)
+    narrow = col_lo > col_hi
+    col_lo[narrow] = col_hi[narrow] = np.floor((cx[owner][narrow] - x0) / dx)
+    inside = (col_hi >= 0) & (col_lo <= width - 1)
+    col_lo = np.clip(col_lo[inside], 0, width - 1).astype(np.int64)
+    col_hi = np.clip(col_hi[inside], 0, width - 1).astype(np.int64)
+    rows = rows[inside]
+    layer = codes[owner][inside].astype(np.int64)
+
+    # Arreglo de diferencias: +1 al inicio del tramo y -1 tras su final
+    base = (layer * height + rows) * (width + 1)
+    size = n_codes * height * (width + 1)
+    diff = np.bincount(base + col_lo, minlength=size) - np.bincount(base + col_hi + 1, minlength=size)
+    coverage = np.cumsum(diff.reshape(n_codes, height, width + 1), axis=2)[:, :, :width]
+
+    x_centers = 10 ** (x0 + (np.arange(width) + 0.5) * dx)
+    y_centers = 10 ** (y0 + (np.arange(height) + 0.5) * dy)
+    return coverage, x_centers, y_centers
+
+
+class EllipseGeometryCache:
+    """Caché LRU de vértices de elipses para todos los materiales por par de ejes
+
+    La clave es (store.uid, x_key, y_key, n_points): a diferencia de ``id()``,
+    ``uid`` no se reutiliza cuando se libera un almacenamiento, así que un
+    almacenamiento nuevo nunca recibe la geometría de otro. Cada entrada
+    guarda los vértices de todas las filas del almacenamiento, de modo que un
+    gráfico filtrado solo tiene que indexar las filas seleccionadas. Cuando
+    cambia la versión de la base de datos se recalculan solo las filas del
+    registro de cambios; las insertadas se añaden a búferes con capacidad de
+    sobra.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # La caché puede compartirse entre sesiones que se ejecutan en hilos distintos
+        self._lock = threading.Lock()
+
+    def _build(self, store, x_key, y_key, n_points):
+        xs, ys = ellipse_vertices(
+            store.mins[x_key], store.maxs[x_key],
+            store.mins[y_key], store.maxs[y_key],
+            n_points
+        )
+        return {'store': store.uid, 'version': store.version, 'xs': xs, 'ys': ys, 'size': len(store)}
+
+    def _sync(self, entry, store, x_key, y_key, n_points):
+        """Pone al día una entrada con los cambios del almacenamiento; None si hay que reconstruirla"""
+        if entry['store'] != store.uid:
+            return None
+        changes = store.changes_since(entry['version'])
+        if changes is None:
+            return None
+        if not changes:
+            return entry
+
+        rows = np.unique(np.concatenate([change.rows for change in changes]))
+        size = len(store)
+        xs, ys = grow_buffer(entry['xs'], size), grow_buffer(entry['ys'], size)
+        xs[rows], ys[rows] = ellipse_vertices(
+            store.mins[x_key][rows], store.maxs[x_key][rows],
+            store.mins[y_key][rows], store.maxs[y_key][rows],
+            n_points
+        )
+        return {'store': store.uid, 'version': store.version, 'xs': xs, 'ys': ys, 'size': size}
+
+    def get(self, store, x_key, y_key, n_points=50):
+        """Devuelve (xs, ys) de forma (n_filas, n_points) para todo el almacenamiento"""
+        key = (store.uid, x_key, y_key, n_points)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry['version'] != store.version or entry['store'] != store.uid:
+                    entry = self._sync(entry, store, x_key, y_key, n_points)
+                if entry is not None:
+                    self._entries[key] = entry
+
+        if entry is None:
+            entry = self._build(store, x_key, y_key, n_points)
+            with self._lock:
+                self._entries[key] = entry
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        size = entry['size']
+        return entry['xs'][:size], entry['ys'][:size]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,83 @@
+"""Comprobación del tiempo de importación en frío del núcleo sin interfaz
+
+Cada medida se hace en un intérprete nuevo, de modo que incluye la carga de
+NumPy y de todos los módulos del proyecto. Se toma el mínimo de varias
+repeticiones (el ruido solo puede sumar tiempo) y se comprueba además que
+no se haya cargado ninguna dependencia que deba importarse al usarla
+(Streamlit, Plotly, pandas, pyarrow, SciPy).
+
+Uso (falla con código 1 si se supera el presupuesto):
+    python import_budget.py --budget 0.5
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Módulos que deben importarse rápido
+MODULES = ('material_selection', 'ashby_select')
+# Dependencias que solo deben cargarse al usarlas
+LAZY_DEPENDENCIES = ('streamlit', 'plotly', 'pandas', 'pyarrow', 'scipy')
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(modules=MODULES, lazy=LAZY_DEPENDENCIES):
+    """(segundos, dependencias diferidas cargadas) de importar ``modules`` en un intérprete nuevo"""
+    probe = _PROBE.format(modules=tuple(modules), lazy=tuple(lazy))
+    output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result['seconds'], result['loaded']
+
+
+def slowest_imports(modules=MODULES, limit=10):
+    """Módulos con mayor tiempo acumulado según ``python -X importtime``"""
+    statement = '; '.join(f'import {module}' for module in modules)
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, check=True).stderr
+    entries = []
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative), name.rstrip()))
+    return sorted(entries, reverse=True)[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación del núcleo sin interfaz")
+    parser.add_argument('--budget', type=float, default=0.5, help="Segundos máximos de importación")
+    parser.add_argument('--repeat', type=int, default=5, help="Intérpretes nuevos a medir")
+    args = parser.parse_args(argv)
+
+    timings = []
+    loaded = []
+    for _ in range(args.repeat):
+        seconds, loaded = measure_import()
+        timings.append(seconds)
+    best = min(timings)
+    print(f"Importación de {', '.join(MODULES)}: {best * 1000:.0f} ms "
+          f"(mínimo de {args.repeat}; presupuesto {args.budget * 1000:.0f} ms)")
+
+    failed = False
+    if loaded:
+        print(f"❌ Dependencias diferidas cargadas al importar: {', '.join(loaded)}")
+        failed = True
+    if best > args.budget:
+        print("❌ Presupuesto superado. Importaciones más lentas (acumulado):")
+        for cumulative, name in slowest_imports():
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
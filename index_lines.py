@@ -0,0 +1,68 @@
+import numpy as np
+
+from ellipse_geometry import log_bounds
+
+
+def line_intercept(x_range, y_range, slope, line_position=0.5):
+    """log10(C) de la línea y = C·x^slope que pasa por la posición relativa indicada
+
+    ``x_range`` e ``y_range`` son los límites de los ejes en log10 y
+    ``line_position`` (0-1) recorre la diagonal de la vista, igual que en
+    ``PerformanceIndexTool.add_performance_line``.
+    """
+    x_ref = x_range[0] + line_position * (x_range[1] - x_range[0])
+    y_ref = y_range[0] + line_position * (y_range[1] - y_range[0])
+    return y_ref - slope * x_ref
+
+
+class IndexLineQuery:
+    """Consulta de los materiales por encima de una línea de índice en escala log-log
+
+    En log10 la línea es Y = slope·X + c y cada material es una elipse de
+    centro (cx, cy) y radios (rx, ry) alineados con los ejes. Sobre la elipse,
+    Y - slope·X varía en cy - slope·cx ± sqrt(slope²·rx² + ry²): la proyección
+    de la elipse sobre la normal de la línea. Estos extremos se calculan y
+    ordenan una vez por pendiente, y cada posición de la línea se resuelve con
+    una búsqueda binaria.
+    """
+
+    def __init__(self, x_min, x_max, y_min, y_max, slope):
+        self.slope = slope
+        x_lo, x_hi = log_bounds(x_min, x_max)
+        y_lo, y_hi = log_bounds(y_min, y_max)
+        valid = np.flatnonzero(np.isfinite(x_lo) & np.isfinite(x_hi) & np.isfinite(y_lo) & np.isfinite(y_hi))
+
+        center = 0.5 * (y_lo + y_hi)[valid] - slope * 0.5 * (x_lo + x_hi)[valid]
+        half_width = np.hypot(slope * 0.5 * (x_hi - x_lo)[valid], 0.5 * (y_hi - y_lo)[valid])
+
+        low, high = center - half_width, center + half_width
+        low_order, high_order = np.argsort(low, kind='stable'), np.argsort(high, kind='stable')
+        self._low_rows, self._low_keys = valid[low_order], low[low_order]
+        self._high_rows, self._high_keys = valid[high_order], high[high_order]
+
+    @classmethod
+    def from_store(cls, store, x_key, y_key, slope):
+        return cls(store.mins[x_key], store.maxs[x_key], store.mins[y_key], store.maxs[y_key], slope)
+
+    def _sorted(self, fully):
+        return (self._low_keys, self._low_rows) if fully else (self._high_keys, self._high_rows)
+
+    def count_above(self, intercept, fully=False):
+        """Número de materiales por encima de la línea de ordenada log10 ``intercept``"""
+        keys, _ = self._sorted(fully)
+        return len(keys) - int(np.searchsorted(keys, intercept, side='right'))
+
+    def above(self, intercept, fully=False, rows=None):
+        """Filas (crecientes) cuya elipse queda por encima de la línea
+
+        Args:
+            intercept: log10(C) de la línea y = C·x^slope.
+            fully: True para exigir la elipse completa por encima; False
+                para incluir también las que la cortan.
+            rows: Restringe el resultado a estas filas (p. ej. las filtradas).
+        """
+        keys, ordered_rows = self._sorted(fully)
+        result = np.sort(ordered_rows[np.searchsorted(keys, intercept, side='right'):])
+        if rows is not None:
+            result = result[np.isin(result, rows, assume_unique=True)]
+        return result
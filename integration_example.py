@@ -1,6 +1,15 @@
 # Ejemplo de cómo integrar las funcionalidades avanzadas en la aplicación principal
 # Agrega este código al final del archivo ashby_app.py, antes de la función main()
 
+# Streamlit solo se importa en las funciones de interfaz, de modo que el
+# análisis y las plantillas se pueden usar sin él (p. ej. desde batch_runner)
+import numpy as np
+import pandas as pd
+
+from material_store import resolve_records
+from multi_criteria import multi_criteria_scores, sample_simplex
+from property_stats import describe_ranges, range_bounds
+
 def integrate_advanced_features():
     """Función para integrar las funcionalidades avanzadas"""
     
@@ -18,6 +27,8 @@ def integrate_advanced_features():
 def main_with_advanced_features():
     """Función principal con funcionalidades avanzadas integradas"""
     
+    import streamlit as st
+    
     # ... (código existente hasta la generación del gráfico principal) ...
     
     # Después de mostrar el gráfico principal, agregar pestaña avanzada
@@ -169,55 +180,72 @@ CUSTOM_PERFORMANCE_INDICES = {
 }
 
 # Función de ejemplo para análisis multi-criterio
-def multi_criteria_analysis(materials_dict, criteria_weights):
+def multi_criteria_analysis(materials_dict, criteria_weights, database, weight_batch=None, top_n=5):
     """
     Realiza análisis multi-criterio para ranking de materiales
     
+    Cada criterio se normaliza a [0, 1] y la puntuación es la media ponderada
+    de los criterios definidos para el material, calculada como producto
+    matricial (ver ``multi_criteria.multi_criteria_scores``). Con
+    ``weight_batch`` se evalúa además un lote de vectores de pesos (p. ej.
+    ``sample_simplex``) para medir la estabilidad del ranking.
+    
     Args:
         materials_dict: Diccionario de materiales filtrados
         criteria_weights: Pesos para cada criterio (suma = 1.0)
+        database: MaterialDatabase sobre la que se resuelven los materiales
+        weight_batch: Arreglo opcional (n_pesos, n_criterios) en el orden de
+            ``criteria_weights`` para el análisis de sensibilidad; las columnas
+            de criterios desconocidos se descartan como en ``criteria_weights``
+        top_n: Tamaño del grupo de cabeza para la frecuencia de top-N
     
     Returns:
         DataFrame con puntuaciones y ranking
     """
     
-    results = []
-    
-    for material_name, material_props in materials_dict.items():
-        score = 0
-        valid_criteria = 0
-        
-        # Calcular puntuación ponderada
-        for criterion, weight in criteria_weights.items():
-            if criterion in CUSTOM_PERFORMANCE_INDICES:
-                index_config = CUSTOM_PERFORMANCE_INDICES[criterion]
-                # Simplificación: usar valores medios
-                # En implementación real, se calcularía según la fórmula
-                normalized_value = 0.5  # Placeholder
-                score += weight * normalized_value
-                valid_criteria += 1
-        
-        if valid_criteria > 0:
-            final_score = score / valid_criteria
-            results.append({
-                'Material': material_name,
-                'Familia': material_props['family'],
-                'Puntuación': final_score,
-                'Ranking': 0  # Se calculará después
-            })
-    
-    # Convertir a DataFrame y calcular ranking
-    df = pd.DataFrame(results)
-    if not df.empty:
-        df = df.sort_values('Puntuación', ascending=False)
-        df['Ranking'] = range(1, len(df) + 1)
-    
-    return df
+    store, rows = resolve_records(materials_dict, database.store)
+    criteria = [criterion for criterion in criteria_weights if criterion in CUSTOM_PERFORMANCE_INDICES]
+    if not criteria or not len(rows):
+        return pd.DataFrame(columns=['Material', 'Familia', 'Puntuación', 'Ranking'])
+    
+    if weight_batch is not None:
+        weight_batch = np.asarray(weight_batch, dtype=float)
+        if weight_batch.ndim != 2 or weight_batch.shape[1] != len(criteria_weights):
+            raise ValueError(f"weight_batch debe tener {len(criteria_weights)} columnas, una por criterio")
+        # Solo las columnas de los criterios evaluables, en el mismo orden que ``criteria``
+        weight_batch = weight_batch[:, [position for position, criterion in enumerate(criteria_weights)
+                                        if criterion in CUSTOM_PERFORMANCE_INDICES]]
+    
+    scores, sensitivity = multi_criteria_scores(
+        store, rows, [CUSTOM_PERFORMANCE_INDICES[criterion] for criterion in criteria],
+        [criteria_weights[criterion] for criterion in criteria], weight_batch, top_n
+    )
+    
+    df = pd.DataFrame({
+        'Material': [store.names[row] for row in rows],
+        'Familia': np.asarray(store.families, dtype=object)[store.family_codes[rows]],
+        'Puntuación': scores
+    })
+    
+    if sensitivity is not None:
+        df['Rango medio'] = sensitivity['mean_rank']
+        df['Desv. del rango'] = sensitivity['std_rank']
+        df['Mejor rango'] = sensitivity['best_rank']
+        df['Peor rango'] = sensitivity['worst_rank']
+        df[f'Frecuencia top {top_n}'] = sensitivity['top_n_frequency']
+        df['Frecuencia 1º'] = sensitivity['first_frequency']
+    
+    # Materiales sin ningún criterio evaluable se omiten del ranking
+    df = df[~np.isnan(scores)].sort_values('Puntuación', ascending=False, kind='stable')
+    df.insert(3, 'Ranking', np.arange(1, len(df) + 1))
+    return df.reset_index(drop=True)
 
 # Ejemplo de uso en Streamlit
 def example_usage_in_streamlit():
     """Ejemplo de cómo usar las funcionalidades en la interfaz"""
     
+    import streamlit as st
+    
     st.subheader("🎯 Análisis Multi-Criterio")
     
     # Selector de criterios y pesos
@@ -243,9 +271,15 @@ def example_usage_in_streamlit():
     if total_weight > 0:
         weights = {k: v/total_weight for k, v in weights.items()}
     
+    sensitivity = st.checkbox("Análisis de sensibilidad de los pesos")
+    n_samples = st.number_input("Vectores de pesos:", 100, 20000, 2000, step=100) if sensitivity else 0
+    
     # Mostrar análisis
     if st.button("Realizar Análisis"):
-        # Aquí se llamaría a la función con los materiales filtrados
+        weight_batch = sample_simplex(len(criteria), int(n_samples), seed=0) if sensitivity else None
+        database = st.session_state.database
+        results = multi_criteria_analysis(database.materials, weights, database, weight_batch)
+        st.dataframe(results, use_container_width=True)
         st.info("Análisis multi-criterio completado!")
 
 # Documentación de uso
@@ -313,6 +347,8 @@ CUSTOM_THEMES = {
 def apply_custom_theme(theme_name):
     """Aplica un tema personalizado a la aplicación"""
     
+    import streamlit as st
+    
     if theme_name not in CUSTOM_THEMES:
         return
     
@@ -350,47 +386,38 @@ def apply_custom_theme(theme_name):
     st.markdown(custom_css, unsafe_allow_html=True)
 
 # Funciones de utilidad para análisis estadístico
-def calculate_material_statistics(materials_dict):
+def calculate_material_statistics(materials_dict, database):
     """Calcula estadísticas descriptivas de los materiales"""
     
+    store, rows = resolve_records(materials_dict, database.store)
+    
     stats = {}
     
-    for prop_display, prop_key in st.session_state.database.properties.items():
-        values = []
-        
-        for material_data in materials_dict.values():
-            if prop_key in material_data:
-                # Usar valor medio del rango
-                avg_val = np.mean(material_data[prop_key])
-                values.append(avg_val)
-        
-        if values:
-            stats[prop_display] = {
-                'count': len(values),
-                'mean': np.mean(values),
-                'std': np.std(values),
-                'min': np.min(values),
-                'max': np.max(values),
-                'median': np.median(values)
-            }
+    for prop_display, prop_key in database.properties.items():
+        # Usar valor medio del rango; sobre la base de datos se reutiliza el índice de estadísticas
+        if store is database.store:
+            summary = database.statistics.describe(prop_key, rows)
+        else:
+            summary = describe_ranges(store.mins[prop_key][rows], store.maxs[prop_key][rows])
+        if summary is not None:
+            stats[prop_display] = summary
     
     return stats
 
 # Función para generar insights automáticos
-def generate_material_insights(filtered_materials, original_materials):
+def generate_material_insights(filtered_materials, original_materials, database):
     """Genera insights automáticos sobre la selección de materiales"""
     
     insights = []
     
+    store, rows = resolve_records(filtered_materials, database.store)
+    
     # Análisis de familias representadas
-    families = {}
-    for material_data in filtered_materials.values():
-        family = material_data['family']
-        families[family] = families.get(family, 0) + 1
+    families = np.bincount(store.family_codes[rows], minlength=len(store.families))
     
-    if families:
-        dominant_family = max(families, key=families.get)
-        insights.append(f"🔍 La familia dominante es **{dominant_family}** con {families[dominant_family]} materiales.")
+    if families.any():
+        dominant_code = int(np.argmax(families))
+        insights.append(f"🔍 La familia dominante es **{store.families[dominant_code]}** con {families[dominant_code]} materiales.")
     
     # Análisis de reducción
     original_count = len(original_materials)
@@ -403,13 +430,13 @@ def generate_material_insights(filtered_materials, original_materials):
         insights.append(f"⚠️ Los filtros son poco restrictivos ({reduction_percent:.1f}% de reducción). Considera criterios más estrictos.")
     
     # Análisis de rango de precios
-    prices = []
-    for material_data in filtered_materials.values():
-        if 'price' in material_data:
-            prices.extend(material_data['price'])
+    if store is database.store and len(rows) == len(store):
+        price_bounds = database.statistics.bounds('price')
+    else:
+        price_bounds = range_bounds(store.mins['price'][rows], store.maxs['price'][rows])
     
-    if prices:
-        min_price, max_price = min(prices), max(prices)
+    if price_bounds is not None:
+        min_price, max_price = price_bounds
         if max_price / min_price > 10:
             insights.append(f"💰 Amplio rango de precios: {min_price:.1f} - {max_price:.1f} €/kg. Considera el presupuesto.")
     
@@ -446,7 +473,7 @@ def create_material_comparison_table(selected_materials, database):
     return pd.DataFrame(comparison_data)
 
 # Función para validación de selección
-def validate_material_selection(materials_dict, application_requirements):
+def validate_material_selection(materials_dict, application_requirements, database):
     """Valida si los materiales seleccionados cumplen requisitos de aplicación"""
     
     validation_results = {}
@@ -456,7 +483,7 @@ def validate_material_selection(materials_dict, application_requirements):
         failed_requirements = []
         
         for req_property, req_value in application_requirements.items():
-            prop_key = st.session_state.database.properties.get(req_property)
+            prop_key = database.properties.get(req_property)
             
             if prop_key and prop_key in material_data:
                 material_range = material_data[prop_key]
@@ -511,6 +538,8 @@ APPLICATION_TEMPLATES = {
 def add_application_templates_ui():
     """Agrega interfaz para plantillas de aplicación"""
     
+    import streamlit as st
+    
     st.subheader("🎯 Plantillas de Aplicación")
     
     col1, col2 = st.columns(2)
@@ -536,6 +565,8 @@ def add_application_templates_ui():
             st.write(f"• {prop}: {symbol} {req['value']}")
 
 if __name__ == "__main__":
+    import streamlit as st
+    
     # Ejemplo de uso completo con todas las funcionalidades
     st.title("AshbyChart Selector - Versión Completa")
     
@@ -0,0 +1,153 @@
+import numpy as np
+
+
+class PropertyIntervalIndex:
+    """Índice de extremos ordenados para consultas de solapamiento de rangos
+
+    Un material con rango [min, max] se solapa con el intervalo [a, b] salvo
+    que ``max < a`` o ``min > b``. Ambos casos son un prefijo de los máximos
+    ordenados y un sufijo de los mínimos ordenados, de modo que el número de
+    solapamientos se obtiene con dos búsquedas binarias.
+
+    Para enumerar los solapamientos las filas se agrupan por clase de anchura
+    (potencias de dos de ``max - min``) y cada grupo se ordena por su mínimo:
+    dentro de un grupo de anchura máxima W, los candidatos son el tramo
+    contiguo con ``min`` en [a - W, b], lo que acota el trabajo a O(log n + k)
+    más unos pocos rangos que terminan justo antes de ``a``.
+    """
+
+    def __init__(self, mins, maxs):
+        self.mins = mins
+        self.maxs = maxs
+
+        defined = ~np.isnan(mins)
+        # Las filas sin la propiedad nunca se descartan por un filtro sobre ella
+        self.missing_rows = np.flatnonzero(~defined)
+        rows = np.flatnonzero(defined)
+
+        self.sorted_mins = np.sort(mins[rows])
+        self.sorted_maxs = np.sort(maxs[rows])
+
+        widths = maxs[rows] - mins[rows]
+        _, exponents = np.frexp(widths)
+        width_class = np.where(widths > 0, exponents, np.iinfo(exponents.dtype).min)
+
+        order = np.lexsort((mins[rows], width_class))
+        self.rows_by_class = rows[order]
+        self.mins_by_class = mins[self.rows_by_class]
+
+        sorted_classes = width_class[order]
+        starts = np.flatnonzero(np.r_[True, sorted_classes[1:] != sorted_classes[:-1]])
+        ends = np.r_[starts[1:], len(rows)]
+        sorted_widths = widths[order]
+        self.segments = [
+            (start, end, sorted_widths[start:end].max())
+            for start, end in zip(starts, ends)
+        ]
+
+    def count_overlapping(self, low, high):
+        """Número de materiales cuyo rango se solapa con [low, high], en O(log n)"""
+        n_defined = len(self.sorted_mins)
+        below = np.searchsorted(self.sorted_maxs, low, side='left')
+        above = n_defined - np.searchsorted(self.sorted_mins, high, side='right')
+        return max(n_defined - below - above, 0) + len(self.missing_rows)
+
+    def overlapping(self, low, high):
+        """Filas (sin ordenar) cuyo rango se solapa con [low, high]"""
+        parts = []
+        for start, end, max_width in self.segments:
+            segment = self.mins_by_class[start:end]
+            first = start + np.searchsorted(segment, low - max_width, side='left')
+            last = start + np.searchsorted(segment, high, side='right')
+            if first < last:
+                candidates = self.rows_by_class[first:last]
+                parts.append(candidates[self.maxs[candidates] >= low])
+
+        if len(self.missing_rows):
+            parts.append(self.missing_rows)
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(parts)
+
+
+class MaterialIntervalIndex:
+    """Índices de intervalos de todas las propiedades de un ColumnarMaterialStore
+
+    El índice se mantiene al día con el registro de cambios del
+    almacenamiento: las filas insertadas o editadas desde la última
+    construcción quedan en un pequeño conjunto pendiente que se comprueba de
+    forma directa, y las versiones antiguas de las filas editadas se excluyen
+    de los resultados del índice. Cuando el conjunto pendiente crece, el
+    índice se reconstruye.
+    """
+
+    # Tamaño mínimo del conjunto pendiente antes de reconstruir, y fracción del catálogo
+    MIN_PENDING = 4096
+    PENDING_FRACTION = 16
+
+    def __init__(self, store):
+        self.store = store
+        self._build()
+
+    def _build(self):
+        store = self.store
+        self.version = store.version
+        self.indexes = {
+            key: PropertyIntervalIndex(store.mins[key], store.maxs[key])
+            for key in store.property_keys
+        }
+        self.indexed_rows = len(store)
+        self._stale = np.zeros(self.indexed_rows, dtype=bool)
+        self.pending_rows = np.empty(0, dtype=np.intp)
+
+    def sync(self):
+        """Aplica los cambios del almacenamiento posteriores a la versión del índice"""
+        if self.version == self.store.version:
+            return
+        changes = self.store.changes_since(self.version)
+        if changes is None:
+            self._build()
+            return
+
+        pending = np.unique(np.concatenate([self.pending_rows] + [change.rows for change in changes]))
+        if len(pending) > max(self.MIN_PENDING, len(self.store) // self.PENDING_FRACTION):
+            self._build()
+            return
+        self._stale[pending[pending < self.indexed_rows]] = True
+        self.pending_rows = pending
+        self.version = self.store.version
+
+    def query(self, ranges):
+        """Filas que se solapan con todos los rangos ``{prop_key: (low, high)}``
+
+        Los filtros se ordenan por selectividad (conteo exacto en O(log n)); se
+        parte de los candidatos del más selectivo y el resto se comprueba solo
+        sobre esos candidatos. Devuelve las filas en orden de catálogo.
+        """
+        self.sync()
+        if not ranges:
+            return np.arange(len(self.store), dtype=np.intp)
+
+        ordered = sorted(
+            ranges.items(),
+            key=lambda item: self.indexes[item[0]].count_overlapping(*item[1])
+        )
+
+        first_key, (low, high) = ordered[0]
+        rows = self.indexes[first_key].overlapping(low, high)
+        if len(self.pending_rows):
+            # Las filas pendientes se comprueban directamente con sus valores actuales;
+            # como en el índice, las que no tienen la propiedad (NaN) no se descartan
+            pending = self.pending_rows
+            mins = self.store.mins[first_key][pending]
+            maxs = self.store.maxs[first_key][pending]
+            rows = np.concatenate([rows[~self._stale[rows]], pending[~((maxs < low) | (mins > high))]])
+
+        for prop_key, (low, high) in ordered[1:]:
+            if not len(rows):
+                break
+            mins = self.store.mins[prop_key][rows]
+            maxs = self.store.maxs[prop_key][rows]
+            rows = rows[~((maxs < low) | (mins > high))]
+
+        return np.sort(rows)
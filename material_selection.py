@@ -0,0 +1,380 @@
+"""Núcleo de selección de materiales sin interfaz: base de datos, filtros, índices y Pareto
+
+Este módulo no importa Streamlit ni Plotly, y pandas y pyarrow solo se
+importan en las funciones que los necesitan, de modo que los trabajos por
+lotes y la CI pueden seleccionar materiales con un arranque en frío rápido.
+``ashby_app`` construye la interfaz sobre estas clases y ``ashby_select``
+expone la selección como orden de consola.
+"""
+import math
+import os
+
+import numpy as np
+
+from interval_index import MaterialIntervalIndex
+from material_store import ColumnarMaterialStore
+from pareto import pareto_front
+from performance_indices import COMMON_INDICES, compile_formula, ratio_formula
+from property_stats import PropertyStatistics
+from ranking import top_k
+from selection_export import EXPORT_FORMATS, export_selection
+
+
+# Propiedades disponibles {nombre visible: clave}
+PROPERTIES = {
+    'Módulo de Young (GPa)': 'young_modulus',
+    'Límite Elástico (MPa)': 'yield_strength',
+    'Densidad (kg/m³)': 'density',
+    'Tenacidad a la Fractura (MPa√m)': 'fracture_toughness',
+    'Conductividad Térmica (W/m·K)': 'thermal_conductivity',
+    'Coef. Expansión Térmica (µm/m°C)': 'thermal_expansion',
+    'Temp. Máx. Servicio (°C)': 'max_service_temp',
+    'Precio (€/kg)': 'price'
+}
+
+
+class MaterialDatabase:
+    """Clase para manejar la base de datos de materiales"""
+    
+    def __init__(self, catalog_path=None, store=None, property_keys=None):
+        self.properties = dict(PROPERTIES)
+        # Proyección: solo se cargan las propiedades que usa la sesión
+        if property_keys is not None:
+            property_keys = set(property_keys)
+            unknown = property_keys - set(PROPERTIES.values())
+            if unknown:
+                raise KeyError(f"Propiedades desconocidas: {', '.join(sorted(unknown))}")
+            self.properties = {name: key for name, key in PROPERTIES.items() if key in property_keys}
+        # Almacenamiento columnar; ``materials`` es una vista perezosa tipo dict.
+        # Con un catálogo Arrow en disco (argumento o ASHBY_CATALOG) se mapea
+        # en memoria en lugar de usar los materiales incluidos en el código;
+        # ``store`` permite usar un almacenamiento ya construido (p. ej. sintético).
+        # ``property_keys`` limita las propiedades cargadas (por defecto, todas)
+        catalog_path = catalog_path or os.environ.get('ASHBY_CATALOG')
+        if store is not None:
+            self.store = store
+        elif catalog_path:
+            from arrow_store import read_arrow_catalog
+            self.store = read_arrow_catalog(catalog_path, self.properties.values())
+        else:
+            self.store = ColumnarMaterialStore.from_dict(
+                self._create_materials_database(), self.properties.values()
+            )
+        self.materials = self.store.records()
+        self._interval_index = None
+        self._statistics = None
+    
+    def import_catalog(self, path, **options):
+        """Importa un catálogo CSV o JSON Lines por tramos y añade las filas válidas
+        
+        Las opciones se pasan a ``catalog_import.import_catalog``. Devuelve el
+        ``ImportReport`` con los materiales aceptados y los errores.
+        """
+        from catalog_import import import_catalog
+        
+        imported, report = import_catalog(path, self.properties, base_store=self.store, **options)
+        if len(imported):
+            self.store.append_store(imported)
+            self.materials = self.store.records()
+        return report
+    
+    def copy(self):
+        """Base de datos independiente con una copia de los materiales actuales
+        
+        Los cambios en la copia (p. ej. ``import_catalog``) no afectan a esta
+        base de datos ni a sus estructuras derivadas.
+        """
+        return MaterialDatabase(store=self.store.concat(), property_keys=self.properties.values())
+    
+    def add_materials(self, materials):
+        """Añade materiales en el formato anidado de diccionarios
+        
+        El índice de intervalos, las estadísticas y la caché de elipses se
+        ponen al día con el registro de cambios del almacenamiento, sin
+        reconstruirse. Devuelve las filas de los nuevos materiales.
+        """
+        rows = self.store.append_records(materials)
+        self.materials = self.store.records()
+        return rows
+    
+    def update_material(self, name, data):
+        """Reemplaza los datos de un material existente; devuelve su fila"""
+        row = self.store.update_record(name, data)
+        self.materials = self.store.records()
+        return row
+    
+    @property
+    def interval_index(self):
+        """Índice de intervalos por propiedad, construido en la primera consulta
+        
+        Abrir un catálogo no recorre sus columnas; el índice se crea con el
+        primer filtro y después se pone al día con el registro de cambios.
+        """
+        if self._interval_index is None or self._interval_index.store is not self.store:
+            self._interval_index = MaterialIntervalIndex(self.store)
+        return self._interval_index
+    
+    @property
+    def statistics(self):
+        """Índice de estadísticas por propiedad, puesto al día con los cambios del almacenamiento"""
+        if self._statistics is None or self._statistics.store is not self.store:
+            self._statistics = PropertyStatistics(self.store)
+        self._statistics.sync()
+        return self._statistics
+    
+    def _create_materials_database(self):
+        """Crea la base de datos de materiales con propiedades representativas"""
+        materials_data = {
+            'Aceros': {
+                'family': 'Metales',
+                'color': '#FF6B6B',
+                'young_modulus': [200, 220],
+                'yield_strength': [200, 1500],
+                'density': [7800, 8000],
+                'fracture_toughness': [50, 200],
+                'thermal_conductivity': [40, 60],
+                'thermal_expansion': [11, 13],
+                'max_service_temp': [400, 600],
+                'price': [0.5, 2.0]
+            },
+            'Aleaciones de Aluminio': {
+                'family': 'Metales',
+                'color': '#4ECDC4',
+                'young_modulus': [70, 85],
+                'yield_strength': [30, 600],
+                'density': [2700, 2900],
+                'fracture_toughness': [20, 45],
+                'thermal_conductivity': [120, 240],
+                'thermal_expansion': [22, 25],
+                'max_service_temp': [150, 300],
+                'price': [1.5, 4.0]
+            },
+            'Aleaciones de Titanio': {
+                'family': 'Metales',
+                'color': '#45B7D1',
+                'young_modulus': [100, 120],
+                'yield_strength': [200, 1200],
+                'density': [4400, 4900],
+                'fracture_toughness': [30, 100],
+                'thermal_conductivity': [6, 20],
+                'thermal_expansion': [8, 10],
+                'max_service_temp': [400, 600],
+                'price': [15, 40]
+            },
+            'Polietileno (PE)': {
+                'family': 'Polímeros',
+                'color': '#96CEB4',
+                'young_modulus': [0.5, 1.5],
+                'yield_strength': [10, 40],
+                'density': [910, 970],
+                'fracture_toughness': [1, 5],
+                'thermal_conductivity': [0.3, 0.5],
+                'thermal_expansion': [100, 200],
+                'max_service_temp': [80, 120],
+                'price': [1.0, 2.5]
+            },
+            'Polipropileno (PP)': {
+                'family': 'Polímeros',
+                'color': '#FFEAA7',
+                'young_modulus': [1.0, 2.0],
+                'yield_strength': [20, 40],
+                'density': [900, 920],
+                'fracture_toughness': [2, 4],
+                'thermal_conductivity': [0.1, 0.3],
+                'thermal_expansion': [80, 150],
+                'max_service_temp': [100, 140],
+                'price': [1.2, 2.8]
+            },
+            'Resinas Epóxicas': {
+                'family': 'Polímeros',
+                'color': '#DDA0DD',
+                'young_modulus': [2.5, 4.5],
+                'yield_strength': [50, 90],
+                'density': [1100, 1400],
+                'fracture_toughness': [0.5, 2],
+                'thermal_conductivity': [0.15, 0.25],
+                'thermal_expansion': [45, 80],
+                'max_service_temp': [120, 200],
+                'price': [5, 15]
+            },
+            'Alúmina (Al₂O₃)': {
+                'family': 'Cerámicos',
+                'color': '#FFB347',
+                'young_modulus': [350, 400],
+                'yield_strength': [300, 500],
+                'density': [3900, 4000],
+                'fracture_toughness': [3, 5],
+                'thermal_conductivity': [20, 35],
+                'thermal_expansion': [7, 9],
+                'max_service_temp': [1500, 1800],
+                'price': [10, 30]
+            },
+            'Circonia (ZrO₂)': {
+                'family': 'Cerámicos',
+                'color': '#F4A460',
+                'young_modulus': [200, 250],
+                'yield_strength': [800, 1200],
+                'density': [6000, 6200],
+                'fracture_toughness': [5, 12],
+                'thermal_conductivity': [2, 3],
+                'thermal_expansion': [9, 11],
+                'max_service_temp': [1000, 1500],
+                'price': [20, 60]
+            },
+            'Fibra de Carbono/Epoxy': {
+                'family': 'Compuestos',
+                'color': '#2C3E50',
+                'young_modulus': [120, 200],
+                'yield_strength': [1000, 2000],
+                'density': [1500, 1700],
+                'fracture_toughness': [15, 30],
+                'thermal_conductivity': [1, 10],
+                'thermal_expansion': [-1, 1],
+                'max_service_temp': [120, 200],
+                'price': [50, 200]
+            },
+            'Fibra de Vidrio/Poliéster': {
+                'family': 'Compuestos',
+                'color': '#7D3C98',
+                'young_modulus': [15, 35],
+                'yield_strength': [200, 500],
+                'density': [1600, 2000],
+                'fracture_toughness': [10, 25],
+                'thermal_conductivity': [0.3, 0.8],
+                'thermal_expansion': [15, 25],
+                'max_service_temp': [80, 150],
+                'price': [3, 10]
+            },
+            'Madera (Pino)': {
+                'family': 'Naturales',
+                'color': '#8B4513',
+                'young_modulus': [8, 15],
+                'yield_strength': [30, 80],
+                'density': [400, 600],
+                'fracture_toughness': [5, 15],
+                'thermal_conductivity': [0.1, 0.2],
+                'thermal_expansion': [3, 7],
+                'max_service_temp': [100, 200],
+                'price': [0.5, 2.0]
+            }
+        }
+        
+        return materials_data
+    
+    def get_dataframe(self):
+        """Convierte la base de datos a DataFrame para facilitar el manejo"""
+        import pandas as pd
+        
+        store = self.store
+        data = {
+            'Material': np.asarray(store.names, dtype=object),
+            'Familia': np.asarray(store.families, dtype=object)[store.family_codes],
+            'Color': np.asarray(store.colors, dtype=object)[store.color_codes],
+        }
+        for prop_name, prop_key in self.properties.items():
+            data[f'{prop_name}_min'] = store.mins[prop_key]
+            data[f'{prop_name}_max'] = store.maxs[prop_key]
+        return pd.DataFrame(data)
+
+
+class MaterialFilter:
+    """Clase para manejar el filtrado de materiales"""
+    
+    def __init__(self, database):
+        self.database = database
+        
+    def apply_filters(self, filters):
+        """Aplica filtros a la base de datos de materiales
+        
+        Devuelve una vista ligera (tipo dict) sobre las filas que cumplen los
+        filtros; sus índices están disponibles en el atributo ``rows``.
+        """
+        ranges = {
+            self.database.properties[property_name]: tuple(filter_config['range'])
+            for property_name, filter_config in filters.items()
+            if filter_config['active']
+        }
+        rows = self.database.interval_index.query(ranges)
+        return self.database.store.records(rows)
+
+
+def property_key(database, name):
+    """Clave de propiedad a partir de la clave ('density') o del nombre visible"""
+    if name in database.properties:
+        return database.properties[name]
+    if name in database.store.property_keys:
+        return name
+    raise KeyError(f"Propiedad desconocida: {name!r} (válidas: {', '.join(database.store.property_keys)})")
+
+
+def parse_range(text):
+    """Convierte 'min:max' en (min, max); un extremo vacío no limita ('100:', ':5e3')"""
+    low, separator, high = text.partition(':')
+    if not separator:
+        raise ValueError(f"Rango no válido: {text!r} (usa 'min:max')")
+    return (float(low) if low.strip() else -math.inf, float(high) if high.strip() else math.inf)
+
+
+def resolve_index(database, index):
+    """Fórmula compilada para un índice de ``COMMON_INDICES`` o una fórmula libre
+
+    Raises:
+        FormulaError: si ``index`` no es un índice conocido ni una fórmula válida.
+    """
+    if index in COMMON_INDICES:
+        index = ratio_formula(COMMON_INDICES[index])
+    return compile_formula(index, database.store.property_keys)
+
+
+def select_materials(database, ranges=None, index=None, top=None, largest=True,
+                     objectives=None, dominance='surely'):
+    """Filtra, reduce a la frontera de Pareto y ordena por índice
+    
+    Args:
+        database: MaterialDatabase.
+        ranges: Rangos {clave: (mínimo, máximo)}, con el criterio de solapamiento
+            de ``MaterialFilter``.
+        index: Nombre de ``COMMON_INDICES`` o fórmula; sin índice se conserva el
+            orden del catálogo.
+        top: Número máximo de materiales.
+        largest: Si un valor mayor del índice es mejor.
+        objectives: Diccionario {clave: 'max' | 'min'}; si se indica, solo se
+            conservan los materiales de la frontera de Pareto.
+        dominance: Tipo de dominancia sobre los rangos (ver ``pareto.pareto_front``).
+    
+    Returns:
+        (filas, valores del índice o None, límites (mínimo, máximo) del índice o None)
+    """
+    store = database.store
+    rows = database.interval_index.query(dict(ranges or {}))
+    
+    if objectives:
+        keys = list(objectives)
+        lo = np.column_stack([store.mins[key][rows] for key in keys])
+        hi = np.column_stack([store.maxs[key][rows] for key in keys])
+        rows = rows[pareto_front(lo, hi, [objectives[key] for key in keys], dominance)]
+    
+    if index is None:
+        return (rows if top is None else rows[:top]), None, None
+    
+    formula = resolve_index(database, index)
+    values = formula.evaluate(store, rows)
+    best = top_k(values, len(rows) if top is None else top, largest)
+    rows, values = rows[best], values[best]
+    return rows, values, formula.evaluate_bounds(store, rows)
+
+
+def export_materials(database, rows, output, file_format='csv', values=None, bounds=None, columns=None):
+    """Exporta una selección con los nombres de columna de ``catalog_import``
+    
+    'name', 'family', 'color', el índice ('index', 'index_min', 'index_max')
+    si se calculó y '<clave>_min'/'<clave>_max' por propiedad, de modo que
+    el resultado puede volver a importarse como catálogo. ``columns`` limita
+    y ordena las columnas exportadas. La escritura es por tramos (ver
+    ``selection_export``); ``output`` es una ruta, '-' o un fichero binario.
+    """
+    extra = {}
+    if values is not None:
+        extra['index'] = values
+        extra['index_min'], extra['index_max'] = bounds
+    export_selection(database.store, rows, output, file_format, columns=columns, naming='keys', extra=extra)
@@ -0,0 +1,290 @@
+import itertools
+from collections import deque, namedtuple
+from collections.abc import Mapping
+
+import numpy as np
+
+# Cambio a nivel de fila: versión resultante, tipo ('insert' o 'update') y filas afectadas
+StoreChange = namedtuple('StoreChange', ['version', 'kind', 'rows'])
+
+_store_ids = itertools.count(1)
+
+
+def grow_buffer(buffer, size):
+    """Devuelve ``buffer`` o una copia ampliada con capacidad para ``size`` filas
+
+    La capacidad crece de forma geométrica, de modo que añadir filas de una en
+    una tiene coste amortizado constante.
+    """
+    if buffer is not None and len(buffer) >= size and buffer.flags.writeable:
+        return buffer
+    capacity = max(size, 2 * (len(buffer) if buffer is not None else 0), 16)
+    grown = np.empty((capacity,) + (buffer.shape[1:] if buffer is not None else ()),
+                     dtype=buffer.dtype if buffer is not None else np.float64)
+    if buffer is not None:
+        grown[:len(buffer)] = buffer
+    return grown
+
+
+class ColumnarMaterialStore:
+    """Almacenamiento columnar de la base de datos de materiales
+
+    Cada propiedad se guarda como dos arreglos contiguos float64 (mínimos y
+    máximos), con NaN cuando el material no define la propiedad. La familia y
+    el color se codifican como enteros sobre una lista de categorías.
+    """
+
+    # Número de cambios que se conservan en el registro
+    CHANGE_LOG_SIZE = 1024
+
+    def __init__(self, property_keys):
+        self.property_keys = tuple(property_keys)
+        # Identificador único en el proceso: id() puede reutilizarse al liberar el objeto
+        self.uid = next(_store_ids)
+        # Se incrementa con cada modificación; invalida las estructuras derivadas
+        self.version = 0
+        self.changes = deque(maxlen=self.CHANGE_LOG_SIZE)
+        self._buffers = {}
+        self.names = []
+        self.name_to_row = {}
+        self.families = []
+        self.colors = []
+        self.family_codes = np.empty(0, dtype=np.int32)
+        self.color_codes = np.empty(0, dtype=np.int32)
+        self.mins = {key: np.empty(0, dtype=np.float64) for key in self.property_keys}
+        self.maxs = {key: np.empty(0, dtype=np.float64) for key in self.property_keys}
+
+    @classmethod
+    def from_dict(cls, materials, property_keys):
+        """Construye el almacenamiento a partir del formato anidado de diccionarios"""
+        store = cls(property_keys)
+        n_rows = len(materials)
+
+        store.names = list(materials.keys())
+        store.name_to_row = {name: row for row, name in enumerate(store.names)}
+
+        family_lookup = {}
+        color_lookup = {}
+        family_codes = np.empty(n_rows, dtype=np.int32)
+        color_codes = np.empty(n_rows, dtype=np.int32)
+        mins = {key: np.full(n_rows, np.nan) for key in store.property_keys}
+        maxs = {key: np.full(n_rows, np.nan) for key in store.property_keys}
+
+        for row, props in enumerate(materials.values()):
+            family_codes[row] = family_lookup.setdefault(props['family'], len(family_lookup))
+            color_codes[row] = color_lookup.setdefault(props['color'], len(color_lookup))
+            for key in store.property_keys:
+                if key in props:
+                    mins[key][row], maxs[key][row] = props[key]
+
+        store.families = list(family_lookup)
+        store.colors = list(color_lookup)
+        store.family_codes = family_codes
+        store.color_codes = color_codes
+        store.mins = mins
+        store.maxs = maxs
+        return store
+
+    def concat(self, *others):
+        """Nuevo almacenamiento con las filas de ``others`` añadidas al final
+
+        Las categorías de familia y color se unifican y los códigos de cada
+        almacenamiento se recodifican. La versión del resultado es la
+        siguiente a la de este almacenamiento, para invalidar las estructuras
+        derivadas.
+        """
+        parts = (self,) + others
+        store = ColumnarMaterialStore(self.property_keys)
+        store.version = self.version + 1
+        store.names = [name for part in parts for name in part.names]
+        store.name_to_row = {name: row for row, name in enumerate(store.names)}
+
+        for codes_attr, values_attr in (('family_codes', 'families'), ('color_codes', 'colors')):
+            lookup = {}
+            codes = []
+            for part in parts:
+                remap = np.array(
+                    [lookup.setdefault(value, len(lookup)) for value in getattr(part, values_attr)],
+                    dtype=np.int32
+                )
+                codes.append(remap[getattr(part, codes_attr)] if len(remap) else np.empty(0, dtype=np.int32))
+            setattr(store, values_attr, list(lookup))
+            setattr(store, codes_attr, np.concatenate(codes).astype(np.int32, copy=False))
+
+        for key in self.property_keys:
+            store.mins[key] = np.concatenate([part.mins[key] for part in parts])
+            store.maxs[key] = np.concatenate([part.maxs[key] for part in parts])
+        return store
+
+    def changes_since(self, version):
+        """Cambios posteriores a ``version``, o None si ya no están en el registro
+
+        Las estructuras derivadas guardan la versión con la que se construyeron
+        y se ponen al día aplicando estos cambios; si el registro no alcanza
+        esa versión (o el almacenamiento se reemplazó) deben reconstruirse.
+        """
+        if version == self.version:
+            return []
+        if version > self.version or not self.changes or self.changes[0].version > version + 1:
+            return None
+        return [change for change in self.changes if change.version > version]
+
+    def _record_change(self, kind, rows):
+        self.version += 1
+        self.changes.append(StoreChange(self.version, kind, np.asarray(rows, dtype=np.intp)))
+
+    def _writable_columns(self, size):
+        """Columnas con capacidad para ``size`` filas, expuestas como vistas de longitud exacta"""
+        columns = [('family_codes', None), ('color_codes', None)]
+        columns += [('mins', key) for key in self.property_keys]
+        columns += [('maxs', key) for key in self.property_keys]
+        for attr, key in columns:
+            current = getattr(self, attr) if key is None else getattr(self, attr)[key]
+            buffer = self._buffers.get((attr, key))
+            # Las columnas ajenas a los búferes (p. ej. mapeadas de disco) se copian al primer cambio
+            if buffer is None or current.base is not buffer:
+                buffer = np.array(current)
+            buffer = grow_buffer(buffer, size)
+            self._buffers[(attr, key)] = buffer
+            if key is None:
+                setattr(self, attr, buffer[:size])
+            else:
+                getattr(self, attr)[key] = buffer[:size]
+
+    def _category_codes(self, values_attr, values):
+        categories = getattr(self, values_attr)
+        lookup = {value: code for code, value in enumerate(categories)}
+        codes = []
+        for value in values:
+            if value not in lookup:
+                lookup[value] = len(categories)
+                categories.append(value)
+            codes.append(lookup[value])
+        return np.array(codes, dtype=np.int32)
+
+    def append_store(self, other):
+        """Añade al final las filas de otro almacenamiento y registra el cambio
+
+        Devuelve las nuevas filas. Los nombres ya existentes se rechazan.
+        """
+        repeated = [name for name in other.names if name in self.name_to_row]
+        if repeated:
+            raise ValueError(f"Materiales ya existentes: {', '.join(map(str, repeated[:5]))}")
+
+        start, end = len(self), len(self) + len(other)
+        family_remap = self._category_codes('families', other.families)
+        color_remap = self._category_codes('colors', other.colors)
+        self._writable_columns(end)
+        if len(other):
+            self.family_codes[start:end] = family_remap[other.family_codes]
+            self.color_codes[start:end] = color_remap[other.color_codes]
+        for key in self.property_keys:
+            self.mins[key][start:end] = other.mins[key]
+            self.maxs[key][start:end] = other.maxs[key]
+
+        if not isinstance(self.name_to_row, dict):
+            self.name_to_row = dict(self.name_to_row)
+        self.names = list(self.names) if not isinstance(self.names, list) else self.names
+        for row, name in enumerate(other.names, start):
+            self.name_to_row[name] = row
+        self.names.extend(other.names)
+
+        rows = np.arange(start, end, dtype=np.intp)
+        self._record_change('insert', rows)
+        return rows
+
+    def append_records(self, materials):
+        """Añade materiales en el formato anidado de diccionarios; devuelve sus filas"""
+        return self.append_store(ColumnarMaterialStore.from_dict(materials, self.property_keys))
+
+    def update_record(self, name, data):
+        """Reemplaza familia, color y rangos de un material existente"""
+        row = self.name_to_row[name]
+        self._writable_columns(len(self))
+        self.family_codes[row] = self._category_codes('families', [data['family']])[0]
+        self.color_codes[row] = self._category_codes('colors', [data['color']])[0]
+        for key in self.property_keys:
+            self.mins[key][row], self.maxs[key][row] = data.get(key, (np.nan, np.nan))
+        self._record_change('update', [row])
+        return row
+
+    def __len__(self):
+        return len(self.names)
+
+    def has_property(self, key):
+        """Máscara booleana de los materiales que definen la propiedad"""
+        return ~np.isnan(self.mins[key])
+
+    def family_of(self, row):
+        return self.families[self.family_codes[row]]
+
+    def color_of(self, row):
+        return self.colors[self.color_codes[row]]
+
+    def record(self, row):
+        """Materializa una fila en el formato clásico de diccionario"""
+        data = {'family': self.family_of(row), 'color': self.color_of(row)}
+        for key in self.property_keys:
+            min_val = self.mins[key][row]
+            if not np.isnan(min_val):
+                data[key] = [float(min_val), float(self.maxs[key][row])]
+        return data
+
+    def records(self, rows=None):
+        """Vista perezosa tipo diccionario sobre todas las filas o un subconjunto"""
+        return MaterialRecordsView(self, rows)
+
+
+def resolve_records(materials, store):
+    """Obtiene (almacenamiento, filas) para una vista o un dict de materiales
+
+    Las vistas sobre ``store`` se resuelven sin copiar; un diccionario anidado
+    arbitrario se convierte a un almacenamiento columnar temporal.
+    """
+    if materials is None:
+        return store, np.arange(len(store), dtype=np.intp)
+    if isinstance(materials, MaterialRecordsView):
+        return materials.store, materials.rows
+    temporary = ColumnarMaterialStore.from_dict(materials, store.property_keys)
+    return temporary, np.arange(len(temporary), dtype=np.intp)
+
+
+class MaterialRecordsView(Mapping):
+    """Adaptador de solo lectura que expone el almacenamiento como dict de dicts
+
+    Los diccionarios de cada material se construyen al acceder a ellos, de modo
+    que el código que recorre ``database.materials`` sigue funcionando sin
+    mantener una copia anidada de toda la base de datos.
+    """
+
+    def __init__(self, store, rows=None):
+        self.store = store
+        if rows is None:
+            rows = np.arange(len(store), dtype=np.intp)
+        self.rows = np.asarray(rows, dtype=np.intp)
+        # Máscara de pertenencia por fila, creada en la primera consulta
+        self._member = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        names = self.store.names
+        for row in self.rows:
+            yield names[row]
+
+    def __contains__(self, name):
+        row = self.store.name_to_row.get(name)
+        if row is None:
+            return False
+        if self._member is None:
+            member = np.zeros(len(self.store), dtype=bool)
+            member[self.rows] = True
+            self._member = member
+        # Las filas añadidas al almacenamiento después de crear la vista no forman parte de ella
+        return row < len(self._member) and bool(self._member[row])
+
+    def __getitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        return self.store.record(self.store.name_to_row[name])
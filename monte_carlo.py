@@ -0,0 +1,124 @@
+import numpy as np
+
+from multi_criteria import normalize_criteria
+
+
+def sample_ranges(lo, hi, n_samples, rng, distribution='uniform'):
+    """Muestras (n_samples, n_materiales) dentro de los rangos [lo, hi]
+
+    Con ``distribution='log-uniform'`` el logaritmo del valor es uniforme;
+    los rangos que no son estrictamente positivos se muestrean de forma
+    uniforme. Los rangos NaN producen muestras NaN.
+    """
+    if distribution not in ('uniform', 'log-uniform'):
+        raise ValueError(f"Distribución no válida: {distribution!r} (usa 'uniform' o 'log-uniform')")
+    u = rng.random((n_samples, len(lo)))
+    if distribution == 'uniform':
+        return lo + u * (hi - lo)
+
+    positive = lo > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_lo, log_hi = np.log(lo), np.log(hi)
+        return np.where(positive, np.exp(log_lo + u * (log_hi - log_lo)), lo + u * (hi - lo))
+
+
+def formula_score(formula):
+    """Función de puntuación a partir de una fórmula compilada (``compile_formula``)"""
+    def score(columns):
+        return formula.evaluate_columns(columns)
+    score.properties = formula.properties
+    return score
+
+
+def weighted_score(formulas, weights, higher_is_better=None):
+    """Función de puntuación multi-criterio: media ponderada de criterios normalizados
+
+    Cada muestra se normaliza por separado sobre todos los materiales, igual
+    que ``multi_criteria.normalize_criteria`` con los valores medios.
+    """
+    weights = np.asarray(weights, dtype=float)
+
+    def score(columns):
+        values = np.stack([formula.evaluate_columns(columns) for formula in formulas], axis=-1)
+        n_samples, n_materials, n_criteria = values.shape
+        normalized = normalize_criteria(
+            values.transpose(1, 0, 2).reshape(n_materials, n_samples * n_criteria),
+            np.tile(np.ones(n_criteria, dtype=bool) if higher_is_better is None else higher_is_better, n_samples)
+        ).reshape(n_materials, n_samples, n_criteria).transpose(1, 0, 2)
+        defined = ~np.isnan(normalized)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(defined, normalized, 0.0) @ weights / (defined @ weights)
+
+    score.properties = frozenset().union(*(formula.properties for formula in formulas))
+    return score
+
+
+def monte_carlo_ranking(store, rows, score_fn, n_samples=1000, top_k=5, distribution='uniform',
+                        largest=True, chunk_size=None, seed=None):
+    """Probabilidad de que cada material quede primero o entre los k primeros
+
+    En cada muestra se toma un valor de cada propiedad dentro del rango de
+    cada material, se evalúa ``score_fn`` y se clasifican los materiales. Las
+    muestras se procesan por tramos de tamaño fijo, de modo que la memoria no
+    depende de ``n_samples``.
+
+    Args:
+        store, rows: Almacenamiento columnar y filas a clasificar.
+        score_fn: Función {clave: arreglo (muestras, materiales)} -> puntuación
+            de la misma forma, con atributo ``properties`` (ver
+            ``formula_score`` y ``weighted_score``).
+        n_samples: Número total de muestras.
+        top_k: Tamaño del grupo de cabeza.
+        distribution: 'uniform' o 'log-uniform'.
+        largest: True si una puntuación mayor es mejor.
+        chunk_size: Muestras por tramo; por defecto unos 4 millones de valores
+            por propiedad y tramo.
+        seed: Semilla del generador aleatorio. Cada propiedad usa su propio
+            flujo, derivado de la semilla en orden de clave, de modo que el
+            resultado no depende del proceso ni de ``chunk_size``.
+
+    Returns:
+        Diccionario de arreglos alineados con ``rows``: 'first_probability',
+        'top_k_probability' y 'mean_score' (media de las puntuaciones válidas).
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    n_materials = len(rows)
+    top_k = min(top_k, n_materials)
+    if chunk_size is None:
+        chunk_size = max(1, 4_000_000 // max(n_materials, 1))
+    # ``properties`` es un conjunto: su orden cambia entre procesos
+    keys = sorted(score_fn.properties)
+    generators = dict(zip(keys, map(np.random.default_rng, np.random.SeedSequence(seed).spawn(len(keys)))))
+
+    bounds = {key: (store.mins[key][rows], store.maxs[key][rows]) for key in keys}
+    first_counts = np.zeros(n_materials, dtype=np.int64)
+    top_counts = np.zeros(n_materials, dtype=np.int64)
+    score_sum = np.zeros(n_materials)
+    score_count = np.zeros(n_materials, dtype=np.int64)
+
+    for start in range(0, n_samples if n_materials else 0, chunk_size):
+        size = min(chunk_size, n_samples - start)
+        columns = {key: sample_ranges(lo, hi, size, generators[key], distribution) for key, (lo, hi) in bounds.items()}
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            scores = np.broadcast_to(score_fn(columns), (size, n_materials))
+
+        valid = np.isfinite(scores)
+        score_sum += np.where(valid, scores, 0.0).sum(axis=0)
+        score_count += valid.sum(axis=0)
+
+        # Los valores no válidos nunca entran en el ranking
+        oriented = np.where(valid, -scores if largest else scores, np.inf)
+        ranked = valid.any(axis=1)
+        first_counts += np.bincount(np.argmin(oriented, axis=1)[ranked], minlength=n_materials)
+        if top_k:
+            head = np.argpartition(oriented, top_k - 1, axis=1)[:, :top_k]
+            head = head[np.take_along_axis(valid, head, axis=1)]
+            top_counts += np.bincount(head, minlength=n_materials)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_score = score_sum / score_count
+    return {
+        'first_probability': first_counts / max(n_samples, 1),
+        'top_k_probability': top_counts / max(n_samples, 1),
+        'mean_score': mean_score
+    }
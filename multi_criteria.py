@@ -0,0 +1,152 @@
+import numpy as np
+
+from performance_indices import compile_formula
+
+
+def normalize_criteria(values, higher_is_better=None):
+    """Normaliza cada columna de criterios a [0, 1] (1 = mejor material)
+
+    Args:
+        values: Arreglo (n_materiales, n_criterios); NaN si el criterio no se
+            puede evaluar para el material.
+        higher_is_better: Booleano por criterio (por defecto todos True).
+
+    Returns:
+        Arreglo de la misma forma con NaN en los valores no definidos. Una
+        columna sin variación se normaliza a 1.
+    """
+    values = np.asarray(values, dtype=float)
+    values = np.where(np.isfinite(values), values, np.nan)
+    if higher_is_better is None:
+        higher_is_better = np.ones(values.shape[1], dtype=bool)
+
+    defined = ~np.isnan(values)
+    if not len(values):
+        return values
+
+    low = np.where(defined, values, np.inf).min(axis=0)
+    span = np.where(defined, values, -np.inf).max(axis=0) - low
+    with np.errstate(invalid='ignore'):
+        normalized = np.where(span > 0, (values - low) / np.where(span > 0, span, 1), 1.0)
+    normalized = np.where(np.asarray(higher_is_better, dtype=bool), normalized, 1 - normalized)
+    normalized[~defined] = np.nan
+    return normalized
+
+
+def weighted_scores(normalized, weights):
+    """Puntuaciones ponderadas como producto matricial
+
+    ``weights`` puede ser un vector (n_criterios,) o un lote de vectores
+    (n_pesos, n_criterios). Los criterios no definidos para un material se
+    excluyen y sus pesos se reparten entre los demás. Devuelve (n_materiales,)
+    o (n_pesos, n_materiales); NaN si el material no tiene ningún criterio
+    con peso.
+    """
+    weights = np.asarray(weights, dtype=float)
+    defined = ~np.isnan(normalized)
+    filled = np.where(defined, normalized, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scores = (weights @ filled.T) / (weights @ defined.T.astype(float))
+    return scores
+
+
+def sample_simplex(n_criteria, n_samples, seed=None):
+    """Vectores de pesos uniformes sobre el símplex (suman 1), forma (n_samples, n_criteria)"""
+    rng = np.random.default_rng(seed)
+    return rng.dirichlet(np.ones(n_criteria), size=n_samples)
+
+
+def weight_sensitivity(normalized, weight_batch, top_n=5, chunk_size=None):
+    """Estabilidad del ranking frente a un lote de vectores de pesos
+
+    Las puntuaciones de cada tramo de pesos se calculan con un único producto
+    matricial; el tamaño del tramo limita la memoria a unos pocos millones de
+    puntuaciones a la vez.
+
+    Returns:
+        Diccionario de arreglos por material: 'mean_rank', 'std_rank',
+        'best_rank', 'worst_rank' (1 = primero), 'top_n_frequency' (fracción
+        de vectores de pesos en los que queda entre los ``top_n`` primeros) y
+        'first_frequency'. Los materiales sin puntuación quedan al final del
+        ranking de cada vector.
+    """
+    normalized = np.asarray(normalized, dtype=float)
+    weight_batch = np.atleast_2d(np.asarray(weight_batch, dtype=float))
+    n_materials, n_weights = normalized.shape[0], len(weight_batch)
+    top_n = min(top_n, n_materials)
+    if chunk_size is None:
+        chunk_size = max(1, 4_000_000 // max(n_materials, 1))
+
+    rank_sum = np.zeros(n_materials)
+    rank_sq_sum = np.zeros(n_materials)
+    best_rank = np.full(n_materials, n_materials, dtype=np.int64)
+    worst_rank = np.ones(n_materials, dtype=np.int64)
+    top_counts = np.zeros(n_materials, dtype=np.int64)
+    first_counts = np.zeros(n_materials, dtype=np.int64)
+    positions = np.arange(1, n_materials + 1)
+
+    for start in range(0, n_weights, chunk_size):
+        scores = weighted_scores(normalized, weight_batch[start:start + chunk_size])
+        scores = np.where(np.isnan(scores), -np.inf, scores)
+
+        order = np.argsort(-scores, axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, positions[None, :], axis=1)
+
+        rank_sum += ranks.sum(axis=0)
+        rank_sq_sum += (ranks.astype(float) ** 2).sum(axis=0)
+        best_rank = np.minimum(best_rank, ranks.min(axis=0))
+        worst_rank = np.maximum(worst_rank, ranks.max(axis=0))
+        top_counts += np.bincount(order[:, :top_n].ravel(), minlength=n_materials)
+        first_counts += np.bincount(order[:, 0], minlength=n_materials)
+
+    mean_rank = rank_sum / n_weights
+    return {
+        'mean_rank': mean_rank,
+        'std_rank': np.sqrt(np.maximum(rank_sq_sum / n_weights - mean_rank ** 2, 0.0)),
+        'best_rank': best_rank,
+        'worst_rank': worst_rank,
+        'top_n_frequency': top_counts / n_weights,
+        'first_frequency': first_counts / n_weights
+    }
+
+
+def criteria_matrix(store, rows, criteria):
+    """Valores de los criterios para las filas indicadas, uno por columna
+
+    ``criteria`` es una lista de definiciones con 'formula' y
+    'higher_is_better' (como ``integration_example.CUSTOM_PERFORMANCE_INDICES``).
+
+    Returns:
+        (arreglo (n_materiales, n_criterios), lista higher_is_better)
+    """
+    columns = [compile_formula(criterion['formula'], store.property_keys).evaluate(store, rows)
+               for criterion in criteria]
+    values = np.column_stack(columns) if columns else np.empty((len(rows), 0))
+    return values, [criterion['higher_is_better'] for criterion in criteria]
+
+
+def multi_criteria_scores(store, rows, criteria, weights, weight_batch=None, top_n=5):
+    """Puntuación multi-criterio de las filas indicadas y, opcionalmente, su sensibilidad
+
+    Cada criterio se normaliza a [0, 1] y la puntuación es la media ponderada
+    de los criterios definidos para el material (``weighted_scores``).
+
+    Args:
+        store: ColumnarMaterialStore.
+        rows: Filas a puntuar.
+        criteria: Definiciones de los criterios (ver ``criteria_matrix``).
+        weights: Peso de cada criterio, en el orden de ``criteria``.
+        weight_batch: Lote (n_pesos, n_criterios) para ``weight_sensitivity``.
+        top_n: Tamaño del grupo de cabeza para la frecuencia de top-N.
+
+    Returns:
+        (puntuaciones (n_materiales,), resultado de ``weight_sensitivity`` o None)
+    """
+    values, higher_is_better = criteria_matrix(store, rows, criteria)
+    normalized = normalize_criteria(values, higher_is_better)
+    scores = weighted_scores(normalized, weights)
+    sensitivity = None
+    if weight_batch is not None:
+        sensitivity = weight_sensitivity(normalized, weight_batch, top_n=top_n)
+    return scores, sensitivity
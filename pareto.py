@@ -0,0 +1,218 @@
+import numpy as np
+
+
+def _oriented(values, direction):
+    """Convierte los valores para que siempre 'mayor es mejor'"""
+    if direction not in ('max', 'min'):
+        raise ValueError(f"Dirección de optimización no válida: {direction!r} (usa 'max' o 'min')")
+    values = np.asarray(values, dtype=float)
+    return values if direction == 'max' else -values
+
+
+def pareto_front_2d(x, y, x_direction='max', y_direction='max'):
+    """Frontera de Pareto exacta en 2-D mediante ordenación y barrido, O(n log n)
+
+    Args:
+        x, y: Valores de los dos objetivos para cada punto.
+        x_direction, y_direction: 'max' para maximizar el objetivo o 'min'
+            para minimizarlo.
+
+    Returns:
+        Índices de los puntos no dominados, ordenados por x creciente. Los
+        puntos con algún valor NaN se ignoran.
+    """
+    x_oriented = _oriented(x, x_direction)
+    y_oriented = _oriented(y, y_direction)
+
+    candidates = np.flatnonzero(~(np.isnan(x_oriented) | np.isnan(y_oriented)))
+    if not len(candidates):
+        return candidates
+
+    # Recorrer de mejor a peor x (y de mejor a peor y en caso de empate). Un
+    # punto es óptimo si tiene la mejor y de su grupo de x iguales y mejora
+    # estrictamente la mejor y de los puntos con x estrictamente mejor; los
+    # puntos idénticos no se dominan entre sí y se conservan todos
+    order = candidates[np.lexsort((-y_oriented[candidates], -x_oriented[candidates]))]
+    x_sorted, y_sorted = x_oriented[order], y_oriented[order]
+    new_group = np.r_[True, x_sorted[1:] != x_sorted[:-1]]
+    starts = np.flatnonzero(new_group)
+    group = np.cumsum(new_group) - 1
+    # Mejor y de los grupos anteriores a cada punto (el primer grupo no tiene)
+    best_before = np.r_[-np.inf, np.maximum.accumulate(y_sorted)[starts[1:] - 1]][group]
+    on_front = (y_sorted == y_sorted[starts][group]) & ((group == 0) | (y_sorted > best_before))
+
+    front = order[on_front]
+    return front[np.argsort(np.asarray(x, dtype=float)[front], kind='stable')]
+
+
+def _dominates(a, b):
+    """Matriz (len(a), len(b)): a[i] domina a b[j] (>= en todo y > en algún objetivo)"""
+    matrix = a[:, None, 0] >= b[None, :, 0]
+    for column in range(1, a.shape[1]):
+        matrix &= a[:, None, column] >= b[None, :, column]
+    # La condición estricta solo se comprueba en los pocos pares que cumplen >=
+    i, j = np.nonzero(matrix)
+    matrix[i, j] = np.any(a[i] > b[j], axis=1)
+    return matrix
+
+
+def _dominated_by_any(candidates, references, chunk_size=64, candidate_ids=None, reference_ids=None):
+    """Máscara de los candidatos dominados por al menos una referencia
+
+    Las referencias se recorren por tramos y solo se siguen comprobando los
+    candidatos que aún no han sido dominados; con las referencias más fuertes
+    al principio, la mayoría de los candidatos se descarta en el primer tramo.
+    Si se indican identificadores, se ignoran los pares con el mismo id.
+    """
+    dominated = np.zeros(len(candidates), dtype=bool)
+    alive = np.arange(len(candidates))
+    for start in range(0, len(references), chunk_size):
+        if not len(alive):
+            break
+        matrix = _dominates(references[start:start + chunk_size], candidates[alive])
+        if candidate_ids is not None:
+            matrix &= reference_ids[start:start + chunk_size, None] != candidate_ids[alive][None, :]
+        hit = matrix.any(axis=0)
+        dominated[alive[hit]] = True
+        alive = alive[~hit]
+    return dominated
+
+
+def skyline_mask(points, block_size=1024):
+    """Máscara de los puntos no dominados (maximizando todas las columnas)
+
+    Implementa Sort-Filter-Skyline por bloques: los puntos se ordenan por la
+    suma de sus rangos por columna, de modo que ningún punto puede ser
+    dominado por otro que aparezca después. Cada bloque se compara de forma
+    vectorizada con la ventana de puntos ya aceptados y consigo mismo, y los
+    supervivientes pasan directamente a la frontera. El coste es O(n·s·d) en
+    el peor caso, con s el tamaño de la frontera, en lugar de O(n²·d).
+    """
+    points = np.asarray(points, dtype=float)
+    n_points = len(points)
+    mask = np.zeros(n_points, dtype=bool)
+    if not n_points:
+        return mask
+
+    # Rangos densos por columna: dominar implica una suma de rangos estrictamente mayor
+    ranks = np.column_stack([
+        np.unique(points[:, column], return_inverse=True)[1].ravel()
+        for column in range(points.shape[1])
+    ])
+    order = np.argsort(-ranks.sum(axis=1), kind='stable')
+
+    window = np.empty((0, points.shape[1]))
+    for start in range(0, n_points, block_size):
+        block_rows = order[start:start + block_size]
+        block = points[block_rows]
+
+        keep = np.flatnonzero(~_dominated_by_any(block, window))
+        keep = keep[~_dominated_by_any(block[keep], block[keep])]
+
+        mask[block_rows[keep]] = True
+        window = np.vstack([window, block[keep]])
+
+    return mask
+
+
+def _orient_intervals(lo, hi, directions):
+    """Extremos (mejor, peor) de cada rango con todos los objetivos a maximizar"""
+    lo = np.asarray(lo, dtype=float)
+    hi = lo if hi is None else np.asarray(hi, dtype=float)
+    if directions is None:
+        directions = ['max'] * lo.shape[1]
+
+    best = np.empty_like(lo)
+    worst = np.empty_like(lo)
+    for column, direction in enumerate(directions):
+        low, high = _oriented(lo[:, column], direction), _oriented(hi[:, column], direction)
+        best[:, column] = np.maximum(low, high)
+        worst[:, column] = np.minimum(low, high)
+    return best, worst
+
+
+def _interval_front(best, worst, dominance, block_size):
+    """Máscara de la frontera para dominancia 'point', 'surely' o 'possibly'"""
+    if dominance == 'point':
+        return skyline_mask(best, block_size)
+    if dominance == 'surely':
+        # a domina con seguridad a b si el peor caso de a supera al mejor de b
+        queries, references = best, worst
+    elif dominance == 'possibly':
+        # a puede dominar a b si el mejor caso de a supera al peor de b
+        queries, references = worst, best
+    else:
+        raise ValueError(f"Tipo de dominancia no válido: {dominance!r}")
+
+    # Si alguna referencia domina a una consulta, también lo hace alguna
+    # referencia de su frontera; basta comparar contra la frontera
+    n_rows = len(queries)
+    row_ids = np.arange(n_rows)
+    reference_front = np.flatnonzero(skyline_mask(references, block_size))
+    dominated = _dominated_by_any(
+        queries, references[reference_front],
+        candidate_ids=row_ids, reference_ids=reference_front
+    )
+
+    # Una fila cuya propia referencia está en la frontera y la domina puede
+    # ocultar a otras referencias que también la dominan; esas quedan en la
+    # segunda capa de referencias, contra la que se comprueban estas filas
+    in_front = np.zeros(n_rows, dtype=bool)
+    in_front[reference_front] = True
+    own_dominates = np.all(references >= queries, axis=1) & np.any(references > queries, axis=1)
+    pending = np.flatnonzero(~dominated & in_front & own_dominates)
+    if len(pending):
+        rest = np.flatnonzero(~in_front)
+        second_layer = rest[skyline_mask(references[rest], block_size)]
+        dominated[pending] = _dominated_by_any(queries[pending], references[second_layer])
+
+    return ~dominated
+
+
+def pareto_front(lo, hi=None, directions=None, dominance='point', block_size=1024):
+    """Frontera de Pareto con N objetivos, opcionalmente sobre rangos [min, max]
+
+    Args:
+        lo, hi: Arreglos (n, d) con los extremos de cada objetivo; si ``hi``
+            es None los valores se tratan como puntos.
+        directions: 'max' o 'min' por objetivo (por defecto todos 'max').
+        dominance: 'point' compara los extremos optimistas; 'surely' conserva
+            los materiales que ningún otro domina con seguridad (el peor caso
+            del otro supera a su mejor caso); 'possibly' conserva solo los que
+            ningún otro puede dominar (el mejor caso del otro no alcanza a su
+            peor caso).
+
+    Returns:
+        Índices crecientes de los materiales en la frontera. Las filas con
+        algún NaN se ignoran.
+    """
+    best, worst = _orient_intervals(lo, hi, directions)
+    valid = np.flatnonzero(~(np.isnan(best).any(axis=1) | np.isnan(worst).any(axis=1)))
+    return valid[_interval_front(best[valid], worst[valid], dominance, block_size)]
+
+
+def pareto_layers(lo, hi=None, directions=None, dominance='point', max_layers=None, block_size=1024):
+    """Ranking por capas de Pareto (1 = frontera, 2 = frontera del resto, ...)
+
+    Devuelve un arreglo de enteros por fila; 0 para las filas con NaN. Si se
+    indica ``max_layers``, las filas no clasificadas reciben ``max_layers + 1``.
+    """
+    best, worst = _orient_intervals(lo, hi, directions)
+    layers = np.zeros(len(best), dtype=np.int64)
+    remaining = np.flatnonzero(~(np.isnan(best).any(axis=1) | np.isnan(worst).any(axis=1)))
+
+    layer = 1
+    while len(remaining):
+        if max_layers is not None and layer > max_layers:
+            layers[remaining] = max_layers + 1
+            break
+        front = _interval_front(best[remaining], worst[remaining], dominance, block_size)
+        if not front.any():
+            # Con dominancia 'possibly' puede no existir ningún material no dominado
+            layers[remaining] = layer
+            break
+        layers[remaining[front]] = layer
+        remaining = remaining[~front]
+        layer += 1
+
+    return layers
@@ -0,0 +1,301 @@
+import ast
+import functools
+
+import numpy as np
+
+
+# Índices de rendimiento habituales: numerador^numerator_exponent / denominador^denominator_exponent,
+# con la pendiente de su línea en un gráfico log-log (denominator_exponent / numerator_exponent)
+COMMON_INDICES = {
+    'E/ρ (Rigidez específica)': {'numerator': 'young_modulus', 'denominator': 'density', 'slope': 1,
+                                 'numerator_exponent': 1, 'denominator_exponent': 1},
+    'E^(1/2)/ρ (Rigidez específica optimizada)': {'numerator': 'young_modulus', 'denominator': 'density', 'slope': 2,
+                                                  'numerator_exponent': 1/2, 'denominator_exponent': 1},
+    'σy/ρ (Resistencia específica)': {'numerator': 'yield_strength', 'denominator': 'density', 'slope': 1,
+                                      'numerator_exponent': 1, 'denominator_exponent': 1},
+    'E/ρ² (Placas en flexión)': {'numerator': 'young_modulus', 'denominator': 'density', 'slope': 2,
+                                 'numerator_exponent': 1, 'denominator_exponent': 2},
+    'E^(1/3)/ρ (Barras en compresión)': {'numerator': 'young_modulus', 'denominator': 'density', 'slope': 3,
+                                         'numerator_exponent': 1/3, 'denominator_exponent': 1},
+    'KIC/ρ (Tenacidad específica)': {'numerator': 'fracture_toughness', 'denominator': 'density', 'slope': 1,
+                                     'numerator_exponent': 1, 'denominator_exponent': 1}
+}
+
+
+# Aritmética de intervalos vectorizada: cada operando es un par (lo, hi) de
+# arreglos y el resultado son los extremos exactos de la operación sobre todo
+# el rango. Los resultados indefinidos (p. ej. dividir por un rango que
+# contiene el cero) se devuelven como NaN.
+
+def interval_add(a, b):
+    return a[0] + b[0], a[1] + b[1]
+
+
+def interval_sub(a, b):
+    return a[0] - b[1], a[1] - b[0]
+
+
+def interval_mul(a, b):
+    products = np.stack([a[0] * b[0], a[0] * b[1], a[1] * b[0], a[1] * b[1]])
+    return products.min(axis=0), products.max(axis=0)
+
+
+def interval_div(a, b):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spans_zero = (b[0] <= 0) & (b[1] >= 0)
+        inverse = (np.where(spans_zero, np.nan, 1 / b[1]), np.where(spans_zero, np.nan, 1 / b[0]))
+        return interval_mul(a, inverse)
+
+
+def interval_neg(a):
+    return -a[1], -a[0]
+
+
+def interval_pow(a, exponent):
+    """Potencia con exponente constante; NaN si la base negativa no admite el exponente"""
+    lo, hi = a
+    with np.errstate(divide='ignore', invalid='ignore'):
+        low_power, high_power = np.power(lo, exponent), np.power(hi, exponent)
+        result_lo = np.minimum(low_power, high_power)
+        result_hi = np.maximum(low_power, high_power)
+        # Exponentes pares positivos: el mínimo es 0 si el rango contiene el cero
+        if float(exponent).is_integer() and exponent > 0 and exponent % 2 == 0:
+            result_lo = np.where((lo < 0) & (hi > 0), 0.0, result_lo)
+        if exponent < 0:
+            spans_zero = (lo <= 0) & (hi >= 0)
+            result_lo = np.where(spans_zero, np.nan, result_lo)
+            result_hi = np.where(spans_zero, np.nan, result_hi)
+    return result_lo, result_hi
+
+
+def index_slope(index_config):
+    """Pendiente en log-log de las líneas de índice constante
+
+    M = N^a / D^b constante equivale a log N = (b/a)·log D + log(M)/a, así que
+    con el numerador en el eje Y y el denominador en el eje X la pendiente es
+    b/a y los materiales por encima de la línea tienen un índice mayor. Sin
+    exponentes se usa la clave 'slope'.
+    """
+    if 'numerator_exponent' in index_config or 'denominator_exponent' in index_config:
+        return index_config.get('denominator_exponent', 1) / index_config.get('numerator_exponent', 1)
+    return index_config['slope']
+
+
+def evaluate_ratio_index(store, rows, index_config):
+    """Evalúa un índice numerador^a / denominador^b sobre columnas completas
+
+    ``index_config`` sigue el formato de ``PerformanceIndexTool.common_indices``
+    (claves 'numerator', 'denominator' y los exponentes opcionales
+    'numerator_exponent' y 'denominator_exponent', por defecto 1).
+
+    Returns:
+        (valor, mínimo, máximo): el valor se calcula con la media de cada
+        rango y los extremos son los límites exactos del índice sobre los
+        rangos de ambas propiedades.
+    """
+    numerator, denominator = index_config['numerator'], index_config['denominator']
+    numerator_exponent = index_config.get('numerator_exponent', 1)
+    denominator_exponent = index_config.get('denominator_exponent', 1)
+
+    num_range = (store.mins[numerator][rows], store.maxs[numerator][rows])
+    den_range = (store.mins[denominator][rows], store.maxs[denominator][rows])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = (
+            np.power(0.5 * (num_range[0] + num_range[1]), numerator_exponent)
+            / np.power(0.5 * (den_range[0] + den_range[1]), denominator_exponent)
+        )
+    low, high = interval_div(
+        interval_pow(num_range, numerator_exponent),
+        interval_pow(den_range, denominator_exponent)
+    )
+    return value, low, high
+
+
+def ratio_formula(index_config):
+    """Texto de fórmula equivalente a un índice numerador^a / denominador^b"""
+    return (
+        f"{index_config['numerator']} ** {float(index_config.get('numerator_exponent', 1))!r}"
+        f" / {index_config['denominator']} ** {float(index_config.get('denominator_exponent', 1))!r}"
+    )
+
+
+def evaluate_indices(store, rows, index_configs):
+    """Evalúa varios índices a la vez y devuelve un resultado columnar
+
+    Returns:
+        Diccionario {nombre del índice: (valor, mínimo, máximo)} con un
+        arreglo por columna, alineado con ``rows``.
+    """
+    return {
+        label: evaluate_ratio_index(store, rows, config)
+        for label, config in index_configs.items()
+    }
+
+
+class FormulaError(ValueError):
+    """Fórmula de índice con sintaxis no válida o elementos no permitidos"""
+
+
+class CompiledFormula:
+    """Fórmula de índice compilada a funciones vectorizadas de valor e intervalo"""
+
+    def __init__(self, expression, properties, point_fn, interval_fn):
+        self.expression = expression
+        self.properties = properties
+        self._point_fn = point_fn
+        self._interval_fn = interval_fn
+
+    def evaluate(self, store, rows):
+        """Valor del índice con la media de cada rango, para las filas indicadas"""
+        columns = {
+            key: 0.5 * (store.mins[key][rows] + store.maxs[key][rows])
+            for key in self.properties
+        }
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            value = self._point_fn(columns)
+        # Las fórmulas constantes se amplían a una columna por fila
+        return np.broadcast_to(value, np.shape(rows)).astype(float)
+
+    def evaluate_columns(self, columns):
+        """Evalúa la fórmula sobre arreglos de valores {clave: arreglo} de cualquier forma"""
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            return self._point_fn(columns)
+
+    def evaluate_bounds(self, store, rows):
+        """Límites (mínimo, máximo) exactos del índice sobre los rangos de las propiedades"""
+        bounds = {key: (store.mins[key][rows], store.maxs[key][rows]) for key in self.properties}
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            low, high = self._interval_fn(bounds)
+        shape = np.shape(rows)
+        return np.broadcast_to(low, shape).astype(float), np.broadcast_to(high, shape).astype(float)
+
+
+_BINARY_OPERATORS = {
+    ast.Add: (np.add, interval_add),
+    ast.Sub: (np.subtract, interval_sub),
+    ast.Mult: (np.multiply, interval_mul),
+    ast.Div: (np.divide, interval_div),
+}
+
+
+def _compile_node(node, property_keys, used):
+    """Convierte un nodo del AST en un par (función de valor, función de intervalo)"""
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, property_keys, used)
+
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        try:
+            value = float(node.value)
+        except OverflowError:
+            raise FormulaError(f"Constante numérica fuera de rango: {str(node.value)[:20]}...") from None
+        if not np.isfinite(value):
+            raise FormulaError("Constante numérica fuera de rango")
+        return (lambda columns: value), (lambda bounds: (value, value))
+
+    if isinstance(node, ast.Name):
+        if node.id not in property_keys:
+            raise FormulaError(
+                f"Propiedad desconocida: '{node.id}'. Disponibles: {', '.join(property_keys)}"
+            )
+        key = node.id
+        used.add(key)
+        return (lambda columns: columns[key]), (lambda bounds: bounds[key])
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        point, interval = _compile_node(node.operand, property_keys, used)
+        if isinstance(node.op, ast.UAdd):
+            return point, interval
+        return (lambda columns: -point(columns)), (lambda bounds: interval_neg(interval(bounds)))
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left_point, left_interval = _compile_node(node.left, property_keys, used)
+        right_point, right_interval = _compile_node(node.right, property_keys, used)
+        point_op, interval_op = _BINARY_OPERATORS[type(node.op)]
+        return (
+            lambda columns: point_op(left_point(columns), right_point(columns)),
+            lambda bounds: interval_op(left_interval(bounds), right_interval(bounds))
+        )
+
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+        base_point, base_interval = _compile_node(node.left, property_keys, used)
+        exponent_used = set()
+        exponent_point, _ = _compile_node(node.right, property_keys, exponent_used)
+        if exponent_used:
+            raise FormulaError("El exponente de '**' debe ser una constante numérica")
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            exponent = float(exponent_point({}))
+        if not np.isfinite(exponent):
+            raise FormulaError("El exponente de '**' está fuera de rango")
+        return (
+            lambda columns: np.power(base_point(columns), exponent),
+            lambda bounds: interval_pow(base_interval(bounds), exponent)
+        )
+
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id == 'sqrt' and len(node.args) == 1 and not node.keywords):
+        point, interval = _compile_node(node.args[0], property_keys, used)
+        return (lambda columns: np.sqrt(point(columns))), (lambda bounds: interval_pow(interval(bounds), 0.5))
+
+    raise FormulaError(f"Elemento no permitido en la fórmula: {ast.dump(node)[:60]}")
+
+
+# Límites de las fórmulas libres: longitud del texto normalizado y profundidad
+# del AST (la evaluación anida una llamada por nivel)
+MAX_FORMULA_LENGTH = 500
+MAX_FORMULA_DEPTH = 64
+
+
+def _tree_depth(tree):
+    """Profundidad del AST, calculada sin recursión"""
+    depth, pending = 0, [(tree, 1)]
+    while pending:
+        node, level = pending.pop()
+        depth = max(depth, level)
+        pending.extend((child, level + 1) for child in ast.iter_child_nodes(node))
+    return depth
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_normalized(normalized, property_keys):
+    try:
+        tree = ast.parse(normalized, mode='eval')
+    except SyntaxError as error:
+        raise FormulaError(f"Sintaxis no válida: {error.msg}") from None
+    except (RecursionError, MemoryError):
+        # El analizador de Python no admite anidamientos muy profundos
+        raise FormulaError("La fórmula está demasiado anidada") from None
+    if _tree_depth(tree) > MAX_FORMULA_DEPTH:
+        raise FormulaError(f"La fórmula está demasiado anidada (máximo {MAX_FORMULA_DEPTH} niveles)")
+
+    used = set()
+    try:
+        point_fn, interval_fn = _compile_node(tree, property_keys, used)
+    except RecursionError:
+        raise FormulaError("La fórmula está demasiado anidada") from None
+    except FormulaError:
+        raise
+    except (OverflowError, ValueError) as error:
+        # Cualquier otro error numérico al compilar se presenta como fórmula no válida
+        raise FormulaError(f"Fórmula no válida: {error}") from None
+    return CompiledFormula(normalized, frozenset(used), point_fn, interval_fn)
+
+
+def compile_formula(expression, property_keys):
+    """Compila una fórmula como 'thermal_conductivity / (thermal_expansion * density)'
+
+    Solo se admiten claves de propiedad, constantes numéricas, los operadores
+    + - * / y ** (con exponente constante) y sqrt(). La fórmula nunca se
+    evalúa con ``eval``; el AST se traduce a funciones NumPy vectorizadas y el
+    resultado se memoriza por el texto normalizado (sin espacios), de como
+    máximo ``MAX_FORMULA_LENGTH`` caracteres.
+
+    Raises:
+        FormulaError: si la fórmula no es válida.
+    """
+    normalized = ''.join(expression.split())
+    if not normalized:
+        raise FormulaError("La fórmula está vacía")
+    if len(normalized) > MAX_FORMULA_LENGTH:
+        raise FormulaError(f"La fórmula es demasiado larga (máximo {MAX_FORMULA_LENGTH} caracteres)")
+    return _compile_normalized(normalized, tuple(property_keys))
@@ -0,0 +1,222 @@
+"""Instrumentación ligera de cada ejecución (rerun) de la aplicación
+
+Un ``RerunProfiler`` activo en el hilo actual recoge intervalos con nombre
+(``span``), anidados, con su duración y, opcionalmente, el pico de memoria
+asignada medido con tracemalloc. También puede envolver la ejecución
+completa con cProfile. Sin un perfilador activo, ``span`` y ``timed`` no
+hacen nada, de modo que el código instrumentado puede usarse fuera de la
+aplicación (p. ej. desde ``ashby-select`` o los benchmarks).
+
+Streamlit ejecuta el script de cada sesión en su propio hilo, así que el
+perfilador activo se guarda por hilo y las sesiones no se mezclan. cProfile
+y tracemalloc son globales al proceso: solo una sesión a la vez puede usar
+cada uno, y las demás continúan sin él (ver ``profile_error`` y
+``memory_error``).
+"""
+import cProfile
+import functools
+import io
+import json
+import logging
+import marshal
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger('ashby.profiling')
+
+_local = threading.local()
+# Python solo admite un cProfile activo a la vez en todo el proceso
+_profile_lock = threading.Lock()
+# tracemalloc también es global: solo una sesión lo arranca, reinicia y detiene
+_memory_lock = threading.Lock()
+
+
+def active_profiler():
+    """Perfilador activo en el hilo actual, o None"""
+    return getattr(_local, 'profiler', None)
+
+
+@contextmanager
+def span(name):
+    """Mide un bloque con el perfilador activo; sin perfilador no hace nada"""
+    profiler = active_profiler()
+    if profiler is None:
+        yield None
+        return
+    with profiler.span(name) as record:
+        yield record
+
+
+def annotate(**fields):
+    """Añade datos de contexto al resumen del perfilador activo, si lo hay"""
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler.annotate(**fields)
+
+
+def timed(name):
+    """Decorador que mide cada llamada a la función como un ``span``"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable_json_logging(stream=None, level=logging.INFO):
+    """Escribe los registros de ``ashby.profiling`` como una línea JSON por ejecución"""
+    if not any(getattr(handler, '_ashby_json', False) for handler in logger.handlers):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler._ashby_json = True
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+class RerunProfiler:
+    """Intervalos con nombre de una ejecución, con memoria y cProfile opcionales
+
+    Args:
+        memory: Mide el pico de memoria de cada intervalo con tracemalloc
+            (ralentiza notablemente las asignaciones mientras está activo).
+            tracemalloc cuenta las asignaciones de todo el proceso, así que
+            los picos incluyen las de otros hilos durante la ejecución. Si
+            otra sesión ya mide memoria, o tracemalloc ya estaba activo por
+            otra herramienta, se omite y se indica en ``memory_error``.
+        profile: Envuelve la ejecución con cProfile. Si otra sesión ya está
+            perfilando, se omite y se indica en ``profile_error``.
+        log: Emite un registro JSON en ``ashby.profiling`` al terminar.
+    """
+
+    def __init__(self, memory=False, profile=False, log=False):
+        self.memory = memory
+        self.profile = profile
+        self.log = log
+        self.spans = []
+        self.fields = {}
+        self.total_seconds = None
+        self.profile_error = None
+        self.memory_error = None
+        self._stack = []
+        self._origin = None
+        self._profiler = None
+        self._started_tracing = False
+
+    def annotate(self, **fields):
+        """Añade datos de contexto al resumen (p. ej. número de materiales filtrados)"""
+        self.fields.update(fields)
+
+    def _flush_peak(self):
+        """Propaga el pico de memoria desde la última medida a los intervalos abiertos"""
+        _, peak = tracemalloc.get_traced_memory()
+        for record in self._stack:
+            record['peak_bytes'] = max(record['peak_bytes'], peak - record['_start_bytes'])
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def span(self, name):
+        record = {
+            'name': name,
+            'depth': len(self._stack),
+            'offset_seconds': time.perf_counter() - (self._origin or time.perf_counter()),
+            'seconds': None
+        }
+        self.spans.append(record)
+        if self._started_tracing:
+            self._flush_peak()
+            record['peak_bytes'] = 0
+            record['_start_bytes'] = tracemalloc.get_traced_memory()[0]
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if 'peak_bytes' in record:
+                self._flush_peak()
+                del record['_start_bytes']
+            self._stack.pop()
+
+    @contextmanager
+    def activate(self):
+        """Activa el perfilador en el hilo actual durante el bloque"""
+        previous = active_profiler()
+        _local.profiler = self
+        self._origin = time.perf_counter()
+        if self.memory:
+            if not _memory_lock.acquire(blocking=False):
+                self.memory_error = "Otra sesión está midiendo memoria; inténtalo de nuevo"
+            elif tracemalloc.is_tracing():
+                # Otra herramienta controla tracemalloc: no se reinicia ni se detiene
+                _memory_lock.release()
+                self.memory_error = "tracemalloc ya estaba activo en el proceso"
+            else:
+                tracemalloc.start()
+                self._started_tracing = True
+        if self.profile:
+            if _profile_lock.acquire(blocking=False):
+                self._profiler = cProfile.Profile()
+                try:
+                    self._profiler.enable()
+                except ValueError as error:
+                    # Otra herramienta de perfilado ya está activa (Python 3.12+)
+                    self._profiler = None
+                    self.profile_error = str(error)
+                    _profile_lock.release()
+            else:
+                self.profile_error = "Otra sesión está perfilando; inténtalo de nuevo"
+        try:
+            yield self
+        finally:
+            if self._profiler is not None:
+                self._profiler.disable()
+                _profile_lock.release()
+            self.total_seconds = time.perf_counter() - self._origin
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+                _memory_lock.release()
+            _local.profiler = previous
+            if self.log:
+                logger.info(json.dumps(self.summary(), ensure_ascii=False, default=str))
+
+    def summary(self):
+        """Resumen serializable en JSON: fecha, duración total, campos e intervalos"""
+        spans = [
+            {key: (round(value, 6) if isinstance(value, float) else value) for key, value in record.items()
+             if not key.startswith('_')}
+            for record in self.spans
+        ]
+        summary = {
+            'event': 'rerun',
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'total_seconds': None if self.total_seconds is None else round(self.total_seconds, 6),
+            'fields': self.fields,
+            'spans': spans
+        }
+        if self.profile_error:
+            summary['profile_error'] = self.profile_error
+        if self.memory_error:
+            summary['memory_error'] = self.memory_error
+        return summary
+
+    def profile_text(self, limit=25, sort='cumulative'):
+        """Funciones más costosas según cProfile, como texto de pstats"""
+        if self._profiler is None:
+            return None
+        output = io.StringIO()
+        pstats.Stats(self._profiler, stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def profile_dump(self):
+        """Estadísticas de cProfile en el formato de ``pstats`` (fichero .prof), o None"""
+        if self._profiler is None:
+            return None
+        return marshal.dumps(pstats.Stats(self._profiler).stats)
@@ -0,0 +1,170 @@
+import numpy as np
+
+
+def describe_ranges(mins, maxs):
+    """Estadísticas descriptivas del valor medio de cada rango (ignora NaN)"""
+    midpoints = 0.5 * (mins + maxs)
+    midpoints = midpoints[~np.isnan(midpoints)]
+    if not len(midpoints):
+        return None
+    return {
+        'count': len(midpoints),
+        'mean': float(np.mean(midpoints)),
+        'std': float(np.std(midpoints)),
+        'min': float(np.min(midpoints)),
+        'max': float(np.max(midpoints)),
+        'median': float(np.median(midpoints))
+    }
+
+
+def range_bounds(mins, maxs):
+    """(mínimo de los mínimos, máximo de los máximos) ignorando NaN, o None"""
+    defined = ~np.isnan(mins)
+    if not defined.any():
+        return None
+    return float(mins[defined].min()), float(maxs[defined].max())
+
+
+class _PropertyEntry(dict):
+    """Entrada de estadísticas con la parte de distribución calculada al primer acceso
+
+    Los extremos ('min', 'max', 'positive_min', 'family_min', 'family_max')
+    se guardan siempre; 'quantiles', 'log_histogram' y 'summary' se calculan
+    cuando se piden y se descartan cuando cambian las filas.
+    """
+
+    DISTRIBUTION_KEYS = ('quantiles', 'log_histogram', 'summary')
+
+    def __init__(self, statistics, key, extremes):
+        super().__init__(extremes)
+        self._statistics = statistics
+        self._key = key
+
+    def __missing__(self, name):
+        if name not in self.DISTRIBUTION_KEYS:
+            raise KeyError(name)
+        self.update(self._statistics._distribution(self._key))
+        return self[name]
+
+    def invalidate_distribution(self):
+        for name in self.DISTRIBUTION_KEYS:
+            self.pop(name, None)
+
+
+class PropertyStatistics:
+    """Índice de estadísticas por propiedad que se mantiene al día con la base de datos
+
+    Para cada clave de propiedad guarda el mínimo y máximo globales de los
+    rangos (y el menor valor positivo), el mínimo y máximo por familia,
+    cuantiles y descriptivos del valor medio, y un histograma en escala log10
+    de los valores medios positivos.
+
+    Al insertar filas, ``sync`` ajusta los extremos solo con las filas nuevas
+    y descarta la parte de distribución, que se recalcula al pedirla; una
+    edición puede reducir los extremos y recalcula la propiedad completa.
+    """
+
+    QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+    def __init__(self, store, n_bins=20):
+        self.store = store
+        self.version = store.version
+        self.n_bins = n_bins
+        self.properties = {key: self._index_property(key) for key in store.property_keys}
+
+    def _index_property(self, key):
+        mins, maxs = self.store.mins[key], self.store.maxs[key]
+        defined = ~np.isnan(mins)
+        if not defined.any():
+            return None
+
+        n_families = len(self.store.families)
+        codes = self.store.family_codes[defined]
+        family_min = np.full(n_families, np.nan)
+        family_max = np.full(n_families, np.nan)
+        np.fmin.at(family_min, codes, mins[defined])
+        np.fmax.at(family_max, codes, maxs[defined])
+
+        # Menor valor positivo, para los límites de los ejes logarítmicos
+        bounds = np.concatenate([mins[defined], maxs[defined]])
+        bounds = bounds[bounds > 0]
+
+        global_min, global_max = range_bounds(mins, maxs)
+
+        return _PropertyEntry(self, key, {
+            'min': global_min,
+            'max': global_max,
+            'positive_min': float(bounds.min()) if len(bounds) else None,
+            'family_min': dict(zip(self.store.families, family_min)),
+            'family_max': dict(zip(self.store.families, family_max))
+        })
+
+    def _distribution(self, key):
+        mins, maxs = self.store.mins[key], self.store.maxs[key]
+        defined = ~np.isnan(mins)
+        midpoints = 0.5 * (mins[defined] + maxs[defined])
+        positive = midpoints[midpoints > 0]
+        if len(positive):
+            log_counts, log_edges = np.histogram(np.log10(positive), bins=self.n_bins)
+        else:
+            log_counts, log_edges = np.zeros(0, dtype=np.int64), np.zeros(0)
+        return {
+            'quantiles': dict(zip(self.QUANTILES, np.quantile(midpoints, self.QUANTILES))),
+            'log_histogram': (log_counts, log_edges),
+            'summary': describe_ranges(mins, maxs)
+        }
+
+    def _patch_property(self, key, rows):
+        """Ajusta los extremos de una propiedad con filas insertadas"""
+        entry = self.properties[key]
+        mins, maxs = self.store.mins[key][rows], self.store.maxs[key][rows]
+        defined = ~np.isnan(mins)
+        if entry is None:
+            if defined.any():
+                self.properties[key] = self._index_property(key)
+            return
+        if not defined.any():
+            return
+
+        mins, maxs, codes = mins[defined], maxs[defined], self.store.family_codes[rows][defined]
+        entry['min'] = min(entry['min'], float(mins.min()))
+        entry['max'] = max(entry['max'], float(maxs.max()))
+        positive = np.concatenate([mins, maxs])
+        positive = positive[positive > 0]
+        if len(positive):
+            current = entry['positive_min']
+            entry['positive_min'] = float(positive.min()) if current is None else min(current, float(positive.min()))
+
+        for family_code, low, high in zip(codes, mins, maxs):
+            family = self.store.families[family_code]
+            entry['family_min'][family] = np.fmin(entry['family_min'].get(family, np.nan), low)
+            entry['family_max'][family] = np.fmax(entry['family_max'].get(family, np.nan), high)
+        entry.invalidate_distribution()
+
+    def sync(self):
+        """Aplica los cambios del almacenamiento posteriores a la versión de las estadísticas"""
+        if self.version == self.store.version:
+            return
+        changes = self.store.changes_since(self.version)
+        inserted = [change.rows for change in changes or () if change.kind == 'insert']
+        if changes is None or len(inserted) < len(changes):
+            self.properties = {key: self._index_property(key) for key in self.store.property_keys}
+        else:
+            rows = np.concatenate(inserted)
+            for key in self.store.property_keys:
+                self._patch_property(key, rows)
+        self.version = self.store.version
+
+    def bounds(self, key):
+        """(mínimo, máximo) global de los rangos de la propiedad, o None"""
+        entry = self.properties[key]
+        if entry is None:
+            return None
+        return entry['min'], entry['max']
+
+    def describe(self, key, rows=None):
+        """Descriptivos del valor medio; precalculados si ``rows`` abarca toda la base de datos"""
+        if rows is None or len(rows) == len(self.store):
+            entry = self.properties[key]
+            return None if entry is None else entry['summary']
+        return describe_ranges(self.store.mins[key][rows], self.store.maxs[key][rows])
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+def _oriented_finite(values, largest):
+    """Valores orientados para que 'menor es mejor' y filas válidas (no NaN)"""
+    values = np.asarray(values, dtype=float)
+    oriented = -values if largest else values
+    return oriented, np.flatnonzero(~np.isnan(values))
+
+
+def top_k(values, k, largest=True):
+    """Índices de los k mejores valores, ordenados de mejor a peor
+
+    Usa ``np.partition`` para seleccionar los k candidatos en O(n) y solo
+    ordena esos k, de modo que el coste es O(n + k log k). Los NaN se ignoran.
+    """
+    oriented, valid = _oriented_finite(values, largest)
+    if k <= 0 or not len(valid):
+        return np.empty(0, dtype=np.intp)
+    if k < len(valid):
+        # Umbral del k-ésimo valor en O(n); los empates en el umbral se
+        # resuelven por fila, igual que un ordenamiento estable completo
+        candidates = oriented[valid]
+        kth = np.partition(candidates, k - 1)[k - 1]
+        better = valid[candidates < kth]
+        tied = valid[candidates == kth][:k - len(better)]
+        valid = np.concatenate((better, tied))
+    # Orden estable por fila en caso de empate, para un ranking determinista
+    return valid[np.lexsort((valid, oriented[valid]))]
+
+
+def bottom_k(values, k):
+    """Índices de los k peores valores (los menores), ordenados de menor a mayor"""
+    return top_k(values, k, largest=False)
+
+
+def top_k_per_family(values, codes, k, largest=True):
+    """Índices de los k mejores valores de cada familia
+
+    ``codes`` asigna cada fila a una familia (p. ej. ``store.family_codes``).
+    Devuelve los índices agrupados por código de familia creciente y, dentro
+    de cada familia, de mejor a peor.
+    """
+    codes = np.asarray(codes)
+    selected = []
+    for code in np.unique(codes):
+        members = np.flatnonzero(codes == code)
+        selected.append(members[top_k(np.asarray(values)[members], k, largest)])
+    if not selected:
+        return np.empty(0, dtype=np.intp)
+    return np.concatenate(selected)
+
+
+def rank_page(values, page, page_size, largest=True):
+    """Índices de la página ``page`` (desde 0) del ranking completo
+
+    Solo se seleccionan las (page + 1) * page_size primeras posiciones, sin
+    ordenar el resto de filas.
+    """
+    return top_k(values, (page + 1) * page_size, largest)[page * page_size:]
+
+
+def others_summary(values, selected):
+    """Número y media de los valores válidos que no están en ``selected``"""
+    values = np.asarray(values, dtype=float)
+    rest = np.ones(len(values), dtype=bool)
+    rest[selected] = False
+    rest &= ~np.isnan(values)
+    count = int(rest.sum())
+    return {'count': count, 'mean': float(values[rest].mean()) if count else None}
@@ -0,0 +1,210 @@
+"""Exportación por tramos de selecciones de materiales a CSV, JSON Lines o Parquet
+
+Las filas se leen directamente de las columnas del almacenamiento en tramos
+de unos pocos miles de materiales; cada tramo se escribe y se descarta antes de
+leer el siguiente, de modo que la memoria adicional no depende del tamaño
+de la selección. Se puede elegir qué columnas exportar y en qué orden.
+NaN e infinitos se exportan como celdas vacías (null en JSON Lines y Parquet).
+
+CSV y JSON Lines solo usan la biblioteca estándar; pyarrow se importa al
+exportar a Parquet.
+"""
+import csv
+import io
+import json
+import sys
+
+import numpy as np
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+MIME_TYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson', 'parquet': 'application/vnd.apache.parquet'}
+# Filas por tramo: en CSV y JSON Lines cada tramo se convierte a objetos de
+# Python, así que conviene que sea pequeño; en Parquet cada tramo es un grupo
+# de filas y los grupos pequeños comprimen peor
+DEFAULT_CHUNK_SIZES = {'csv': 2048, 'jsonl': 2048, 'parquet': 65536}
+
+# Nombres de las columnas fijas según el estilo: 'display' (tablas de la
+# aplicación) o 'keys' (claves de catálogo, como catalog_import y ashby-select)
+_IDENTITY_COLUMNS = {
+    'display': (('Material', 'name'), ('Familia', 'family'), ('Color', 'color')),
+    'keys': (('name', 'name'), ('family', 'family'), ('color', 'color'))
+}
+
+
+def export_columns(properties, naming='display', extra=()):
+    """Columnas exportables en su orden por defecto, como [(nombre, fuente)]
+
+    Args:
+        properties: Diccionario {nombre visible: clave}, como ``MaterialDatabase.properties``.
+        naming: 'display' ('Material', '<nombre visible> (min)', ...) o 'keys'
+            ('name', '<clave>_min', ...). Ambos estilos se pueden volver a
+            importar con ``catalog_import``.
+        extra: Nombres de columnas adicionales (p. ej. valores de un índice),
+            que se colocan tras las columnas de identificación.
+
+    La fuente es ('name',), ('family',), ('color',), ('min', clave),
+    ('max', clave) o ('extra', nombre).
+    """
+    if naming not in _IDENTITY_COLUMNS:
+        raise ValueError(f"Estilo de nombres no válido: {naming!r} (usa 'display' o 'keys')")
+    columns = [(name, (source,)) for name, source in _IDENTITY_COLUMNS[naming]]
+    columns += [(name, ('extra', name)) for name in extra]
+    for prop_name, prop_key in properties.items():
+        for bound in ('min', 'max'):
+            name = f'{prop_name} ({bound})' if naming == 'display' else f'{prop_key}_{bound}'
+            columns.append((name, (bound, prop_key)))
+    return columns
+
+
+def project_columns(available, names=None):
+    """Subconjunto de ``available`` con los nombres pedidos, en el orden pedido"""
+    if names is None:
+        return list(available)
+    lookup = dict(available)
+    unknown = [name for name in names if name not in lookup]
+    if unknown:
+        raise KeyError(f"Columnas desconocidas: {', '.join(unknown)} (disponibles: {', '.join(lookup)})")
+    return [(name, lookup[name]) for name in names]
+
+
+def iter_chunks(store, rows, columns, chunk_size=2048, extra=None):
+    """Genera diccionarios {columna: valores} de como máximo ``chunk_size`` filas
+
+    ``extra`` asigna a cada columna adicional un arreglo alineado con
+    ``rows``. Con una selección vacía se genera un único tramo vacío, para
+    que los escritores emitan la cabecera o el esquema.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    families = np.asarray(store.families, dtype=object)
+    colors = np.asarray(store.colors, dtype=object)
+    extra = extra or {}
+
+    for start in range(0, max(len(rows), 1), chunk_size):
+        chunk_rows = rows[start:start + chunk_size]
+        chunk = {}
+        for name, source in columns:
+            kind = source[0]
+            if kind == 'name':
+                chunk[name] = np.array([store.names[row] for row in chunk_rows], dtype=object)
+            elif kind == 'family':
+                chunk[name] = families[store.family_codes[chunk_rows]]
+            elif kind == 'color':
+                chunk[name] = colors[store.color_codes[chunk_rows]]
+            elif kind == 'extra':
+                chunk[name] = np.asarray(extra[source[1]])[start:start + chunk_size]
+            else:
+                chunk[name] = (store.mins if kind == 'min' else store.maxs)[source[1]][chunk_rows]
+            values = chunk[name]
+            if values.dtype.kind == 'f':
+                # NaN e infinitos se exportan como vacíos (null)
+                chunk[name] = np.where(np.isfinite(values), values, np.nan)
+        yield chunk
+
+
+def _records(chunk, missing):
+    """Filas de un tramo como tuplas de valores nativos; NaN se sustituye por ``missing``"""
+    columns = []
+    for values in chunk.values():
+        cells = values.tolist()
+        if values.dtype.kind == 'f' and np.isnan(values).any():
+            cells = [missing if cell != cell else cell for cell in cells]
+        columns.append(cells)
+    return zip(*columns)
+
+
+def _write_csv(chunks, stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    try:
+        writer = csv.writer(text)
+        for position, chunk in enumerate(chunks):
+            if position == 0:
+                writer.writerow(list(chunk))
+            writer.writerows(_records(chunk, ''))
+    finally:
+        text.flush()
+        text.detach()
+
+
+def _write_jsonl(chunks, stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    try:
+        for chunk in chunks:
+            names = list(chunk)
+            text.writelines(
+                json.dumps(dict(zip(names, record)), ensure_ascii=False) + '\n' for record in _records(chunk, None)
+            )
+    finally:
+        text.flush()
+        text.detach()
+
+
+def _write_parquet(chunks, stream):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("La exportación a Parquet requiere pyarrow (pip install pyarrow)") from None
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.table({
+                name: pa.array(values, type=pa.string() if values.dtype == object else None, from_pandas=True)
+                for name, values in chunk.items()
+            })
+            if writer is None:
+                writer = pq.ParquetWriter(stream, table.schema)
+            # Cada tramo se escribe como un grupo de filas
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+_WRITERS = {'csv': _write_csv, 'jsonl': _write_jsonl, 'parquet': _write_parquet}
+
+
+def write_chunks(chunks, output, file_format='csv'):
+    """Escribe los tramos en ``output``: una ruta, '-' (salida estándar) o un fichero binario"""
+    if file_format not in _WRITERS:
+        raise ValueError(f"Formato no válido: {file_format!r} (usa {', '.join(EXPORT_FORMATS)})")
+    if output == '-':
+        _WRITERS[file_format](chunks, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+    elif hasattr(output, 'write'):
+        _WRITERS[file_format](chunks, output)
+    else:
+        with open(output, 'wb') as stream:
+            _WRITERS[file_format](chunks, stream)
+
+
+def export_selection(store, rows, output, file_format='csv', properties=None, columns=None,
+                     naming='display', extra=None, chunk_size=None):
+    """Exporta las filas ``rows`` de un almacenamiento columnar por tramos
+
+    Args:
+        store: ColumnarMaterialStore.
+        rows: Filas a exportar, en el orden de salida.
+        output: Ruta, '-' para la salida estándar o fichero binario abierto.
+        file_format: 'csv', 'jsonl' o 'parquet'.
+        properties: {nombre visible: clave}; por defecto las claves del almacenamiento.
+        columns: Nombres de las columnas a exportar (proyección), en orden;
+            por defecto todas (ver ``export_columns``).
+        naming: Estilo de los nombres de columna, 'display' o 'keys'.
+        extra: Columnas adicionales {nombre: arreglo alineado con ``rows``}.
+        chunk_size: Filas por tramo (por defecto según el formato, ver
+            ``DEFAULT_CHUNK_SIZES``).
+    """
+    if properties is None:
+        properties = {key: key for key in store.property_keys}
+    extra = extra or {}
+    layout = project_columns(export_columns(properties, naming, extra=list(extra)), columns)
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZES.get(file_format, 2048)
+    write_chunks(iter_chunks(store, rows, layout, chunk_size, extra), output, file_format)
+
+
+def export_bytes(store, rows, file_format='csv', **options):
+    """Contenido exportado como bytes (p. ej. para ``st.download_button``)"""
+    buffer = io.BytesIO()
+    export_selection(store, rows, buffer, file_format, **options)
+    return buffer.getvalue()
@@ -0,0 +1,61 @@
+"""Capa de caché de Streamlit: recursos compartidos y claves canónicas"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip('streamlit')
+
+import ashby_app  # noqa: E402
+from material_selection import MaterialDatabase  # noqa: E402
+
+APP_PATH = Path(__file__).resolve().parent.parent / 'ashby_app.py'
+
+
+class CountingFilter:
+    """Filtro que cuenta las consultas que llegan a ejecutarse"""
+
+    def __init__(self, database):
+        self.calls = 0
+        self.rows = np.arange(len(database.store))
+
+    def apply_filters(self, filters):
+        self.calls += 1
+        return self
+
+
+def test_canonical_key_ignores_order_and_tracks_the_store():
+    database = MaterialDatabase()
+    key = ashby_app.canonical_cache_key(database, x='a', filters={'density': [1, 2], 'price': [3, 4]})
+    assert key == ashby_app.canonical_cache_key(database, filters={'price': [3, 4], 'density': [1, 2]}, x='a')
+    assert key != ashby_app.canonical_cache_key(database, x='a', filters={'density': [1, 3], 'price': [3, 4]})
+    # Otro almacenamiento con el mismo contenido, o el mismo tras un cambio, no comparte entradas
+    assert key != ashby_app.canonical_cache_key(MaterialDatabase(), x='a', filters={'density': [1, 2], 'price': [3, 4]})
+    database.add_materials({'Nuevo': {'family': 'Metales', 'color': '#000000', 'density': [1.0, 2.0]}})
+    assert key != ashby_app.canonical_cache_key(database, x='a', filters={'density': [1, 2], 'price': [3, 4]})
+
+
+def test_filter_rows_are_memoized_by_key():
+    database = MaterialDatabase()
+    material_filter = CountingFilter(database)
+    ashby_app.cached_filter_rows.clear()
+    key = ashby_app.canonical_cache_key(database, filters={})
+
+    first = ashby_app.cached_filter_rows(key, material_filter, {})
+    second = ashby_app.cached_filter_rows(key, material_filter, {})
+    assert material_filter.calls == 1
+    np.testing.assert_array_equal(first, second)
+
+    ashby_app.cached_filter_rows(ashby_app.canonical_cache_key(database, filters={'x': 1}), material_filter, {})
+    assert material_filter.calls == 2
+
+
+def test_sessions_share_the_database():
+    from streamlit.testing.v1 import AppTest
+
+    sessions = [AppTest.from_file(str(APP_PATH), default_timeout=60) for _ in range(2)]
+    for session in sessions:
+        session.run()
+        assert not session.exception
+    first, second = (session.session_state['database'] for session in sessions)
+    assert first is second
@@ -0,0 +1,104 @@
+"""Catálogo Arrow IPC: ida y vuelta y proyección de columnas"""
+import io
+
+import numpy as np
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+from arrow_store import ArrowNameColumn, read_arrow_catalog, write_arrow_catalog  # noqa: E402
+from material_selection import MaterialDatabase  # noqa: E402
+from material_store import ColumnarMaterialStore  # noqa: E402
+
+KEYS = ('density', 'young_modulus', 'price')
+
+
+def make_store(n_rows=1000):
+    rng = np.random.default_rng(7)
+    materials = {}
+    for row in range(n_rows):
+        props = {'family': f'F{row % 4}', 'color': f'#00000{row % 3}'}
+        for key in KEYS[:2 + row % 2]:
+            low = float(rng.uniform(1, 100))
+            props[key] = (low, low + float(rng.uniform(0, 10)))
+        materials[f'm{row}'] = props
+    return ColumnarMaterialStore.from_dict(materials, KEYS)
+
+
+class CountingFile(io.RawIOBase):
+    """Fichero que cuenta los bytes leídos"""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    def readinto(self, buffer):
+        size = self._file.readinto(buffer)
+        self.bytes_read += size
+        return size
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def test_round_trip(tmp_path):
+    store = make_store()
+    path = tmp_path / 'catalogo.arrow'
+    write_arrow_catalog(store, path)
+
+    loaded = read_arrow_catalog(path)
+    assert loaded.property_keys == KEYS
+    assert list(loaded.names) == store.names
+    assert [loaded.family_of(row) for row in range(len(store))] == [store.family_of(row) for row in range(len(store))]
+    assert [loaded.color_of(row) for row in range(len(store))] == [store.color_of(row) for row in range(len(store))]
+    for key in KEYS:
+        np.testing.assert_array_equal(loaded.mins[key], store.mins[key])
+        np.testing.assert_array_equal(loaded.maxs[key], store.maxs[key])
+    assert loaded.record(5) == store.record(5)
+    assert loaded.name_to_row['m42'] == 42
+
+
+def test_projected_read_skips_unrequested_columns(tmp_path):
+    store = make_store(50000)
+    path = tmp_path / 'catalogo.arrow'
+    write_arrow_catalog(store, path)
+    column_bytes = len(store) * np.dtype(np.float64).itemsize
+
+    full = CountingFile(path)
+    read_arrow_catalog(pa.PythonFile(full, 'r'))
+    projected = CountingFile(path)
+    loaded = read_arrow_catalog(pa.PythonFile(projected, 'r'), ['density'])
+
+    assert loaded.property_keys == ('density',)
+    assert set(loaded.mins) == {'density'}
+    np.testing.assert_array_equal(loaded.mins['density'], store.mins['density'])
+    # Las cuatro columnas de young_modulus y price no se leen
+    assert full.bytes_read - projected.bytes_read >= 4 * column_bytes
+
+
+def test_names_stay_in_arrow(tmp_path):
+    path = tmp_path / 'catalogo.arrow'
+    write_arrow_catalog(make_store(), path)
+
+    database = MaterialDatabase(path, property_keys=['density'])
+    assert isinstance(database.store.names, ArrowNameColumn)
+    assert database.store.name_to_row._lookup is None
+    assert database._interval_index is None
+    assert list(database.properties.values()) == ['density']
+
+    view = database.store.records(np.array([3, 8]))
+    assert list(view) == ['m3', 'm8']
+    assert database.store.name_to_row._lookup is None
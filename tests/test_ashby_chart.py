@@ -0,0 +1,112 @@
+"""Gráfico de Ashby: trazas por modo de renderizado"""
+import numpy as np
+import pytest
+
+pytest.importorskip('streamlit')
+
+from ashby_app import AshbyChartGenerator  # noqa: E402
+from benchmarks.synthetic import synthetic_catalog  # noqa: E402
+from ellipse_geometry import LOD_VERTEX_COUNTS, data_viewport, detail_levels  # noqa: E402
+from material_selection import MaterialDatabase  # noqa: E402
+
+X_PROPERTY, Y_PROPERTY = 'Densidad (kg/m³)', 'Módulo de Young (GPa)'
+
+
+@pytest.fixture
+def database():
+    return MaterialDatabase(store=synthetic_catalog(300))
+
+
+def plotted_rows(store):
+    return np.flatnonzero(store.has_property('density') & store.has_property('young_modulus'))
+
+
+def polygon_sizes(trace):
+    """Vértices de cada polígono de una traza agrupada (separados por NaN)"""
+    gaps = np.flatnonzero(np.isnan(np.asarray(trace.x, dtype=float)))
+    return np.diff(np.concatenate([[-1], gaps])) - 1
+
+
+def test_batched_mode_draws_one_trace_per_family_and_color(database):
+    store = database.store
+    fig = AshbyChartGenerator(database).create_ashby_chart(X_PROPERTY, Y_PROPERTY, render_mode='batched')
+    rows = plotted_rows(store)
+
+    groups = {(store.family_of(row), store.color_of(row)) for row in rows}
+    assert len(fig.data) == len(groups)
+    assert {(trace.name, trace.fillcolor) for trace in fig.data} == groups
+    # Un polígono por material y un hover por vértice
+    assert sum(len(polygon_sizes(trace)) for trace in fig.data) == len(rows)
+    assert all(len(trace.text) == len(trace.x) == len(trace.customdata) for trace in fig.data)
+    assert sorted(name for trace in fig.data for name in dict.fromkeys(trace.text)) == sorted(
+        store.names[row] for row in rows)
+
+
+def test_auto_mode_batches_above_the_threshold(database):
+    generator = AshbyChartGenerator(database)
+    n_rows = len(plotted_rows(database.store))
+    individual = generator.create_ashby_chart(X_PROPERTY, Y_PROPERTY, database.materials, render_mode='individual')
+    assert len(individual.data) == n_rows
+
+    generator.BATCH_THRESHOLD = n_rows
+    assert len(generator.create_ashby_chart(X_PROPERTY, Y_PROPERTY).data) == n_rows
+    generator.BATCH_THRESHOLD = n_rows - 1
+    assert len(generator.create_ashby_chart(X_PROPERTY, Y_PROPERTY).data) < n_rows
+
+
+def test_raster_mode_draws_one_heatmap_per_family(database):
+    store = database.store
+    generator = AshbyChartGenerator(database)
+    generator.RASTER_THRESHOLD = 100
+    fig = generator.create_ashby_chart(X_PROPERTY, Y_PROPERTY)
+    rows = plotted_rows(store)
+
+    assert [trace.type for trace in fig.data] == ['heatmap'] * len(fig.data)
+    assert sorted(trace.name for trace in fig.data) == sorted({store.family_of(row) for row in rows})
+    height, width = generator.RASTER_SHAPE
+    for trace in fig.data:
+        assert np.asarray(trace.z).shape == (height, width)
+        assert np.nanmin(np.asarray(trace.z, dtype=float)) >= 1
+
+    # El píxel que contiene el centro de cada elipse está cubierto en la capa de su familia
+    layers = {trace.name: np.asarray(trace.z, dtype=float) for trace in fig.data}
+    (x0, x1), (y0, y1) = fig.layout.xaxis.range, fig.layout.yaxis.range
+    cx = 0.5 * np.log10(store.mins['density'][rows] * store.maxs['density'][rows])
+    cy = 0.5 * np.log10(store.mins['young_modulus'][rows] * store.maxs['young_modulus'][rows])
+    columns = np.floor((cx - x0) / (x1 - x0) * width).astype(int)
+    lines = np.floor((cy - y0) / (y1 - y0) * height).astype(int)
+    for row, line, column in zip(rows, lines, columns):
+        assert layers[store.family_of(row)][line, column] >= 1
+
+
+def expected_vertex_counts(store, rows, viewport, plot_size):
+    bounds = [store.mins['density'][rows], store.maxs['density'][rows],
+              store.mins['young_modulus'][rows], store.maxs['young_modulus'][rows]]
+    viewport = viewport or data_viewport(*bounds)
+    return np.asarray(LOD_VERTEX_COUNTS)[detail_levels(*bounds, viewport, plot_size)]
+
+
+@pytest.mark.parametrize('viewport', [None, ((3.0, 3.5), (1.0, 2.0))])
+def test_level_of_detail_in_each_render_mode(database, viewport):
+    store = database.store
+    generator = AshbyChartGenerator(database)
+    rows = plotted_rows(store)
+    if viewport is not None:
+        (x0, x1), (y0, y1) = viewport
+        x_lo, x_hi = np.log10(store.mins['density'][rows]), np.log10(store.maxs['density'][rows])
+        y_lo, y_hi = np.log10(store.mins['young_modulus'][rows]), np.log10(store.maxs['young_modulus'][rows])
+        rows = rows[(x_hi >= x0) & (x_lo <= x1) & (y_hi >= y0) & (y_lo <= y1)]
+    expected = expected_vertex_counts(store, rows, viewport, generator.PLOT_SIZE)
+    assert len(set(expected)) > 1
+
+    batched = generator.create_ashby_chart(X_PROPERTY, Y_PROPERTY, render_mode='batched', viewport=viewport)
+    sizes = np.concatenate([polygon_sizes(trace) for trace in batched.data])
+    assert sorted(sizes) == sorted(expected)
+
+    individual = generator.create_ashby_chart(X_PROPERTY, Y_PROPERTY, render_mode='individual', viewport=viewport)
+    assert [len(trace.x) for trace in individual.data] == list(expected)
+
+    full = generator.create_ashby_chart(X_PROPERTY, Y_PROPERTY, render_mode='batched', viewport=viewport,
+                                        level_of_detail=False)
+    sizes = np.concatenate([polygon_sizes(trace) for trace in full.data])
+    assert set(sizes) == {LOD_VERTEX_COUNTS[-1]} and len(sizes) == len(rows)
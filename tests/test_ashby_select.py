@@ -0,0 +1,58 @@
+"""Línea de órdenes ashby-select: salida y código de salida"""
+import json
+
+import numpy as np
+import pytest
+
+import ashby_select
+from material_selection import MaterialDatabase
+
+
+def run(capsys, *argv):
+    code = ashby_select.main(list(argv))
+    return code, capsys.readouterr()
+
+
+def test_filtered_index_ranking(capsys):
+    code, output = run(capsys, '--filter', 'density=:3000', '--index', 'young_modulus / density',
+                       '--top', '3', '--format', 'jsonl', '--columns', 'name,index,density_max')
+    assert code == 0
+    records = [json.loads(line) for line in output.out.splitlines()]
+    assert [list(record) for record in records] == [['name', 'index', 'density_max']] * 3
+
+    store = MaterialDatabase().store
+    light = np.flatnonzero(store.mins['density'] <= 3000)
+    values = (store.mins['young_modulus'] + store.maxs['young_modulus'])[light] / (
+        store.mins['density'] + store.maxs['density'])[light]
+    expected = light[np.argsort(-values, kind='stable')[:3]]
+    assert [record['name'] for record in records] == [store.names[row] for row in expected]
+
+
+def test_csv_header_and_pareto(capsys):
+    code, output = run(capsys, '--pareto', 'young_modulus:max', '--pareto', 'density:min',
+                       '--dominance', 'point', '--top', '0', '--columns', 'name,family')
+    assert code == 0
+    lines = output.out.splitlines()
+    assert lines[0] == 'name,family'
+    assert len(lines) > 1
+
+
+def test_list_indices(capsys):
+    code, output = run(capsys, '--list-indices')
+    assert code == 0
+    assert output.out.splitlines() == list(ashby_select.COMMON_INDICES)
+
+
+@pytest.mark.parametrize('argv, message', [
+    (['--filter', 'desconocida=1:2'], "Propiedad desconocida: 'desconocida'"),
+    (['--pareto', 'density:arriba'], "Dirección no válida en --pareto"),
+    (['--index', 'density +'], ''),
+    (['--format', 'xml'], 'invalid choice'),
+])
+def test_invalid_arguments_exit_with_code_2(capsys, argv, message):
+    with pytest.raises(SystemExit) as raised:
+        ashby_select.main(argv)
+    assert raised.value.code == 2
+    error = capsys.readouterr().err
+    assert error.startswith('usage: ashby-select')
+    assert message in error
@@ -0,0 +1,73 @@
+"""Ejecución por lotes: mismos resultados en paralelo, en serie y con select_materials"""
+import json
+
+import numpy as np
+import pytest
+
+import batch_runner
+from batch_runner import FILTER_PRESETS, SharedMaterialArrays, attach_store, build_scenarios, run_batch
+from integration_example import APPLICATION_TEMPLATES
+from material_selection import MaterialDatabase, select_materials
+from performance_indices import COMMON_INDICES, ratio_formula
+
+
+@pytest.fixture(scope='module')
+def database():
+    return MaterialDatabase()
+
+
+@pytest.fixture(scope='module')
+def scenarios(database):
+    return build_scenarios(APPLICATION_TEMPLATES, COMMON_INDICES, FILTER_PRESETS, database.properties)
+
+
+def test_scenarios_cross_templates_indices_and_presets(database, scenarios):
+    assert len(scenarios) == len(APPLICATION_TEMPLATES) * len(COMMON_INDICES) * len(FILTER_PRESETS)
+    # Los rangos de la plantilla y del filtro predefinido se intersecan
+    ranges = build_scenarios(
+        {'T': {'Densidad (kg/m³)': {'type': 'minimum', 'value': 1000}}},
+        {'I': next(iter(COMMON_INDICES.values()))},
+        {'Ligeros': FILTER_PRESETS['Ligeros']},
+        database.properties
+    )[0]['ranges']
+    assert ranges == {'density': (1000, 3000)}
+
+
+def test_serial_results_match_select_materials(database, scenarios):
+    for scenario, result in run_batch(database.store, scenarios, k=3, processes=1):
+        rows, _, _ = select_materials(database, scenario['ranges'], ratio_formula(scenario['index_config']), top=3)
+        assert [name for name, _ in result['top']] == [database.store.names[row] for row in rows]
+        candidates, _, _ = select_materials(database, scenario['ranges'])
+        assert result['candidates'] == len(candidates)
+
+
+def test_process_pool_returns_the_same_results_in_order(database, scenarios):
+    serial = list(run_batch(database.store, scenarios, k=3, processes=1))
+    parallel = list(run_batch(database.store, scenarios, k=3, processes=2, chunksize=5))
+    assert [scenario for scenario, _ in parallel] == scenarios
+    assert [result for _, result in parallel] == [result for _, result in serial]
+
+
+def test_shared_arrays_are_released(database):
+    store = database.store
+    with SharedMaterialArrays(store) as shared:
+        attached, shm = attach_store(shared.descriptor)
+        for key in store.property_keys:
+            np.testing.assert_array_equal(attached.mins[key], store.mins[key])
+            np.testing.assert_array_equal(attached.maxs[key], store.maxs[key])
+        np.testing.assert_array_equal(attached.family_codes, store.family_codes)
+        del attached
+        shm.close()
+    with pytest.raises(FileNotFoundError):
+        attach_store(shared.descriptor)
+
+
+def test_main_writes_one_record_per_scenario(tmp_path, scenarios):
+    output = tmp_path / 'resultados.jsonl'
+    batch_runner.main(['--top-k', '2', '--processes', '1', '--output', str(output)])
+    records = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert len(records) == len(scenarios)
+    assert all(len(record['top']) <= 2 for record in records)
+    assert [(record['template'], record['index'], record['preset']) for record in records] == [
+        (scenario['template'], scenario['index'], scenario['preset']) for scenario in scenarios
+    ]
@@ -0,0 +1,72 @@
+"""Benchmarks: catálogo sintético reproducible, comparación con la línea base y pasada corta"""
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks import run
+from benchmarks.synthetic import PROPERTY_KEYS, synthetic_catalog
+
+STAGES = ['database', 'filter', 'chart', 'indices', 'pareto', 'export_csv']
+
+
+def test_synthetic_catalog_is_reproducible():
+    first, second, other = synthetic_catalog(500, seed=3), synthetic_catalog(500, seed=3), synthetic_catalog(500, seed=4)
+    for key in PROPERTY_KEYS:
+        np.testing.assert_array_equal(first.mins[key], second.mins[key])
+        assert not np.array_equal(first.mins[key], other.mins[key], equal_nan=True)
+        defined = ~np.isnan(first.mins[key])
+        assert np.all(first.mins[key][defined] <= first.maxs[key][defined])
+    np.testing.assert_array_equal(first.family_codes, second.family_codes)
+    assert not np.isnan(first.mins['density']).any()
+    assert len(first.names) == len(set(first.names)) == 500
+
+
+def result(stage, median_seconds, peak_bytes, rows=100):
+    return {'stage': stage, 'rows': rows, 'median_seconds': median_seconds, 'peak_bytes': peak_bytes}
+
+
+def test_compare_classifies_each_stage():
+    baseline = {'results': [
+        result('slow', 0.1, 1000), result('fast', 0.1, 1000), result('same', 0.1, 1000),
+        result('noise', 0.001, 1000), result('memory', 0.1, 1000)
+    ]}
+    comparison = run.compare([
+        result('slow', 0.2, 1000), result('fast', 0.05, 1000), result('same', 0.12, 1000),
+        # Diferencia menor que MIN_SIGNIFICANT_SECONDS: no cuenta aunque el cociente sea grande
+        result('noise', 0.004, 1000), result('memory', 0.1, 2000), result('new', 0.1, 1000)
+    ], baseline, tolerance=1.5)
+    assert [entry['status'] for entry in comparison] == ['regresión', 'mejora', 'igual', 'igual', 'regresión', 'nuevo']
+    assert comparison[0]['time_ratio'] == pytest.approx(2.0)
+    assert comparison[4]['memory_ratio'] == pytest.approx(2.0)
+
+
+def test_measure_runs_at_least_once():
+    calls = []
+    value, timings, peak = run.measure(lambda: calls.append(1) or len(calls), repeat=3, max_seconds=0.0)
+    # Una ejecución cronometrada y otra para el pico de memoria
+    assert value == 1 and len(timings) == 1 and len(calls) == 2
+    assert peak >= 0
+
+
+def test_smoke_run_and_regression_exit_code(tmp_path, capsys):
+    pytest.importorskip('streamlit')
+    output = tmp_path / 'resultados.json'
+    argv = ['--sizes', '200', '--repeat', '1', '--output', str(output)]
+
+    assert run.main(argv + ['--no-compare']) == 0
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert [item['stage'] for item in report['results']] == STAGES
+    assert all(item['rows'] == 200 and item['repeat'] == 1 for item in report['results'])
+    assert 'comparison' not in report
+
+    # Una línea base con picos de memoria mínimos convierte todas las etapas en regresiones
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'results': [dict(item, peak_bytes=1) for item in report['results']]}),
+                        encoding='utf-8')
+    capsys.readouterr()
+    assert run.main(argv + ['--baseline', str(baseline), '--stages', 'filter', 'pareto']) == 0
+    assert run.main(argv + ['--baseline', str(baseline), '--stages', 'filter', '--fail-on-regression']) == 1
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert [(entry['stage'], entry['status']) for entry in report['comparison']] == [('filter', 'regresión')]
+    assert 'regresión' in capsys.readouterr().out
@@ -0,0 +1,69 @@
+"""Importación de catálogos: informe de validación y ficheros que no se pueden leer"""
+import pytest
+
+from catalog_import import import_catalog
+from material_selection import MaterialDatabase
+
+PROPERTIES = {'Densidad (kg/m³)': 'density', 'Precio (€/kg)': 'price'}
+FAMILIES = ('Metales', 'Polímeros')
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+def test_validation_report(tmp_path):
+    path = write(tmp_path, 'catalogo.csv', (
+        'name,family,density_min,density_max,Precio (€/kg) (min),Precio (€/kg) (max)\n'
+        'Bueno,Metales,7800,8000,1,2\n'
+        ',Metales,1,2,1,2\n'
+        'Bueno,Metales,1,2,1,2\n'
+        'Raro,Vidrios,1,2,1,2\n'
+        'Texto,Metales,abc,2,1,2\n'
+        'Invertido,Metales,5,2,1,2\n'
+        'Incompleto,Metales,1,,1,2\n'
+        'Negativo,Polímeros,-1,2,1,2\n'
+        'Sin precio,Polímeros,900,950,,\n'
+    ))
+    imported, report = import_catalog(path, PROPERTIES, known_families=FAMILIES, chunk_size=3)
+
+    # 'Texto' tiene dos errores: valor no numérico y, por tanto, un extremo ausente
+    assert report.summary() == {'aceptados': 2, 'rechazados': 7, 'errores': 8}
+    assert imported.names == ['Bueno', 'Sin precio']
+    assert imported.record(0) == {'family': 'Metales', 'color': '#808080',
+                                  'density': [7800.0, 8000.0], 'price': [1.0, 2.0]}
+    errors = report.errors
+    assert errors['fila'].tolist() == [2, 3, 4, 5, 5, 6, 7, 8]
+    assert errors['columna'].tolist() == ['name', 'name', 'family'] + ['density'] * 5
+    assert errors['error'].tolist()[:3] == [
+        "Falta el nombre del material", "Nombre de material repetido",
+        "Familia desconocida (válidas: Metales, Polímeros)"
+    ]
+
+
+def test_jsonl_values_are_read_exactly(tmp_path):
+    path = write(tmp_path, 'catalogo.jsonl', (
+        '{"name": "A", "family": "Metales", "density": [0.1, 0.30000000000000004], "price_min": 0.3, "price_max": 0.7}\n'
+    ))
+    imported, report = import_catalog(path, PROPERTIES, known_families=FAMILIES)
+    assert report.summary()['aceptados'] == 1
+    assert imported.record(0)['density'] == [0.1, 0.30000000000000004]
+    assert imported.record(0)['price'] == [0.3, 0.7]
+
+
+@pytest.mark.parametrize('name, text', [
+    ('vacio.csv', ''),
+    ('mal_formado.csv', 'name,family\n"sin cerrar,Metales\n'),
+    ('mal_formado.jsonl', '{"name": "A", "family": "Metales"}\n{no es json\n'),
+])
+def test_unreadable_file_is_reported(tmp_path, name, text):
+    database = MaterialDatabase()
+    size = len(database.store)
+    report = database.import_catalog(write(tmp_path, name, text))
+
+    assert report.summary()['aceptados'] == 0
+    assert report.summary()['errores'] == 1
+    assert report.errors['columna'].tolist() == ['fichero']
+    assert len(database.store) == size
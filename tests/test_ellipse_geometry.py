@@ -0,0 +1,112 @@
+"""Geometría de elipses: caché por almacenamiento y vistas degeneradas"""
+import warnings
+
+import numpy as np
+import pytest
+
+from ellipse_geometry import (
+    EllipseGeometryCache, data_viewport, detail_levels, ellipse_vertices, padded_range, rasterize_ellipses
+)
+from material_store import ColumnarMaterialStore
+
+KEYS = ('x', 'y')
+
+
+def make_store(scale, n_rows=5):
+    return ColumnarMaterialStore.from_dict({
+        f'm{row}': {'family': 'F', 'color': '#000000',
+                    'x': (scale * (row + 1), 2 * scale * (row + 1)), 'y': (1.0, 3.0)}
+        for row in range(n_rows)
+    }, KEYS)
+
+
+def expected_vertices(store):
+    return ellipse_vertices(store.mins['x'], store.maxs['x'], store.mins['y'], store.maxs['y'])
+
+
+def test_cache_is_not_shared_by_a_store_reusing_a_freed_id():
+    cache = EllipseGeometryCache()
+    # Cada almacenamiento se libera antes de crear el siguiente, que suele
+    # ocupar la misma memoria (mismo id(), versión y tamaño)
+    for scale in (1.0, 10.0, 100.0):
+        store = make_store(scale)
+        xs, ys = cache.get(store, 'x', 'y')
+        expected_xs, expected_ys = expected_vertices(store)
+        np.testing.assert_allclose(xs, expected_xs)
+        np.testing.assert_allclose(ys, expected_ys)
+        del store
+
+
+def test_cache_follows_store_changes():
+    cache = EllipseGeometryCache()
+    store = make_store(1.0)
+    cache.get(store, 'x', 'y')
+    store.append_records({'nuevo': {'family': 'F', 'color': '#000000', 'x': (7.0, 9.0), 'y': (2.0, 4.0)}})
+    store.update_record('m0', {'family': 'F', 'color': '#000000', 'x': (100.0, 200.0), 'y': (1.0, 2.0)})
+
+    xs, ys = cache.get(store, 'x', 'y')
+    expected_xs, expected_ys = expected_vertices(store)
+    np.testing.assert_allclose(xs, expected_xs)
+    np.testing.assert_allclose(ys, expected_ys)
+
+
+def test_cache_keeps_the_most_recent_axis_pairs():
+    cache = EllipseGeometryCache(max_entries=2)
+    store = make_store(1.0)
+    first = cache.get(store, 'x', 'y')
+    # Un acierto devuelve los mismos arreglos, sin recalcular
+    assert np.shares_memory(cache.get(store, 'x', 'y')[0], first[0])
+
+    cache.get(store, 'y', 'x')
+    cache.get(store, 'x', 'y')
+    cache.get(store, 'x', 'y', n_points=8)
+    # Se descarta el par usado hace más tiempo ('y', 'x'), no el más antiguo
+    assert np.shares_memory(cache.get(store, 'x', 'y')[0], first[0])
+    assert len(cache._entries) == 2
+    assert (store.uid, 'y', 'x', 50) not in cache._entries
+    assert cache.get(store, 'x', 'y', n_points=8)[0].shape == (len(store), 8)
+
+
+@pytest.fixture
+def no_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        yield
+
+
+@pytest.mark.parametrize('margin', [0.05, 0.0])
+def test_single_point_material_has_a_non_degenerate_viewport(no_warnings, margin):
+    point = np.array([100.0])
+    (x0, x1), (y0, y1) = data_viewport(point, point, point, point, margin)
+    assert x0 < 2.0 < x1 and y0 < 2.0 < y1
+
+    levels = detail_levels(point, point, point, point, ((x0, x1), (y0, y1)))
+    assert levels.tolist() == [0]
+
+
+@pytest.mark.parametrize('viewport', [
+    ((2.0, 2.0), (0.0, 1.0)),
+    ((1.0, 3.0), (0.5, 0.5)),
+    ((2.0, 2.0), (0.5, 0.5)),
+])
+def test_zero_span_viewport_is_padded(no_warnings, viewport):
+    x_min, x_max = np.array([50.0, 1.0]), np.array([200.0, 2.0])
+    y_min, y_max = np.array([2.0, 1.0]), np.array([4.0, 1.5])
+
+    levels = detail_levels(x_min, x_max, y_min, y_max, viewport, plot_size=(900, 600))
+    padded = tuple(padded_range(*axis) for axis in viewport)
+    np.testing.assert_array_equal(levels, detail_levels(x_min, x_max, y_min, y_max, padded, plot_size=(900, 600)))
+
+    coverage, x_centers, y_centers = rasterize_ellipses(
+        x_min, x_max, y_min, y_max, [0, 0], 1, viewport[0], viewport[1], shape=(32, 48)
+    )
+    assert coverage.shape == (1, 32, 48)
+    assert np.isfinite(x_centers).all() and np.isfinite(y_centers).all()
+    # La elipse que contiene el centro de la vista cubre algún píxel
+    assert coverage[0].max() >= 1
+
+
+def test_padded_range_keeps_valid_ranges():
+    assert padded_range(0.0, 2.5) == (0.0, 2.5)
+    assert padded_range(1.0, 1.0) == (0.5, 1.5)
+    assert padded_range(3.0, 1.0, min_span=2.0) == (1.0, 3.0)
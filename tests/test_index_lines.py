@@ -0,0 +1,57 @@
+"""Los materiales por encima de una línea de índice son los de mayor índice"""
+import numpy as np
+import pytest
+
+from advanced_features import PerformanceIndexTool
+from material_store import ColumnarMaterialStore
+from performance_indices import COMMON_INDICES, evaluate_ratio_index, index_slope
+
+KEYS = ('young_modulus', 'yield_strength', 'density', 'fracture_toughness')
+
+
+def point_store(rng, n_rows):
+    """Materiales con rangos de anchura nula: cada elipse es un punto"""
+    materials = {}
+    for row in range(n_rows):
+        props = {'family': 'F', 'color': '#000000'}
+        for key in KEYS:
+            value = float(np.exp(rng.normal(3, 2)))
+            props[key] = (value, value)
+        materials[f'm{row}'] = props
+    return ColumnarMaterialStore.from_dict(materials, KEYS)
+
+
+@pytest.mark.parametrize('name', list(COMMON_INDICES))
+@pytest.mark.parametrize('line_position', [0.3, 0.5, 0.7])
+def test_materials_above_line_have_the_highest_index(name, line_position):
+    config = COMMON_INDICES[name]
+    store = point_store(np.random.default_rng(0), 300)
+    tool = PerformanceIndexTool()
+    x_key, y_key = config['denominator'], config['numerator']
+    x_range = (np.log10(store.mins[x_key].min()), np.log10(store.maxs[x_key].max()))
+    y_range = (np.log10(store.mins[y_key].min()), np.log10(store.maxs[y_key].max()))
+
+    above = tool.materials_above_line(store, x_key, y_key, config, x_range, y_range, line_position)
+    values, _, _ = evaluate_ratio_index(store, np.arange(len(store)), config)
+    top = np.sort(np.argsort(-values)[:len(above)])
+    assert 0 < len(above) < len(store)
+    np.testing.assert_array_equal(above, top)
+
+
+def test_slope_follows_exponents():
+    assert index_slope(COMMON_INDICES['E^(1/2)/ρ (Rigidez específica optimizada)']) == pytest.approx(2)
+    assert index_slope(COMMON_INDICES['E^(1/3)/ρ (Barras en compresión)']) == pytest.approx(3)
+    assert index_slope(COMMON_INDICES['E/ρ² (Placas en flexión)']) == pytest.approx(2)
+    for config in COMMON_INDICES.values():
+        assert config['slope'] == pytest.approx(index_slope(config))
+
+
+def test_line_queries_are_bounded_and_keyed_by_store():
+    rng = np.random.default_rng(1)
+    first, second = point_store(rng, 50), point_store(rng, 50)
+    tool = PerformanceIndexTool()
+    assert tool.line_query(first, 'density', 'young_modulus', 1) is not tool.line_query(
+        second, 'density', 'young_modulus', 1)
+    for slope in range(2 * tool.MAX_LINE_QUERIES):
+        tool.line_query(first, 'density', 'young_modulus', slope)
+    assert len(tool._line_queries) == tool.MAX_LINE_QUERIES
@@ -0,0 +1,85 @@
+"""El índice de intervalos debe coincidir con el solapamiento calculado por fuerza bruta"""
+import numpy as np
+import pytest
+
+from interval_index import MaterialIntervalIndex
+from material_store import ColumnarMaterialStore
+
+KEYS = ('density', 'young_modulus', 'price')
+
+
+def random_materials(rng, n_rows, prefix, missing_fraction=0.2):
+    """Materiales aleatorios con rangos log-normales y propiedades ausentes"""
+    materials = {}
+    for row in range(n_rows):
+        props = {'family': f'F{row % 3}', 'color': '#000000'}
+        for key in KEYS:
+            if rng.random() < missing_fraction:
+                continue
+            low = float(np.exp(rng.normal(3, 2)))
+            props[key] = (low, low * float(np.exp(rng.uniform(0, 1))))
+        materials[f'{prefix}{row}'] = props
+    return materials
+
+
+def brute_force(store, ranges):
+    """Filas que se solapan con todos los rangos; sin la propiedad (NaN) no se descartan"""
+    keep = np.ones(len(store), dtype=bool)
+    for key, (low, high) in ranges.items():
+        keep &= ~((store.maxs[key] < low) | (store.mins[key] > high))
+    return np.flatnonzero(keep)
+
+
+def random_ranges(rng):
+    keys = rng.choice(KEYS, size=rng.integers(1, len(KEYS) + 1), replace=False)
+    ranges = {}
+    for key in keys:
+        low = float(np.exp(rng.normal(3, 2)))
+        ranges[str(key)] = (low, low * float(np.exp(rng.uniform(0, 3))))
+    return ranges
+
+
+def assert_matches(index, store, rng, n_queries=50):
+    for _ in range(n_queries):
+        ranges = random_ranges(rng)
+        np.testing.assert_array_equal(index.query(ranges), brute_force(store, ranges))
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def test_query_matches_brute_force(rng):
+    store = ColumnarMaterialStore.from_dict(random_materials(rng, 500, 'm'), KEYS)
+    assert_matches(MaterialIntervalIndex(store), store, rng)
+
+
+def test_query_after_inserts_and_updates(rng):
+    store = ColumnarMaterialStore.from_dict(random_materials(rng, 500, 'm'), KEYS)
+    index = MaterialIntervalIndex(store)
+    # Umbral alto para que los cambios queden en el conjunto pendiente
+    index.MIN_PENDING = 10 ** 6
+
+    store.append_records(random_materials(rng, 100, 'nuevo'))
+    for name, data in random_materials(rng, 50, 'x').items():
+        store.update_record(f'm{rng.integers(500)}', data)
+    assert_matches(index, store, rng)
+    assert len(index.pending_rows)
+
+    index.MIN_PENDING = 0
+    index.PENDING_FRACTION = 10 ** 6
+    store.append_records(random_materials(rng, 1, 'rebuild'))
+    assert_matches(index, store, rng)
+    assert not len(index.pending_rows)
+
+
+def test_pending_rows_without_property_are_kept(rng):
+    store = ColumnarMaterialStore.from_dict(random_materials(rng, 50, 'm'), KEYS)
+    index = MaterialIntervalIndex(store)
+    (row,) = store.append_records({'Sin densidad': {'family': 'F0', 'color': '#000000', 'price': (1.0, 2.0)}})
+
+    ranges = {'density': (1000.0, 2000.0)}
+    assert row in index.query(ranges)
+    # El resultado no depende de que el índice se haya reconstruido
+    np.testing.assert_array_equal(index.query(ranges), MaterialIntervalIndex(store).query(ranges))
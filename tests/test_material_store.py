@@ -0,0 +1,35 @@
+"""MaterialRecordsView cumple el contrato de Mapping"""
+import numpy as np
+
+from material_store import ColumnarMaterialStore
+
+KEYS = ('density',)
+
+
+def make_store(n_rows=10):
+    return ColumnarMaterialStore.from_dict({
+        f'm{row}': {'family': 'F', 'color': '#000000', 'density': (float(row), float(row) + 1)}
+        for row in range(n_rows)
+    }, KEYS)
+
+
+def test_items_and_values_are_views():
+    view = make_store().records(np.array([2, 5, 7]))
+    items = view.items()
+    assert len(items) == 3
+    assert list(items) == list(items)
+    assert [name for name, _ in items] == ['m2', 'm5', 'm7']
+    assert ('m5', view['m5']) in items
+    assert len(view.values()) == 3
+    assert dict(view) == {name: record for name, record in items}
+
+
+def test_membership_of_subset_views():
+    store = make_store()
+    view = store.records(np.array([1, 3]))
+    assert 'm1' in view and 'm3' in view
+    assert 'm2' not in view and 'desconocido' not in view
+    # Las filas añadidas después de crear la vista no forman parte de ella
+    store.append_records({'nuevo': {'family': 'F', 'color': '#000000', 'density': (1.0, 2.0)}})
+    assert 'nuevo' not in view
+    assert 'nuevo' in store.records()
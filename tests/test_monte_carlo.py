@@ -0,0 +1,85 @@
+"""Ranking Monte Carlo: reproducible con semilla y coherente con rangos puntuales"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from material_selection import MaterialDatabase
+from monte_carlo import formula_score, monte_carlo_ranking, weighted_score
+from performance_indices import compile_formula
+
+ROOT = Path(__file__).resolve().parent.parent
+FORMULA = 'young_modulus ** 0.5 / (density * price)'
+
+
+@pytest.fixture
+def store():
+    return MaterialDatabase().store
+
+
+def ranking(store, seed, score=None, **options):
+    score = score or formula_score(compile_formula(FORMULA, store.property_keys))
+    return monte_carlo_ranking(store, np.arange(len(store)), score, n_samples=300, top_k=3, seed=seed, **options)
+
+
+def assert_same_result(result, expected):
+    np.testing.assert_array_equal(result['first_probability'], expected['first_probability'])
+    np.testing.assert_array_equal(result['top_k_probability'], expected['top_k_probability'])
+    # Las sumas por tramos solo cambian el redondeo de la media
+    np.testing.assert_allclose(result['mean_score'], expected['mean_score'], rtol=1e-12)
+
+
+@pytest.mark.parametrize('distribution', ['uniform', 'log-uniform'])
+def test_same_seed_same_result_for_any_chunk_size(store, distribution):
+    expected = ranking(store, 42, distribution=distribution)
+    for chunk_size in (1, 7, 300, None):
+        assert_same_result(ranking(store, 42, distribution=distribution, chunk_size=chunk_size), expected)
+
+    other = ranking(store, 43, distribution=distribution)
+    assert not np.array_equal(other['mean_score'], expected['mean_score'], equal_nan=True)
+
+
+def test_same_seed_same_result_in_other_processes(store):
+    # El orden de iteración de un conjunto de claves depende de PYTHONHASHSEED
+    code = (
+        "import numpy as np; from material_selection import MaterialDatabase; "
+        "from monte_carlo import formula_score, monte_carlo_ranking; "
+        "from performance_indices import compile_formula; "
+        "store = MaterialDatabase().store; "
+        f"score = formula_score(compile_formula({FORMULA!r}, store.property_keys)); "
+        "result = monte_carlo_ranking(store, np.arange(len(store)), score, n_samples=300, top_k=3, seed=42); "
+        "print(result['mean_score'].tolist())"
+    )
+    outputs = set()
+    for hash_seed in ('1', '2', '3'):
+        env = dict(os.environ, PYTHONHASHSEED=hash_seed, PYTHONPATH=str(ROOT))
+        outputs.add(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                   check=True, cwd=ROOT, env=env).stdout)
+    assert len(outputs) == 1
+    assert outputs.pop().strip() == str(ranking(store, 42)['mean_score'].tolist())
+
+
+def test_point_ranges_give_a_deterministic_ranking():
+    database = MaterialDatabase()
+    store = database.store
+    for key in store.property_keys:
+        store.maxs[key] = store.mins[key].copy()
+    formula = compile_formula(FORMULA, store.property_keys)
+    values = formula.evaluate(store, np.arange(len(store)))
+
+    result = ranking(store, None, score=formula_score(formula))
+    valid = np.isfinite(values)
+    best = np.flatnonzero(valid)[np.argsort(-values[valid], kind='stable')]
+    assert np.flatnonzero(result['first_probability']).tolist() == [best[0]]
+    assert sorted(np.flatnonzero(result['top_k_probability'])) == sorted(best[:3])
+    np.testing.assert_allclose(result['mean_score'][valid], values[valid])
+
+
+def test_probabilities_add_up(store):
+    formulas = [compile_formula(text, store.property_keys) for text in ('young_modulus / density', '1 / price')]
+    result = ranking(store, 5, score=weighted_score(formulas, [0.7, 0.3]))
+    assert result['first_probability'].sum() == pytest.approx(1.0)
+    assert result['top_k_probability'].sum() == pytest.approx(3.0)
@@ -0,0 +1,49 @@
+"""Análisis multi-criterio sin Streamlit"""
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from integration_example import CUSTOM_PERFORMANCE_INDICES, multi_criteria_analysis
+from material_selection import MaterialDatabase
+from multi_criteria import multi_criteria_scores, normalize_criteria, weighted_scores
+
+
+def test_integration_example_does_not_import_streamlit():
+    code = "import sys, batch_runner, integration_example; print('streamlit' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
+
+
+def test_analysis_with_explicit_database():
+    database = MaterialDatabase()
+    criteria = list(CUSTOM_PERFORMANCE_INDICES)[:3]
+    weights = {criterion: 1 / len(criteria) for criterion in criteria}
+    # Los criterios desconocidos se ignoran, también en el lote de pesos
+    weights_with_unknown = dict(weights, desconocido=0.5)
+    batch = np.tile([0.2, 0.3, 0.5, 0.9], (10, 1))
+
+    results = multi_criteria_analysis(database.materials, weights_with_unknown, database, weight_batch=batch, top_n=3)
+
+    rows = np.arange(len(database.store))
+    scores, sensitivity = multi_criteria_scores(
+        database.store, rows, [CUSTOM_PERFORMANCE_INDICES[criterion] for criterion in criteria],
+        list(weights.values()), batch[:, :3], top_n=3
+    )
+    expected = sorted(zip(scores, database.store.names), key=lambda item: -item[0])
+    assert results['Material'].tolist() == [name for _, name in expected]
+    np.testing.assert_allclose(results['Puntuación'], [score for score, _ in expected])
+    assert results['Ranking'].tolist() == list(range(1, len(results) + 1))
+    assert results['Frecuencia top 3'].sum() == pytest.approx(3.0)
+    assert sensitivity['first_frequency'].sum() == pytest.approx(1.0)
+
+    with pytest.raises(ValueError):
+        multi_criteria_analysis(database.materials, weights_with_unknown, database, weight_batch=batch[:, :3])
+
+
+def test_scores_redistribute_missing_criteria():
+    normalized = normalize_criteria([[1.0, np.nan], [3.0, 10.0], [2.0, 20.0]])
+    np.testing.assert_allclose(normalized, [[0.0, np.nan], [1.0, 0.0], [0.5, 1.0]])
+    # Sin el segundo criterio, el primero recibe todo el peso
+    np.testing.assert_allclose(weighted_scores(normalized, [0.5, 0.5]), [0.0, 0.5, 0.75])
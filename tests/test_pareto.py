@@ -0,0 +1,78 @@
+"""Frontera de Pareto: barrido 2-D, frontera N-D sobre rangos y capas"""
+import numpy as np
+import pytest
+
+from pareto import pareto_front, pareto_front_2d, pareto_layers
+
+
+def test_exact_duplicates_stay_on_front():
+    np.testing.assert_array_equal(pareto_front_2d([1, 1, 2], [3, 3, 1]), [0, 1, 2])
+
+
+@pytest.mark.parametrize('x_direction', ['max', 'min'])
+@pytest.mark.parametrize('y_direction', ['max', 'min'])
+@pytest.mark.parametrize('seed', range(5))
+def test_ties_match_nd_front(x_direction, y_direction, seed):
+    rng = np.random.default_rng(seed)
+    # Valores enteros en una rejilla pequeña: muchos empates en x, en y y en ambos
+    x = rng.integers(0, 6, 200).astype(float)
+    y = rng.integers(0, 6, 200).astype(float)
+    x[rng.random(200) < 0.05] = np.nan
+
+    front_2d = pareto_front_2d(x, y, x_direction, y_direction)
+    front_nd = pareto_front(np.column_stack([x, y]), directions=[x_direction, y_direction])
+    np.testing.assert_array_equal(np.sort(front_2d), front_nd)
+    # El resultado se devuelve ordenado por x creciente
+    assert np.all(np.diff(x[front_2d]) >= 0)
+
+
+def brute_force_front(lo, hi, directions, dominance):
+    """Frontera por comparación de todos los pares, como referencia"""
+    signs = np.array([1.0 if direction == 'max' else -1.0 for direction in directions])
+    low, high = lo * signs, hi * signs
+    best, worst = np.maximum(low, high), np.minimum(low, high)
+    queries, references = {'point': (best, best), 'surely': (best, worst), 'possibly': (worst, best)}[dominance]
+    front = []
+    for row in range(len(lo)):
+        if np.isnan(best[row]).any() or np.isnan(worst[row]).any():
+            continue
+        dominated = False
+        for other in range(len(lo)):
+            if other == row or np.isnan(best[other]).any() or np.isnan(worst[other]).any():
+                continue
+            if np.all(references[other] >= queries[row]) and np.any(references[other] > queries[row]):
+                dominated = True
+                break
+        if not dominated:
+            front.append(row)
+    return np.array(front, dtype=np.intp)
+
+
+@pytest.mark.parametrize('dominance', ['point', 'surely', 'possibly'])
+@pytest.mark.parametrize('n_objectives', [2, 3, 4])
+@pytest.mark.parametrize('seed', range(3))
+def test_nd_interval_front_matches_brute_force(dominance, n_objectives, seed):
+    rng = np.random.default_rng(seed)
+    lo = rng.integers(0, 8, (150, n_objectives)).astype(float)
+    hi = lo + rng.integers(0, 3, (150, n_objectives))
+    lo[rng.random(150) < 0.05, 0] = np.nan
+    directions = ['max', 'min', 'max', 'min'][:n_objectives]
+
+    # block_size pequeño para recorrer varios bloques
+    front = pareto_front(lo, hi, directions, dominance, block_size=16)
+    np.testing.assert_array_equal(front, brute_force_front(lo, hi, directions, dominance))
+
+
+def test_layers_peel_successive_fronts():
+    rng = np.random.default_rng(7)
+    points = rng.integers(0, 10, (120, 3)).astype(float)
+    layers = pareto_layers(points, directions=['max', 'min', 'max'])
+
+    remaining = np.arange(len(points))
+    layer = 1
+    while len(remaining):
+        front = remaining[brute_force_front(points[remaining], points[remaining], ['max', 'min', 'max'], 'point')]
+        assert set(np.flatnonzero(layers == layer)) == set(front)
+        remaining = np.setdiff1d(remaining, front)
+        layer += 1
+    assert pareto_layers(points, max_layers=1).max() == 2
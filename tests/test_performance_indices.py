@@ -0,0 +1,52 @@
+"""Compilación de fórmulas de índices: los errores siempre son FormulaError"""
+import numpy as np
+import pytest
+
+from material_store import ColumnarMaterialStore
+from performance_indices import FormulaError, compile_formula
+
+KEYS = ('density', 'young_modulus')
+
+
+@pytest.mark.parametrize('expression', [
+    'density * ' + '9' * 400,
+    'density ** ' + '9' * 400,
+    'density ** 1e400',
+    '1e400 / density',
+    'density ** (2 ** 10000)',
+    'density ** (1 / 0)',
+])
+def test_out_of_range_constants_raise_formula_error(expression):
+    with pytest.raises(FormulaError):
+        compile_formula(expression, KEYS)
+
+
+@pytest.mark.parametrize('expression', [
+    '-' * 200000 + 'density',
+    '-' * 490 + 'density',
+    '(' * 240 + 'density' + ')' * 240,
+    'sqrt(' * 80 + 'density' + ')' * 80,
+    ' + '.join(['density'] * 100),
+])
+def test_oversized_or_deeply_nested_formulas_raise_formula_error(expression):
+    with pytest.raises(FormulaError):
+        compile_formula(expression, KEYS)
+
+
+def test_nesting_within_limits_compiles_and_evaluates():
+    store = ColumnarMaterialStore.from_dict({
+        'A': {'family': 'F', 'color': '#000000', 'density': (1.0, 4.0), 'young_modulus': (2.0, 8.0)}
+    }, KEYS)
+    formula = compile_formula('-' * 40 + 'density', KEYS)
+    np.testing.assert_allclose(formula.evaluate(store, np.arange(1)), [2.5])
+
+
+def test_formula_value_and_bounds():
+    store = ColumnarMaterialStore.from_dict({
+        'A': {'family': 'F', 'color': '#000000', 'density': (1.0, 4.0), 'young_modulus': (2.0, 8.0)}
+    }, KEYS)
+    formula = compile_formula('young_modulus ** 0.5 / density', KEYS)
+    rows = np.arange(1)
+    np.testing.assert_allclose(formula.evaluate(store, rows), [np.sqrt(5.0) / 2.5])
+    low, high = formula.evaluate_bounds(store, rows)
+    np.testing.assert_allclose([low[0], high[0]], [np.sqrt(2.0) / 4.0, np.sqrt(8.0) / 1.0])
@@ -0,0 +1,117 @@
+"""Perfilador de ejecuciones: anidamiento, memoria, aislamiento por hilo y registro JSON"""
+import io
+import json
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from profiling import RerunProfiler, active_profiler, annotate, enable_json_logging, logger, span, timed
+
+
+@timed('decorada')
+def decorated():
+    with span('dentro'):
+        return 42
+
+
+def test_spans_nest_in_order():
+    profiler = RerunProfiler()
+    with profiler.activate():
+        with span('externo'):
+            with span('primero'):
+                time.sleep(0.01)
+            assert decorated() == 42
+        with span('final'):
+            pass
+
+    assert [(record['name'], record['depth']) for record in profiler.spans] == [
+        ('externo', 0), ('primero', 1), ('decorada', 1), ('dentro', 2), ('final', 0)
+    ]
+    outer, first, function, inner, last = profiler.spans
+    assert first['seconds'] >= 0.01
+    assert outer['seconds'] >= first['seconds'] + function['seconds']
+    assert function['seconds'] >= inner['seconds']
+    offsets = [record['offset_seconds'] for record in profiler.spans]
+    assert offsets == sorted(offsets)
+    assert last['offset_seconds'] >= outer['offset_seconds'] + outer['seconds']
+    assert profiler.total_seconds >= outer['seconds'] + last['seconds']
+
+
+def test_without_profiler_spans_do_nothing():
+    assert active_profiler() is None
+    with span('libre') as record:
+        assert record is None
+    annotate(ignorado=True)
+    assert decorated() == 42
+
+
+def test_span_is_closed_when_the_block_fails():
+    profiler = RerunProfiler()
+    with profiler.activate():
+        with pytest.raises(RuntimeError):
+            with span('falla'):
+                raise RuntimeError
+        with span('siguiente'):
+            pass
+    assert [(record['name'], record['depth']) for record in profiler.spans] == [('falla', 0), ('siguiente', 0)]
+    assert profiler.spans[0]['seconds'] is not None
+    assert active_profiler() is None
+
+
+def test_memory_peaks_propagate_to_enclosing_spans():
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc ya está activo")
+    profiler = RerunProfiler(memory=True)
+    with profiler.activate():
+        with span('externo'):
+            with span('reserva'):
+                block = np.ones(2_000_000)
+                del block
+            with span('pequeño'):
+                pass
+    assert not tracemalloc.is_tracing()
+    outer, allocation, small = profiler.spans
+    assert allocation['peak_bytes'] >= 16_000_000
+    assert outer['peak_bytes'] >= allocation['peak_bytes']
+    assert small['peak_bytes'] < 1_000_000
+    assert all('_start_bytes' not in record for record in profiler.spans)
+
+
+def test_profilers_are_isolated_per_thread():
+    main, other = RerunProfiler(), RerunProfiler()
+
+    def run_other():
+        with other.activate():
+            with span('hilo'):
+                pass
+
+    with main.activate():
+        with span('principal'):
+            thread = threading.Thread(target=run_other)
+            thread.start()
+            thread.join()
+    assert [record['name'] for record in main.spans] == ['principal']
+    assert [record['name'] for record in other.spans] == ['hilo']
+
+
+def test_summary_is_logged_as_one_json_line():
+    stream = io.StringIO()
+    handlers = list(logger.handlers)
+    enable_json_logging(stream)
+    try:
+        profiler = RerunProfiler(log=True)
+        with profiler.activate():
+            annotate(materiales=3)
+            with span('etapa'):
+                pass
+    finally:
+        logger.handlers[:] = handlers
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record['event'] == 'rerun' and record['fields'] == {'materiales': 3}
+    assert [item['name'] for item in record['spans']] == ['etapa']
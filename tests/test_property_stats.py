@@ -0,0 +1,101 @@
+"""Estadísticas por propiedad: extremos, distribución diferida y sincronización incremental"""
+import numpy as np
+import pytest
+
+from material_store import ColumnarMaterialStore
+from property_stats import PropertyStatistics
+
+KEYS = ('density', 'price')
+
+
+def make_store():
+    return ColumnarMaterialStore.from_dict({
+        f'm{row}': {'family': 'A' if row % 2 else 'B', 'color': '#000000',
+                    'density': (float(row + 1), float(row + 2))}
+        for row in range(6)
+    }, KEYS)
+
+
+def assert_same_statistics(statistics, store):
+    rebuilt = PropertyStatistics(store, statistics.n_bins)
+    for key in store.property_keys:
+        entry, expected = statistics.properties[key], rebuilt.properties[key]
+        if expected is None:
+            assert entry is None
+            continue
+        for name in ('min', 'max', 'positive_min'):
+            assert entry[name] == expected[name]
+        for name in ('family_min', 'family_max'):
+            assert entry[name].keys() == expected[name].keys()
+            np.testing.assert_array_equal(list(entry[name].values()), list(expected[name].values()))
+        np.testing.assert_allclose(list(entry['quantiles'].values()), list(expected['quantiles'].values()))
+        np.testing.assert_array_equal(entry['log_histogram'][0], expected['log_histogram'][0])
+        assert entry['summary'] == pytest.approx(expected['summary'])
+
+
+def test_inserts_patch_the_extremes(monkeypatch):
+    store = make_store()
+    statistics = PropertyStatistics(store)
+    statistics.properties['density']['summary']
+
+    indexed = []
+    original = PropertyStatistics._index_property
+    monkeypatch.setattr(PropertyStatistics, '_index_property',
+                        lambda self, key: indexed.append(key) or original(self, key))
+    store.append_records({
+        'ligero': {'family': 'A', 'color': '#000000', 'density': (0.5, 0.8)},
+        'nueva familia': {'family': 'C', 'color': '#111111', 'density': (3.0, 50.0), 'price': (2.0, 4.0)},
+    })
+    statistics.sync()
+
+    # Solo se indexa desde cero la propiedad que no tenía ningún valor
+    assert indexed == ['price']
+    assert statistics.version == store.version
+    assert statistics.bounds('density') == (0.5, 50.0)
+    assert_same_statistics(statistics, store)
+
+
+def test_edits_rebuild_the_statistics(monkeypatch):
+    store = make_store()
+    statistics = PropertyStatistics(store)
+
+    indexed = []
+    original = PropertyStatistics._index_property
+    monkeypatch.setattr(PropertyStatistics, '_index_property',
+                        lambda self, key: indexed.append(key) or original(self, key))
+    # La edición reduce el máximo global: no se puede ajustar con las filas nuevas
+    store.update_record('m5', {'family': 'A', 'color': '#000000', 'density': (1.0, 2.0)})
+    statistics.sync()
+
+    assert sorted(indexed) == sorted(KEYS)
+    assert statistics.bounds('density') == (1.0, 6.0)
+    assert_same_statistics(statistics, store)
+
+
+def test_sync_without_changes_keeps_the_entries():
+    store = make_store()
+    statistics = PropertyStatistics(store)
+    entry = statistics.properties['density']
+    statistics.sync()
+    assert statistics.properties['density'] is entry
+
+
+def test_extremes_and_lazy_distribution():
+    store = make_store()
+    statistics = PropertyStatistics(store, n_bins=4)
+    entry = statistics.properties['density']
+
+    assert statistics.bounds('density') == (1.0, 7.0)
+    assert statistics.properties['price'] is None and statistics.bounds('price') is None
+    assert entry['positive_min'] == 1.0
+    assert entry['family_min'] == {'B': 1.0, 'A': 2.0}
+    assert entry['family_max'] == {'B': 6.0, 'A': 7.0}
+    # La distribución solo se calcula al pedirla
+    assert 'quantiles' not in entry
+    midpoints = np.arange(6) + 1.5
+    assert entry['quantiles'][0.5] == pytest.approx(np.median(midpoints))
+    assert entry['log_histogram'][0].sum() == 6
+    assert statistics.describe('density')['mean'] == pytest.approx(midpoints.mean())
+    assert statistics.describe('density', np.array([0, 1]))['max'] == pytest.approx(2.5)
+    with pytest.raises(KeyError):
+        entry['desconocida']
@@ -0,0 +1,61 @@
+"""Selección parcial de rankings: mismo resultado que un ordenamiento estable completo"""
+import numpy as np
+import pytest
+
+from ranking import bottom_k, rank_page, top_k
+
+
+def stable_ranking(values, largest=True):
+    values = np.asarray(values, dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    oriented = -values[valid] if largest else values[valid]
+    return valid[np.argsort(oriented, kind='stable')]
+
+
+@pytest.fixture
+def values():
+    # Muchos empates y NaN para comprobar el desempate por fila
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 20, 500).astype(float)
+    values[rng.choice(500, 50, replace=False)] = np.nan
+    return values
+
+
+@pytest.mark.parametrize('k', [0, 1, 7, 100, 449, 450, 1000])
+def test_top_and_bottom_k_match_argsort(values, k):
+    np.testing.assert_array_equal(top_k(values, k), stable_ranking(values)[:k])
+    np.testing.assert_array_equal(bottom_k(values, k), stable_ranking(values, largest=False)[:k])
+
+
+def test_pages_cover_the_full_ranking(values):
+    pages = [rank_page(values, page, 40) for page in range(12)]
+    np.testing.assert_array_equal(np.concatenate(pages), stable_ranking(values))
+    assert len(rank_page(values, 20, 40)) == 0
+
+
+def test_all_nan_gives_empty_ranking():
+    assert len(top_k([np.nan, np.nan], 3)) == 0
+
+
+def test_rank_by_formula_skips_non_finite_values():
+    pytest.importorskip('streamlit')
+    from ashby_app import rank_by_formula
+    from material_selection import MaterialDatabase
+    from performance_indices import compile_formula
+
+    database = MaterialDatabase()
+    # Con densidad nula el índice es infinito y no se clasifica
+    database.add_materials({'Cero': {'family': 'Metales', 'color': '#000000',
+                                     'density': [0.0, 0.0], 'young_modulus': [1.0, 2.0]}})
+    store = database.store
+    rows = np.arange(len(store))
+    formula = compile_formula('young_modulus / density', store.property_keys)
+    values = formula.evaluate(store, rows)
+
+    table = rank_by_formula(store, rows, formula, limit=5)
+    finite = np.where(np.isfinite(values), values, np.nan)
+    expected = stable_ranking(finite)[:5]
+    assert table['Material'].tolist() == [store.names[row] for row in expected]
+    low, high = formula.evaluate_bounds(store, rows[expected])
+    np.testing.assert_allclose(table['Mínimo'], low)
+    np.testing.assert_allclose(table['Máximo'], high)
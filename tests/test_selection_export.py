@@ -0,0 +1,68 @@
+"""Exportación por tramos: ida y vuelta con catalog_import y descargas desde fichero temporal"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from catalog_import import import_catalog
+from material_selection import MaterialDatabase
+from selection_export import export_bytes, export_selection
+
+
+@pytest.fixture
+def database():
+    database = MaterialDatabase()
+    # Un material sin precio: la celda se exporta vacía (null)
+    database.add_materials({'Sin precio': {'family': 'Metales', 'color': '#123456',
+                                           'density': [1000.0, 1100.0], 'young_modulus': [1.5, 2.5]}})
+    return database
+
+
+@pytest.mark.parametrize('file_format', ['csv', 'jsonl'])
+@pytest.mark.parametrize('naming', ['display', 'keys'])
+def test_round_trip_through_catalog_import(tmp_path, database, file_format, naming):
+    store = database.store
+    rows = np.arange(len(store))[::-1]
+    path = tmp_path / f'seleccion.{file_format}'
+    # Tramos pequeños para que la exportación ocupe varios
+    export_selection(store, rows, path, file_format, properties=database.properties, naming=naming, chunk_size=4)
+
+    # La expansión térmica de la fibra de carbono incluye valores negativos
+    imported, report = import_catalog(path, database.properties, known_families=store.families, positive_keys=())
+    assert report.summary() == {'aceptados': len(rows), 'rechazados': 0, 'errores': 0}
+    assert imported.names == [store.names[row] for row in rows]
+    assert [imported.color_of(row) for row in range(len(imported))] == [store.color_of(row) for row in rows]
+    for key in store.property_keys:
+        np.testing.assert_array_equal(imported.mins[key], store.mins[key][rows])
+        np.testing.assert_array_equal(imported.maxs[key], store.maxs[key][rows])
+
+
+def test_projection_and_missing_values(database):
+    store = database.store
+    row = store.name_to_row['Sin precio']
+    data = export_bytes(store, [row], 'jsonl', columns=['price_max', 'name'], naming='keys')
+    assert [json.loads(line) for line in data.decode('utf-8').splitlines()] == [
+        {'price_max': None, 'name': 'Sin precio'}
+    ]
+    with pytest.raises(KeyError):
+        export_bytes(store, [row], 'csv', columns=['desconocida'])
+
+
+def test_empty_selection_writes_header(database):
+    data = export_bytes(database.store, [], 'csv', columns=['name', 'density_min'], naming='keys')
+    assert data.decode('utf-8').splitlines() == ['name,density_min']
+
+
+def test_temporary_export_for_downloads(database):
+    from advanced_features import ExportTools
+
+    tools = ExportTools(database)
+    exported = tools.export_to_temporary_file(database.materials, 'csv', columns=['Material'])
+    assert exported.available
+    with open(exported.path, 'rb') as handle:
+        assert handle.read() == tools.export_materials_list(database.materials, columns=['Material'])
+
+    path = exported.path
+    del exported
+    assert not os.path.exists(path)